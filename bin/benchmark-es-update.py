@@ -0,0 +1,72 @@
+"""
+Benchmarks the fitness shaping and update step (i.e. `post_process`) of the ES and NES optimizers for a large
+dimension and population size, reporting the run time and the peak memory allocated by the update.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+
+from l2l.optimizers.evolutionstrategies import EvolutionStrategiesParameters, EvolutionStrategiesOptimizer
+from l2l.optimizers.naturalevolutionstrategies import NaturalEvolutionStrategiesParameters, \
+    NaturalEvolutionStrategiesOptimizer
+from l2l.utils.trajectory import Trajectory
+
+logger = logging.getLogger('bin.benchmark-es-update')
+
+
+def create_optimizer(name, dimension, pop_size, dtype):
+    traj = Trajectory(name='benchmark-{}'.format(name))
+
+    def create_individual():
+        return {'coords': np.zeros(dimension)}
+
+    if name == 'es':
+        parameters = EvolutionStrategiesParameters(
+            learning_rate=0.1, noise_std=0.1, mirrored_sampling_enabled=True, fitness_shaping_enabled=True,
+            pop_size=pop_size, n_iteration=2, stop_criterion=np.inf, seed=1, dtype=dtype)
+        optimizer = EvolutionStrategiesOptimizer(traj, optimizee_create_individual=create_individual,
+                                                 optimizee_fitness_weights=(1.,), parameters=parameters)
+    else:
+        parameters = NaturalEvolutionStrategiesParameters(
+            learning_rate_mu=1., learning_rate_sigma=None, mu=np.zeros(dimension), sigma=np.ones(dimension),
+            mirrored_sampling_enabled=True, fitness_shaping_enabled=True, pop_size=pop_size, n_iteration=2,
+            stop_criterion=np.inf, seed=1, dtype=dtype)
+        optimizer = NaturalEvolutionStrategiesOptimizer(traj, optimizee_create_individual=create_individual,
+                                                        optimizee_fitness_weights=(1.,), parameters=parameters)
+    return traj, optimizer
+
+
+def benchmark(name, dimension, pop_size, dtype):
+    traj, optimizer = create_optimizer(name, dimension, pop_size, dtype)
+    individuals = traj.individuals[0]
+    fitnesses = np.random.RandomState(0).randn(len(individuals))
+    traj.current_results = [(individual.ind_idx, (fitness,)) for individual, fitness in zip(individuals, fitnesses)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    optimizer.post_process(traj, list(traj.current_results))
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Includes sampling the next generation, which allocates the new population and perturbations
+    print('{:>3}: d={}, pop_size={} ({} individuals), {}: {:.3f} s, peak memory {:.1f} MiB'.format(
+        name, dimension, pop_size, len(individuals), dtype, duration, peak / 2 ** 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dimension', type=int, default=100000)
+    parser.add_argument('--pop-size', type=int, default=1000)
+    parser.add_argument('--dtype', default='float32', choices=['float32', 'float64'])
+    parser.add_argument('--optimizers', nargs='+', default=['es', 'nes'], choices=['es', 'nes'])
+    args = parser.parse_args()
+
+    for name in args.optimizers:
+        benchmark(name, args.dimension, args.pop_size, args.dtype)
+
+
+if __name__ == '__main__':
+    main()
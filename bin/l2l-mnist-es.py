@@ -63,7 +63,8 @@ def run_experiment():
 
     optimizee_seed = 200
 
-    optimizee_parameters = MNISTOptimizeeParameters(n_hidden=10, seed=optimizee_seed, use_small_mnist=True)
+    optimizee_parameters = MNISTOptimizeeParameters(n_hidden=10, seed=optimizee_seed, use_small_mnist=True,
+                                                    data_path=paths.data_path)
     ## Innerloop simulator
     optimizee = MNISTOptimizee(traj, optimizee_parameters)
     # Prepare optimizee for jube runs
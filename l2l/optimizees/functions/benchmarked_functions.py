@@ -1,13 +1,19 @@
 from l2l.optimizees.functions.function_generator import FunctionGenerator, GaussianParameters, \
     MichalewiczParameters, ShekelParameters, EasomParameters, LangermannParameters, \
-    RastriginParameters, ChasmParameters, RosenbrockParameters, AckleyParameters, PermutationParameters
+    RastriginParameters, ChasmParameters, RosenbrockParameters, AckleyParameters, PermutationParameters, \
+    SphereParameters, EllipsoidParameters, RotatedParameters
 from collections import OrderedDict
+from functools import partial
 
 
 class BenchmarkedFunctions:
     """
     Implements benchmarked functions class for an easier call of the benchmarked functions
 
+    Besides the fixed low-dimensional benchmarks, it provides dimension-parameterised benchmarks (e.g. "Sphere1000d",
+    "RotatedRastrigin10000d") at 100, 1000 and 10000 dimensions, which are meant for testing how optimizers scale.
+    The rotated variants use a block-diagonal rotation with blocks of size 100 (see
+    :class:`~l2l.optimizees.functions.function_generator.Rotated`).
     """
     def __init__(self):
         self.function_name_map = [("Rastrigin2d", self._create_rastrigin2d),
@@ -25,9 +31,18 @@ class BenchmarkedFunctions:
                                   ("Easom2d", self._create_easom2d),
                                   ("Easom10d", self._create_easom10d),
                                   ("3Gaussians2d", self._create_3gaussians2d)]
+        for dims in self.scalable_dims:
+            self.function_name_map += [
+                (name + "{}d".format(dims), partial(self._create_scalable, function_parameters, dims))
+                for name, function_parameters in self._get_scalable_function_parameters(dims)]
         self.function_name_index_map = OrderedDict([(name, index)
                                                     for index, (name, _) in enumerate(self.function_name_map)])
 
+    #: Dimensionalities at which the dimension-parameterised benchmarks are provided
+    scalable_dims = (100, 1000, 10000)
+    #: Block size of the block-diagonal rotation used in the rotated benchmarks
+    rotation_block_size = 100
+
     def get_function_by_index(self, id_, noise=False, mu=0., sigma=0.01):
         """
         Get the benchmarked function with given id
@@ -131,3 +146,19 @@ class BenchmarkedFunctions:
                      GaussianParameters(sigma=[[.25, .3], [.3, 1.]], mean=[1., 1.]),
                      GaussianParameters(sigma=[[.5, .25], [.25, 1.3]], mean=[2., -2.])]
         return FunctionGenerator(fg_params, dims=2, noise=noise, mu=mu, sigma=sigma)
+
+    def _get_scalable_function_parameters(self, dims):
+        block_size = min(dims, self.rotation_block_size)
+        return [("Sphere", SphereParameters()),
+                ("Ellipsoid", EllipsoidParameters(condition='default')),
+                ("Rastrigin", RastriginParameters()),
+                ("Rosenbrock", RosenbrockParameters()),
+                ("Ackley", AckleyParameters()),
+                ("RotatedEllipsoid", RotatedParameters(EllipsoidParameters(condition='default'),
+                                                       block_size=block_size, seed=dims)),
+                ("RotatedRastrigin", RotatedParameters(RastriginParameters(), block_size=block_size, seed=dims)),
+                ("RotatedRosenbrock", RotatedParameters(RosenbrockParameters(), block_size=block_size, seed=dims)),
+                ("RotatedAckley", RotatedParameters(AckleyParameters(), block_size=block_size, seed=dims))]
+
+    def _create_scalable(self, function_parameters, dims, noise, mu, sigma):
+        return FunctionGenerator([function_parameters], dims=dims, noise=noise, mu=mu, sigma=sigma)
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from collections import namedtuple, OrderedDict
 
 import numpy as np
+from scipy.linalg import solve_triangular
 
 
 class FunctionGenerator:
@@ -25,23 +26,13 @@ class FunctionGenerator:
         self.mu = mu
         self.sigma = sigma
         self.actual_optima = None
-        cost_functions = dict(GaussianParameters=Gaussian,
-                              PermutationParameters=Permutation,
-                              EasomParameters=Easom,
-                              LangermannParameters=Langermann,
-                              MichalewiczParameters=Michalewicz,
-                              ShekelParameters=Shekel,
-                              RastriginParameters=Rastrigin,
-                              RosenbrockParameters=Rosenbrock,
-                              AckleyParameters=Ackley,
-                              ChasmParameters=Chasm)
 
         self.gen_functions = []
         self.function_parameters = fg_params
         # The class name of the parameter named tuple indexes the actual function class,
         # which is initialized using the given param and dims
         for param in fg_params:
-            function_class = cost_functions[param.__class__.__name__](param, dims)
+            function_class = FUNCTION_CLASSES[param.__class__.__name__](param, dims)
             self.gen_functions.append(function_class)
 
         if bound is not None:
@@ -57,16 +48,24 @@ class FunctionGenerator:
         """It gets the value of the function. If the function includes noise, the `random_state`
         parameter must be specified
 
+        :param x: Either a single point (vector of length `dims`) or a batch of points given as an
+            array of shape (N, dims)
         :param ~numpy.random.RandomState random_state: The random generator used to generate the
-            noise for the function.
+            noise for the function. For a batch of points, one noise value is drawn per point.
+
+        :return: The scalar function value for a single point, or an array of N values for a batch
         """
+        x = np.asarray(x)
         res = 0.
         for f in self.gen_functions:
             res += f(x)
 
         if self.noise:
             assert isinstance(random_state, np.random.RandomState)
-            res += random_state.normal(self.mu, self.sigma)
+            if x.ndim > 1:
+                res += random_state.normal(self.mu, self.sigma, size=x.shape[:-1])
+            else:
+                res += random_state.normal(self.mu, self.sigma)
 
         return res
 
@@ -87,14 +86,16 @@ class FunctionGenerator:
 
 class Function(ABC):
     """
-    Base class for all test functions.
+    Base class for all test functions. All functions are evaluated along the last axis of their input, so that a
+    batch of points can be evaluated in a single call.
     """
 
     @abstractmethod
     def __call__(self, x):
         """
-        :param x: input data vector with length equal to the function dimensionality
-        :return: the resulting scalar output of the function
+        :param x: input data vector with length equal to the function dimensionality, or an array of shape
+            (N, dims) containing N such vectors
+        :return: the resulting scalar output of the function, or an array of N outputs for a batch
         """
         pass
 
@@ -139,12 +140,11 @@ class Shekel(Function):
         self.bound = [0, 10]
 
     def __call__(self, x):
-        x = np.array(x)
-        value = 0
-        for i in range(self.A.shape[0]):
-            sum_diff_sq = np.sum((x - self.A[i]) ** 2 + self.c[i]) ** -1
-            value += sum_diff_sq
-        return -value
+        x = np.asarray(x)
+        # -> (..., m, dims) differences to all m minima
+        diff = x[..., np.newaxis, :] - self.A
+        sum_diff_sq = np.sum(diff ** 2 + self.c[:, np.newaxis], axis=-1) ** -1
+        return -np.sum(sum_diff_sq, axis=-1)
 
 
 MichalewiczParameters = namedtuple('MichalewiczParameters', ['m'])
@@ -174,11 +174,11 @@ class Michalewicz(Function):
         self.bound = [0, np.pi]
 
     def __call__(self, x):
-        x = np.array(x)
+        x = np.asarray(x)
         i = np.arange(1, self.dims + 1)
         a = (i * x ** 2) / np.pi
         b = np.sin(a) ** (2 * self.m)
-        value = -np.sum(np.sin(x) * b)
+        value = -np.sum(np.sin(x) * b, axis=-1)
         return value
 
 
@@ -220,12 +220,11 @@ class Langermann(Function):
         self.bound = [0, 10]
 
     def __call__(self, x):
-        x = np.array(x)
-        value = 0
-        for i in range(self.A.shape[0]):
-            sum_diff_sq = np.sum((x - self.A[i]) ** 2)
-            value += self.c[i] * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq)
-        return value
+        x = np.asarray(x)
+        # -> (..., m) squared distances to all m centers
+        sum_diff_sq = np.sum((x[..., np.newaxis, :] - self.A) ** 2, axis=-1)
+        value = self.c * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq)
+        return np.sum(value, axis=-1)
 
 
 EasomParameters = namedtuple('EasomParameters', [])
@@ -245,10 +244,10 @@ class Easom(Function):
         self.bound = [-10, 10]
 
     def __call__(self, x):
-        x = np.array(x)
+        x = np.asarray(x)
         cos_x = np.cos(x)
         x_min_pi = (x - np.pi) ** 2
-        value = -cos_x.prod() * np.exp(-np.sum(x_min_pi))
+        value = -cos_x.prod(axis=-1) * np.exp(-np.sum(x_min_pi, axis=-1))
         return value
 
 
@@ -283,17 +282,18 @@ class Permutation(Function):
         self.bound = [-dims, dims]
 
     def __call__(self, x):
-        x = np.array(x)
-        ks = np.array(range(1, self.dims + 1))
-        i = np.array(range(1, self.dims + 1))
-        value = np.array([np.sum((i ** k + self.beta) * ((x / i) ** k - 1), axis=0) for k in ks])
-        value = np.sum(value ** 2)
+        x = np.asarray(x)
+        ks = np.arange(1, self.dims + 1)[:, np.newaxis]
+        i = np.arange(1, self.dims + 1)
+        # Rows index the exponent k, columns the coordinate i -> (..., dims, dims)
+        value = np.sum((i ** ks + self.beta) * ((x[..., np.newaxis, :] / i) ** ks - 1), axis=-1)
+        value = np.sum(value ** 2, axis=-1)
         return value
 
 
 GaussianParameters = namedtuple('GaussianParameters', ['sigma', 'mean'])
 GaussianParameters.__doc__ = """
-:param sigma: covariance matrix
+:param sigma: covariance matrix, which has to be symmetric positive definite
 :param mean: list containing coordinates of the peak (mean, median, mode)
 """
 
@@ -301,6 +301,8 @@ GaussianParameters.__doc__ = """
 class Gaussian(Function):
     """
     The multi-dimensional Gaussian (normal) distribution function.
+    The Cholesky factor of the covariance matrix, its log-determinant and the log of the normalisation constant are
+    computed once at construction, so that an evaluation only requires a triangular solve.
 
     :param params: Instance of :func:`~collections.namedtuple` :class:`GaussianParameters`
     :param dims: dimensionality of the function
@@ -320,10 +322,23 @@ class Gaussian(Function):
         self.mean = mean
         self.bound = [-5, 5]
 
+        # Lower triangular L with sigma = L L^T
+        try:
+            self.sigma_cholesky = np.linalg.cholesky(np.atleast_2d(sigma))
+        except np.linalg.LinAlgError:
+            raise ValueError("The covariance matrix sigma is not symmetric positive definite.")
+        self.log_det_sigma = 2 * np.sum(np.log(np.diag(self.sigma_cholesky)))
+        # log(1 / sqrt((2 pi)^dims * det(sigma)))
+        self.log_normalisation = -0.5 * (dims * np.log(2 * np.pi) + self.log_det_sigma)
+
     def __call__(self, x):
-        x = np.array(x)
-        value = 1 / np.sqrt((2 * np.pi) ** self.dims * np.linalg.det(self.sigma))
-        value = value * np.exp(-0.5 * (np.transpose(x - self.mean).dot(np.linalg.inv(self.sigma))).dot((x - self.mean)))
+        x = np.asarray(x)
+        batch_shape = x.shape[:-1]
+        x_min_mean = np.reshape(x - self.mean, (-1, self.dims))
+        # Solving L z = (x - mean) gives the Mahalanobis distance as |z|^2, one column per point
+        z = solve_triangular(self.sigma_cholesky, x_min_mean.T, lower=True, check_finite=False)
+        mahalanobis_sq = np.sum(z ** 2, axis=0).reshape(batch_shape)
+        value = np.exp(self.log_normalisation - 0.5 * mahalanobis_sq)
         return -value
 
 
@@ -343,8 +358,8 @@ class Rastrigin(Function):
         self.bound = [-5, 5]
 
     def __call__(self, x):
-        x = np.array(x)
-        return np.sum(x ** 2 + 10 - 10 * np.cos(2 * np.pi * x))
+        x = np.asarray(x)
+        return np.sum(x ** 2 + 10 - 10 * np.cos(2 * np.pi * x), axis=-1)
 
 
 RosenbrockParameters = namedtuple('RosenbrockParameters', [])
@@ -363,11 +378,11 @@ class Rosenbrock(Function):
         self.bound = [-2, 2]
 
     def __call__(self, x):
-        x = np.array(x)
-        x_1 = x[1:self.dims]
-        x_0 = x[0:self.dims - 1]
+        x = np.asarray(x)
+        x_1 = x[..., 1:self.dims]
+        x_0 = x[..., 0:self.dims - 1]
         value = 100 * (x_1 - x_0 ** 2) ** 2 + (1 - x_0) ** 2
-        value = sum(value)
+        value = np.sum(value, axis=-1)
         return value
 
 
@@ -388,9 +403,9 @@ class Ackley(Function):
         self.bound = [-2, 2]
 
     def __call__(self, x):
-        x = np.array(x)
-        return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(x ** 2) / self.dims)) \
-            - np.exp(np.sum(np.cos(2 * np.pi * x)) / self.dims)
+        x = np.asarray(x)
+        return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(x ** 2, axis=-1) / self.dims)) \
+            - np.exp(np.sum(np.cos(2 * np.pi * x), axis=-1) / self.dims)
 
 
 ChasmParameters = namedtuple('ChasmParameters', [])
@@ -412,5 +427,121 @@ class Chasm(Function):
         self.bound = [-2, 2]
 
     def __call__(self, x):
-        x = np.array(x)
-        return 1e3 * np.abs(x[0]) / (1e3 * np.abs(x[0]) + 1) + 1e-2 * np.abs(x[1])
+        x = np.asarray(x)
+        return 1e3 * np.abs(x[..., 0]) / (1e3 * np.abs(x[..., 0]) + 1) + 1e-2 * np.abs(x[..., 1])
+
+
+SphereParameters = namedtuple('SphereParameters', [])
+
+
+class Sphere(Function):
+    """
+    The sphere function is a convex, unimodal function scalable to any dimensionality.
+    reference: https://www.sfu.ca/~ssurjano/spheref.html
+
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        self.dims = dims
+        self.bound = [-5, 5]
+
+    def __call__(self, x):
+        x = np.asarray(x)
+        return np.sum(x ** 2, axis=-1)
+
+
+EllipsoidParameters = namedtuple('EllipsoidParameters', ['condition'])
+EllipsoidParameters.__doc__ = """
+:param condition: ratio between the largest and the smallest axis weight (i.e. the condition number of the Hessian)
+"""
+
+
+class Ellipsoid(Function):
+    """
+    The ellipsoid function is a unimodal, ill-conditioned quadratic whose axis weights grow exponentially from 1 to
+    `condition`. The recommended value for the condition is 1e6 which is used if no parameters are given.
+    reference: Hansen, N. et al. Real-Parameter Black-Box Optimization Benchmarking 2009: Noiseless Functions
+    Definitions. INRIA Technical Report RR-6829 (2009).
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`EllipsoidParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        if params.condition == 'default':
+            self.condition = 1e6
+        else:
+            self.condition = params.condition
+
+        self.dims = dims
+        self.bound = [-5, 5]
+        exponents = np.arange(dims) / (dims - 1) if dims > 1 else np.zeros(1)
+        self.weights = self.condition ** exponents
+
+    def __call__(self, x):
+        x = np.asarray(x)
+        return np.sum(self.weights * x ** 2, axis=-1)
+
+
+RotatedParameters = namedtuple('RotatedParameters', ['function_parameters', 'block_size', 'seed'])
+RotatedParameters.__doc__ = """
+:param function_parameters: parameters (named tuple) of the function to be rotated
+:param block_size: size of the blocks of the block-diagonal rotation, must divide the dimensionality.
+  If None, a full rotation matrix is used
+:param seed: seed of the random generator used to generate the rotation
+"""
+
+
+class Rotated(Function):
+    """
+    Evaluates another function in a randomly rotated coordinate system, i.e. f(R x). This makes separable functions
+    non-separable. In order to scale to high dimensions, R is a random permutation of the coordinates followed by a
+    block-diagonal matrix of random orthogonal blocks of size `block_size`. It is precomputed at construction and
+    needs only dims * block_size values of memory instead of dims ** 2.
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`RotatedParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        block_size = dims if params.block_size is None else params.block_size
+        if dims % block_size != 0:
+            raise Exception("The block size must divide the dimensionality.")
+
+        function_class = FUNCTION_CLASSES[params.function_parameters.__class__.__name__]
+        self.function = function_class(params.function_parameters, dims)
+        self.dims = dims
+        self.bound = self.function.bound
+        self.block_size = block_size
+
+        random_state = np.random.RandomState(seed=np.uint32(params.seed))
+        self.permutation = random_state.permutation(dims)
+        # Random orthogonal blocks via QR decomposition of gaussian matrices (with the sign correction that makes
+        # them uniformly distributed)
+        gaussian_blocks = random_state.randn(dims // block_size, block_size, block_size)
+        q, r = np.linalg.qr(gaussian_blocks)
+        self.rotation_blocks = q * np.sign(np.diagonal(r, axis1=-2, axis2=-1))[:, np.newaxis, :]
+
+    def __call__(self, x):
+        x = np.asarray(x)
+        # -> (..., n_blocks, block_size, 1)
+        x_blocks = x[..., self.permutation].reshape(x.shape[:-1] + (-1, self.block_size, 1))
+        rotated_x = np.matmul(self.rotation_blocks, x_blocks).reshape(x.shape)
+        return self.function(rotated_x)
+
+
+# The class name of a parameter named tuple indexes the function class that implements it
+FUNCTION_CLASSES = dict(GaussianParameters=Gaussian,
+                        PermutationParameters=Permutation,
+                        EasomParameters=Easom,
+                        LangermannParameters=Langermann,
+                        MichalewiczParameters=Michalewicz,
+                        ShekelParameters=Shekel,
+                        RastriginParameters=Rastrigin,
+                        RosenbrockParameters=Rosenbrock,
+                        AckleyParameters=Ackley,
+                        ChasmParameters=Chasm,
+                        SphereParameters=Sphere,
+                        EllipsoidParameters=Ellipsoid,
+                        RotatedParameters=Rotated)
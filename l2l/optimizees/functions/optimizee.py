@@ -48,6 +48,12 @@ class FunctionGeneratorOptimizee(Optimizee):
         """
         return {'coords': np.clip(individual['coords'], a_min=self.bound[0], a_max=self.bound[1])}
 
+    def bounding_func_batch(self, population):
+        """
+        Bounds all individuals of the population (one flattened individual per row) via a single coordinate clipping
+        """
+        return np.clip(population, a_min=self.bound[0], a_max=self.bound[1])
+
     def simulate(self, traj):
         """
         Returns the value of the function chosen during initialization
@@ -0,0 +1,80 @@
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("optimizees.mnist.dataset")
+
+
+def _fetch_dataset(use_small_mnist):
+    """
+    Downloads (or loads from the sklearn package) the MNIST data and scales the pixel values to [0, 1].
+
+    :return: Tuple of images (n_images x n_input) and integer targets (n_images)
+    """
+    if use_small_mnist:
+        from sklearn.datasets import load_digits
+
+        # 8 x 8 images
+        mnist_digits = load_digits()
+        n_images = len(mnist_digits.images)  # 1797
+        data_images = mnist_digits.images.reshape(n_images, -1) / 16.  # -> 1797 x 64
+        data_targets = mnist_digits.target
+    else:
+        from sklearn.datasets import fetch_openml
+
+        # 28 x 28 images
+        mnist_digits = fetch_openml('mnist_784', version=1)
+        data_images = np.asarray(mnist_digits.data) / 255.  # -> 70000 x 784
+        data_targets = np.asarray(mnist_digits.target)
+    return data_images, data_targets.astype(np.int64)
+
+
+def _save_atomic(file_path, array):
+    """
+    Saves the array as .npy file such that concurrent readers never see a partially written file
+    """
+    tmp_file_path = '{}.tmp-{}'.format(file_path, os.getpid())
+    with open(tmp_file_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_file_path, file_path)
+
+
+def get_cache_file_paths(data_path, use_small_mnist, dtype):
+    """
+    :return: The paths of the cached images and targets files within `data_path`
+    """
+    dataset_name = 'small-mnist' if use_small_mnist else 'mnist'
+    images_file_path = os.path.join(data_path, '{}-images-{}.npy'.format(dataset_name, np.dtype(dtype).name))
+    targets_file_path = os.path.join(data_path, '{}-targets.npy'.format(dataset_name))
+    return images_file_path, targets_file_path
+
+
+def load_dataset(use_small_mnist, data_path=None, dtype=np.float64):
+    """
+    Loads the preprocessed MNIST images and targets. If `data_path` is given, the preprocessed data is cached there as
+    .npy files the first time it is loaded, and read as read-only memory maps afterwards. This makes loading
+    near-instant, works without network access once the cache exists, and lets all processes on a node share the
+    same pages of the data.
+
+    :param use_small_mnist: If True, the 8x8 digits dataset that ships with sklearn is used, otherwise the full 28x28
+        MNIST dataset from OpenML
+    :param data_path: Directory of the cache (e.g. :attr:`~l2l.paths.Paths.data_path`). If None, nothing is cached and
+        the data is loaded into memory
+    :param dtype: Floating point type in which the images are stored
+
+    :return: Tuple of images (n_images x n_input) and targets (n_images)
+    """
+    if data_path is None:
+        data_images, data_targets = _fetch_dataset(use_small_mnist)
+        return data_images.astype(dtype, copy=False), data_targets
+
+    images_file_path, targets_file_path = get_cache_file_paths(data_path, use_small_mnist, dtype)
+    if not (os.path.isfile(images_file_path) and os.path.isfile(targets_file_path)):
+        logger.info("Creating dataset cache in %s", data_path)
+        os.makedirs(data_path, exist_ok=True)
+        data_images, data_targets = _fetch_dataset(use_small_mnist)
+        _save_atomic(images_file_path, data_images.astype(dtype, copy=False))
+        _save_atomic(targets_file_path, data_targets)
+
+    return np.load(images_file_path, mmap_mode='r'), np.load(targets_file_path, mmap_mode='r')
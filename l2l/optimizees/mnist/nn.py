@@ -1,3 +1,6 @@
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
 
 
@@ -23,17 +26,84 @@ def softmax(a):
     return exp_a / np.sum(exp_a, axis=-1)
 
 
+class ActivationCache:
+    """
+    Least recently used cache of hidden layer activations, keyed by a hash of the hidden weights. All the entries
+    belong to the same inputs, so the cache is cleared whenever it is used with a different input array.
+
+    :param max_bytes: Upper bound on the memory used by the cached activations
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.n_hits, self.n_misses = 0, 0
+        self._entries = OrderedDict()
+        self._n_bytes = 0
+        self._inputs = None
+
+    def __getstate__(self):
+        # Neither the activations nor the inputs they belong to are pickled
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def get_key(hidden_weights):
+        return hashlib.blake2b(np.ascontiguousarray(hidden_weights).tobytes(), digest_size=16).digest()
+
+    def set_inputs(self, x):
+        """
+        Declares the inputs of the following lookups. Note that the inputs are compared by identity, not by value.
+        """
+        if x is not self._inputs:
+            self.clear()
+            self._inputs = x
+
+    def get(self, key):
+        activation = self._entries.get(key)
+        if activation is None:
+            self.n_misses += 1
+        else:
+            self.n_hits += 1
+            self._entries.move_to_end(key)
+        return activation
+
+    def put(self, key, activation):
+        if activation.nbytes > self.max_bytes:
+            return
+        self._entries[key] = activation
+        self._n_bytes += activation.nbytes
+        while self._n_bytes > self.max_bytes:
+            _, evicted_activation = self._entries.popitem(last=False)
+            self._n_bytes -= evicted_activation.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self._n_bytes = 0
+        self._inputs = None
+
+
 class NeuralNetworkClassifier:
-    def __init__(self, n_input, n_hidden, n_output):
+    def __init__(self, n_input, n_hidden, n_output, dtype=np.float64, activation_cache_bytes=None):
         """
 
         :param n_input:
         :param n_hidden:
         :param n_output:
+        :param dtype: Floating point type of the weights and activations
+        :param activation_cache_bytes: If not None, the hidden activations are cached (see :class:`.ActivationCache`)
+            using at most this many bytes, so that weight sets which only differ in the output weights are scored with
+            the small output layer product only
         """
         self.n_input, self.n_hidden, self.n_output = n_input, n_hidden, n_output
-        self.hidden_weights = np.zeros((self.n_hidden, self.n_input))
-        self.output_weights = np.zeros((self.n_output, self.n_hidden))
+        self.dtype = np.dtype(dtype)
+        self.activation_cache = None if activation_cache_bytes is None else ActivationCache(activation_cache_bytes)
+        self.hidden_weights = np.zeros((self.n_hidden, self.n_input), dtype=self.dtype)
+        self.output_weights = np.zeros((self.n_output, self.n_hidden), dtype=self.dtype)
 
     def get_weights_shapes(self):
         """
@@ -52,7 +122,7 @@ class NeuralNetworkClassifier:
         :param y: batch_size size
         :return:
         """
-        hidden_activation = sigmoid(np.dot(self.hidden_weights, x.T))  # -> n_hidden x batch_size
+        hidden_activation = self._get_hidden_activations(self.hidden_weights[np.newaxis], x)[0]  # -> n_hidden x batch_size
         output_activation = np.dot(self.output_weights, hidden_activation)  # -> n_output x batch_size
         output_labels = np.argmax(output_activation, axis=0)  # -> batch_size
         assert y.shape == output_labels.shape, "The shapes of y and output labels are %s, %s" % (y.shape, output_labels.shape)
@@ -61,6 +131,77 @@ class NeuralNetworkClassifier:
         score = n_correct / n_total
         return score
 
+    def score_batch(self, flattened_weights, x, y, max_chunk_bytes=256 * 2 ** 20):
+        """
+        Scores a whole population of weight sets on the same inputs. The population is processed in chunks such that
+        the hidden activations of a chunk take at most `max_chunk_bytes` of memory (but at least one weight set is
+        processed per chunk). Within a chunk, the hidden activations of all weight sets are computed with a single
+        matrix product.
+
+        :param flattened_weights: n_weight_sets x n_weights array, each row containing the hidden weights followed by
+            the output weights, both flattened in C order (i.e. the layout used by the MNIST optimizee)
+        :param x: batch_size x n_input size
+        :param y: batch_size size
+        :param max_chunk_bytes: Upper bound on the memory used for the hidden activations of one chunk
+        :return: n_weight_sets array containing the score of each weight set
+        """
+        flattened_weights = np.asarray(flattened_weights, dtype=self.dtype)
+        n_weight_sets = flattened_weights.shape[0]
+        n_hidden_weights = self.n_hidden * self.n_input
+        hidden_weights = flattened_weights[:, :n_hidden_weights].reshape(n_weight_sets, self.n_hidden, self.n_input)
+        output_weights = flattened_weights[:, n_hidden_weights:].reshape(n_weight_sets, self.n_output, self.n_hidden)
+
+        batch_size = len(y)
+        bytes_per_weight_set = self.n_hidden * batch_size * self.dtype.itemsize
+        chunk_size = max(1, max_chunk_bytes // bytes_per_weight_set)
+
+        scores = np.empty(n_weight_sets)
+        for start in range(0, n_weight_sets, chunk_size):
+            end = min(start + chunk_size, n_weight_sets)
+            hidden_activation = self._get_hidden_activations(hidden_weights[start:end], x)
+            output_activation = np.matmul(output_weights[start:end], hidden_activation)  # -> n_chunk x n_output x batch_size
+            output_labels = np.argmax(output_activation, axis=1)  # -> n_chunk x batch_size
+            scores[start:end] = np.count_nonzero(output_labels == y, axis=1) / batch_size
+        return scores
+
+    def _compute_hidden_activations(self, hidden_weights, x):
+        """
+        :param hidden_weights: n_weight_sets x n_hidden x n_input
+        :param x: batch_size x n_input size
+        :return: n_weight_sets x n_hidden x batch_size
+        """
+        x = np.asarray(x, dtype=self.dtype)
+        # (n_weight_sets * n_hidden) x n_input times n_input x batch_size
+        hidden_activation = sigmoid(np.dot(hidden_weights.reshape(-1, self.n_input), x.T))
+        return hidden_activation.reshape(len(hidden_weights), self.n_hidden, len(x))
+
+    def _get_hidden_activations(self, hidden_weights, x):
+        """
+        Like :meth:`._compute_hidden_activations`, but takes the activations of previously seen (or repeated) hidden
+        weights from the activation cache, and only computes the missing ones.
+        """
+        if self.activation_cache is None:
+            return self._compute_hidden_activations(hidden_weights, x)
+
+        self.activation_cache.set_inputs(x)
+        hidden_activation = np.empty((len(hidden_weights), self.n_hidden, len(x)), dtype=self.dtype)
+        missing_positions = OrderedDict()  # key -> positions of the weight sets with these hidden weights
+        for i, weights in enumerate(hidden_weights):
+            key = self.activation_cache.get_key(weights)
+            cached_activation = self.activation_cache.get(key)
+            if cached_activation is None:
+                missing_positions.setdefault(key, []).append(i)
+            else:
+                hidden_activation[i] = cached_activation
+
+        if missing_positions:
+            first_positions = [positions[0] for positions in missing_positions.values()]
+            computed_activations = self._compute_hidden_activations(hidden_weights[first_positions], x)
+            for (key, positions), activation in zip(missing_positions.items(), computed_activations):
+                hidden_activation[positions] = activation
+                self.activation_cache.put(key, activation.copy())
+        return hidden_activation
+
 
 def main():
     from sklearn.datasets import load_digits, fetch_mldata
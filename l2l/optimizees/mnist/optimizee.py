@@ -1,12 +1,37 @@
 from collections import namedtuple
 
 import numpy as np
-from sklearn.datasets import load_digits, fetch_openml
 
 from l2l.optimizees.optimizee import Optimizee
+from .dataset import load_dataset
 from .nn import NeuralNetworkClassifier
 
-MNISTOptimizeeParameters = namedtuple('MNISTOptimizeeParameters', ['n_hidden', 'seed', 'use_small_mnist'])
+MNISTOptimizeeParameters = namedtuple('MNISTOptimizeeParameters',
+                                      ['n_hidden', 'seed', 'use_small_mnist', 'data_path', 'dtype',
+                                       'minibatch_size', 'minibatch_policy', 'activation_cache_bytes'],
+                                      defaults=(None, 'float64', None, 'generation', None))
+MNISTOptimizeeParameters.__doc__ = """
+:param n_hidden: Number of hidden units of the network
+:param seed: Random seed used to initialize the individuals
+:param use_small_mnist: If True, the 8x8 digits dataset that ships with sklearn is used instead of the full MNIST
+    dataset
+:param data_path: (Optional) Directory in which the preprocessed dataset is cached as .npy files, e.g.
+    :attr:`~l2l.paths.Paths.data_path`. The cache is memory mapped, so that the data is not copied into the pickled
+    optimizee, and is shared by all the runs on a node. If None (default), the dataset is loaded into memory.
+:param dtype: (Optional) Floating point type in which the images are stored, and in which the weights and the
+    activations of the network are computed. Use 'float32' (together with the `dtype` parameter of the optimizer) to
+    halve memory and bandwidth and speed up the matrix products. Default is 'float64'
+:param minibatch_size: (Optional) If not None, the fitness is the accuracy on a random subset of this many images
+    instead of on the whole dataset. Default is None
+:param minibatch_policy: (Optional) How the minibatch is chosen. With 'generation' (default), a fresh minibatch is
+    drawn in every generation and shared by all the individuals of that generation. With 'fixed', the same subset is
+    used in all generations. The minibatch indices are derived from the `seed` and the generation, so that all the
+    runs of a generation use the same images without exchanging any data
+:param activation_cache_bytes: (Optional) If not None, the hidden layer activations are cached, keyed by the hidden
+    weights, using at most this many bytes (see :class:`~l2l.optimizees.mnist.nn.ActivationCache`). This pays off when
+    many evaluated individuals share their hidden weights, e.g. when only the output weights are mutated. Default is
+    None
+"""
 
 
 class MNISTOptimizee(Optimizee):
@@ -25,32 +50,34 @@ class MNISTOptimizee(Optimizee):
     def __init__(self, traj, parameters):
         super().__init__(traj)
 
-        if parameters.use_small_mnist:
-            # 8 x 8 images
-            mnist_digits = load_digits()
-            n_input = np.prod(mnist_digits.images.shape[1:])
-            n_images = len(mnist_digits.images)  # 1797
-            data_images = mnist_digits.images.reshape(n_images, -1) / 16.  # -> 1797 x 64
-            data_targets = mnist_digits.target
-        else:
-            # 28 x 28 images
-            mnist_digits = fetch_openml('MNIST original')
-            n_input = np.prod(mnist_digits.data.shape[1:])
-            data_images = mnist_digits.data / 255.  # -> 70000 x 284
-            n_images = len(data_images)
-            data_targets = mnist_digits.target
+        self.use_small_mnist = parameters.use_small_mnist
+        self.data_path = parameters.data_path
+        self.dtype = np.dtype(parameters.dtype)
+
+        self.data_images, self.data_targets = load_dataset(self.use_small_mnist, self.data_path, self.dtype)
+        self.n_images, n_input = self.data_images.shape
 
-        self.n_images = n_images
-        self.data_images, self.data_targets = data_images, data_targets
+        if parameters.minibatch_policy not in ('generation', 'fixed'):
+            raise ValueError("Unknown minibatch policy {}, must be one of 'generation' or 'fixed'".format(
+                parameters.minibatch_policy))
+        if parameters.minibatch_size is not None and not 0 < parameters.minibatch_size <= self.n_images:
+            raise ValueError("The minibatch size must be between 1 and the number of images ({}), but is {}".format(
+                self.n_images, parameters.minibatch_size))
+        self.minibatch_size = parameters.minibatch_size
+        self.minibatch_policy = parameters.minibatch_policy
+        self._minibatch_indices_cache = (None, None)
+        self._minibatch_data_cache = (None, None, None)
 
         seed = parameters.seed
         n_hidden = parameters.n_hidden
 
         seed = np.uint32(seed)
+        self.seed = seed
         self.random_state = np.random.RandomState(seed=seed)
 
         n_output = 10  # This is always true for mnist
-        self.nn = NeuralNetworkClassifier(n_input, n_hidden, n_output)
+        self.nn = NeuralNetworkClassifier(n_input, n_hidden, n_output, dtype=self.dtype,
+                                          activation_cache_bytes=parameters.activation_cache_bytes)
 
         self.random_state = np.random.RandomState(seed=seed)
 
@@ -60,6 +87,59 @@ class MNISTOptimizee(Optimizee):
             traj.individual.f_add_parameter(key, val)
         traj.individual.f_add_parameter('seed', seed)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_minibatch_data_cache'] = (None, None, None)
+        if self.data_path is not None:
+            # The dataset is reopened from the cache when unpickling instead of being copied into the pickle
+            del state['data_images']
+            del state['data_targets']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.data_path is not None:
+            self.data_images, self.data_targets = load_dataset(self.use_small_mnist, self.data_path, self.dtype)
+
+    def get_minibatch_indices(self, generation):
+        """
+        Returns the (sorted) indices of the images that make up the minibatch of the given generation. The indices
+        only depend on the seed of the optimizee, the minibatch parameters and, for the 'generation' policy, the
+        generation.
+
+        :param generation: The generation for which the minibatch is drawn
+        :return: Array of image indices, or None if the whole dataset is used
+        """
+        if self.minibatch_size is None:
+            return None
+        minibatch_key = generation if self.minibatch_policy == 'generation' else None
+        cached_key, cached_indices = self._minibatch_indices_cache
+        if cached_indices is not None and cached_key == minibatch_key:
+            return cached_indices
+
+        if self.minibatch_policy == 'generation':
+            random_state = np.random.RandomState([self.seed, generation])
+        else:
+            random_state = np.random.RandomState(self.seed)
+        # Sorted indices keep the reads from the (memory mapped) dataset sequential
+        indices = np.sort(random_state.choice(self.n_images, size=self.minibatch_size, replace=False))
+        self._minibatch_indices_cache = (minibatch_key, indices)
+        return indices
+
+    def _get_data(self, generation):
+        """
+        :return: Tuple of the images and targets the individuals of the given generation are scored on
+        """
+        indices = self.get_minibatch_indices(generation)
+        if indices is None:
+            return self.data_images, self.data_targets
+        # The minibatch is kept for the whole generation, which also keeps the activation cache of the network valid
+        cached_indices, data_images, data_targets = self._minibatch_data_cache
+        if cached_indices is not indices:
+            data_images, data_targets = self.data_images[indices], self.data_targets[indices]
+            self._minibatch_data_cache = (indices, data_images, data_targets)
+        return data_images, data_targets
+
     def create_individual(self):
         """
         Creates a random value of parameter within given bounds
@@ -68,7 +148,7 @@ class MNISTOptimizee(Optimizee):
         weight_shapes = self.nn.get_weights_shapes()
         cumulative_num_weights_per_layer = np.cumsum([np.prod(weight_shape) for weight_shape in weight_shapes])
 
-        flattened_weights = np.empty(cumulative_num_weights_per_layer[-1])
+        flattened_weights = np.empty(cumulative_num_weights_per_layer[-1], dtype=self.dtype)
         for i, weight_shape in enumerate(weight_shapes):
             if i == 0:
                 flattened_weights[:cumulative_num_weights_per_layer[i]] = \
@@ -86,6 +166,12 @@ class MNISTOptimizee(Optimizee):
         """
         return individual
 
+    def bounding_func_batch(self, population):
+        """
+        Bounds the whole population (one flattened individual per row). The weights are unbounded.
+        """
+        return population
+
     def simulate(self, traj):
         """
         Returns the value of the function chosen during initialization
@@ -111,4 +197,18 @@ class MNISTOptimizee(Optimizee):
             weights.append(w)
 
         self.nn.set_weights(*weights)
-        return self.nn.score(self.data_images, self.data_targets)
+        data_images, data_targets = self._get_data(traj.individual.generation)
+        return self.nn.score(data_images, data_targets)
+
+    def simulate_batch(self, traj, individuals):
+        """
+        Scores all the individuals of a generation at once using
+        :meth:`~l2l.optimizees.mnist.nn.NeuralNetworkClassifier.score_batch`
+
+        :param ~l2l.utils.trajectory.Trajectory traj: Trajectory
+        :param individuals: List of :class:`~l2l.utils.individual.Individual` to simulate
+        :return: a :obj:`list` containing the score of each individual
+        """
+        population = np.array([individual.weights for individual in individuals])
+        data_images, data_targets = self._get_data(individuals[0].generation)
+        return list(self.nn.score_batch(population, data_images, data_targets))
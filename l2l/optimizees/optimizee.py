@@ -29,6 +29,21 @@ class Optimizee:
         :return dict: A dictionary containing the names of the parameters and their values
         """
 
+    def bounding_func_batch(self, population):
+        """
+        Optional vectorised counterpart of the per-individual `bounding_func`. It receives the whole population as a
+        matrix with one individual per row, each row being the flattened individual as returned by
+        :func:`~l2l.dict_to_list`, and returns the bounded matrix of the same shape. Optimizers use this function
+        instead of calling `bounding_func` on every Individual-Dict whenever the optimizee implements it. A subclass
+        which overrides `bounding_func` has to override this function as well, otherwise the inherited batched version
+        is ignored (and `bounding_func` is called on every Individual-Dict).
+
+        :param ~numpy.ndarray population: Array of shape (n_individuals, n_parameters)
+
+        :return: the bounded population as an array of shape (n_individuals, n_parameters)
+        """
+        raise NotImplementedError()
+
     def simulate(self, traj):
         """
         This is the primary function that does the simulation for the given parameter given (within :obj:`traj`)
@@ -41,3 +56,17 @@ class Optimizee:
             multi-dimensional fitness function.
 
         """
+
+    def simulate_batch(self, traj, individuals):
+        """
+        Optional batched counterpart of :meth:`.simulate`, which evaluates a whole generation at once. It is used by
+        the serial (non multiprocessing) :class:`~l2l.utils.environment.Environment` whenever the optimizee implements
+        it, and allows optimizees to share work between the individuals of a generation.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory of the current run
+        :param individuals: List of :class:`~l2l.utils.individual.Individual` to simulate, with their parameters
+            accessible as attributes (e.g. `individual.param1`)
+
+        :return: a :class:`list` containing the fitness values of the individuals, in the same order as `individuals`
+        """
+        raise NotImplementedError()
@@ -0,0 +1,3 @@
+from .optimizer import CMAESOptimizer, CMAESParameters
+
+__all__ = ['CMAESOptimizer', 'CMAESParameters']
@@ -0,0 +1,362 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.optimizer import Optimizer
+
+logger = logging.getLogger("optimizers.cmaes")
+
+CMAESParameters = namedtuple('CMAESParameters', [
+    'sigma',
+    'pop_size',
+    'n_iteration',
+    'stop_criterion',
+    'seed',
+    'eigen_update_interval',
+    'diagonal_covariance_enabled',
+], defaults=(None, False))
+
+CMAESParameters.__doc__ = """
+:param sigma: Initial step size, i.e. the initial standard deviation of the search distribution in each coordinate
+:param pop_size: Number of individuals per generation (lambda). If None, the default `4 + floor(3 * log(n))` is used,
+    where n is the dimension of the individuals
+:param n_iteration: Number of iterations to perform
+:param stop_criterion: (Optional) Stop if this fitness is reached.
+:param seed: The random seed used for generating new individuals
+:param eigen_update_interval: (Optional) Number of generations between two eigendecompositions of the covariance
+    matrix. If None, the eigendecomposition is only repeated after O(n) generations (see Hansen, 2016), so that its cost
+    of O(n^3) is amortised to O(n^2) per generation. Not used if `diagonal_covariance_enabled` is True
+:param diagonal_covariance_enabled: (Optional) If True, only the diagonal of the covariance matrix is adapted
+    (separable CMA-ES, with the accordingly increased learning rates of Ros & Hansen, 2008). This needs O(n) memory and
+    time per individual instead of O(n^2), and is meant for high dimensional individuals (n >> 1000). Default is False
+"""
+
+
+class CMAESOptimizer(Optimizer):
+    """
+    Class implementing the covariance matrix adaptation evolution strategy (CMA-ES) as described in:
+
+    Hansen, N. (2016). The CMA evolution strategy: A tutorial. arXiv preprint arXiv:1604.00772.
+
+    Ros, R., & Hansen, N. (2008). A simple modification in CMA-ES achieving linear time and space complexity.
+    In International Conference on Parallel Problem Solving from Nature (pp. 296-305).
+
+    In the pseudo code the algorithm does:
+
+    For n iterations do:
+      - Sample individuals x from the multinormal search distribution N(m, sigma^2 * C)
+
+        z <- sample from N(0, I)
+        y <- B * D * z  (where C = B * D^2 * B^T)
+        x <- m + sigma * y
+
+      - evaluate individuals x and get fitnesses F_i(x)
+      - Update the mean with the weighted mean of the mu best steps y_{i:lambda}
+
+        m <- m + sigma * sum_{i=1}^{mu}(w_i * y_{i:lambda})
+
+      - Update the evolution paths p_sigma and p_c, the covariance matrix C with the rank-one update (from p_c) and the
+        rank-mu update (from the steps y_{i:lambda}), and the step size sigma from the length of p_sigma
+
+    All the individuals of a generation are sampled, and the rank-mu update is computed, as matrix products over the
+    whole population. The eigendecomposition of C is only recomputed every `eigen_update_interval` generations.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj:
+      Use this trajectory to store the parameters of the specific runs. The parameters should be
+      initialized based on the values in `parameters`
+
+    :param optimizee_create_individual:
+      Function that creates a new individual, which is used as the initial mean of the search distribution. All
+      parameters of the Individual-Dict returned should be of numpy.float64 type
+
+    :param optimizee_fitness_weights:
+      Fitness weights. The fitness returned by the Optimizee is multiplied by these values (one for each
+      element of the fitness vector)
+
+    :param parameters:
+      Instance of :func:`~collections.namedtuple` :class:`.CMAESParameters` containing the
+      parameters needed by the Optimizer
+
+    :param optimizee_bounding_func:
+      This is a function that takes an individual as argument and returns another individual that is
+      within bounds (The bounds are defined by the function itself). The steps of the bounded individuals are used
+      for the update of the search distribution
+    """
+
+    def __init__(self,
+                 traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        super().__init__(
+            traj,
+            optimizee_create_individual=optimizee_create_individual,
+            optimizee_fitness_weights=optimizee_fitness_weights,
+            parameters=parameters,
+            optimizee_bounding_func=optimizee_bounding_func)
+
+        self.mean, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(),
+                                                                      get_dict_spec=True)
+        self.mean = np.asarray(self.mean, dtype=float)
+        n = self.mean.size
+
+        if parameters.pop_size is None:
+            pop_size = 4 + int(np.floor(3 * np.log(n)))
+        else:
+            pop_size = parameters.pop_size
+        if pop_size < 2:
+            raise ValueError("pop_size needs to be greater than 1")
+        if parameters.sigma <= 0:
+            raise ValueError("sigma needs to be positive")
+
+        # The following parameters are recorded
+        traj.f_add_parameter('sigma', parameters.sigma, comment='Initial step size')
+        traj.f_add_parameter('pop_size', pop_size, comment='Number of individuals simulated in each run')
+        traj.f_add_parameter('n_iteration', parameters.n_iteration, comment='Number of iterations to run')
+        traj.f_add_parameter(
+            'stop_criterion', parameters.stop_criterion, comment='Stop if best individual reaches this fitness')
+        traj.f_add_parameter(
+            'seed', np.uint32(parameters.seed), comment='Seed used for random number generation in optimizer')
+        traj.f_add_parameter(
+            'diagonal_covariance_enabled',
+            parameters.diagonal_covariance_enabled,
+            comment='Flag to only adapt the diagonal of the covariance matrix')
+
+        traj.f_add_derived_parameter(
+            'dimension', n, comment='The dimension of the parameter space of the optimizee')
+
+        # Selection and recombination, see Hansen (2016), table 1
+        self.mu = pop_size // 2
+        weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / np.sum(weights)
+        self.mu_eff = 1. / np.sum(self.weights ** 2)
+
+        # Adaptation
+        self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        self.c_mu = min(1 - self.c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        if parameters.diagonal_covariance_enabled:
+            # The diagonal has n instead of n^2 / 2 degrees of freedom, so it can be learned faster
+            self.c_1 *= (n + 2) / 3
+            self.c_mu = min(1 - self.c_1, self.c_mu * (n + 2) / 3)
+        self.d_sigma = 1 + 2 * max(0., np.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        if parameters.eigen_update_interval is None:
+            eigen_update_interval = max(1, int(np.floor(1 / (10 * n * (self.c_1 + self.c_mu)))))
+        else:
+            eigen_update_interval = parameters.eigen_update_interval
+        if eigen_update_interval < 1:
+            raise ValueError("eigen_update_interval needs to be at least 1")
+        traj.f_add_parameter('eigen_update_interval', eigen_update_interval,
+                             comment='Number of generations between eigendecompositions of the covariance matrix')
+
+        self.random_state = np.random.RandomState(traj.parameters.seed)
+
+        # State of the search distribution
+        self.sigma = float(parameters.sigma)
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        if parameters.diagonal_covariance_enabled:
+            # The covariance matrix (and its square root D) are stored as vectors of their diagonal
+            self.C = np.ones(n)
+            self.B = None
+        else:
+            self.C = np.eye(n)
+            self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.eigen_generation = 0
+
+        # Added a generation-wise parameter logging
+        traj.results.f_add_result_group(
+            'generation_params',
+            comment='This contains the optimizer parameters that are'
+                    ' common across a generation')
+
+        # The following parameters are recorded as generation parameters i.e. once per generation
+        self.g = 0  # the current generation
+        self.pop_size = pop_size
+        self.best_fitness = -np.inf
+        self.best_individual = None
+
+        # Generate initial distribution
+        self._sample_eval_pop(traj)
+
+        self._expand_trajectory(traj)
+
+    def _sample_eval_pop(self, traj):
+        """
+        Samples the individuals of the next generation from N(m, sigma^2 * C), and fills `eval_pop` (and its array form
+        `eval_pop_arr`) with the bounded individuals. The steps y = (x - m) / sigma of the bounded individuals are
+        stored in `current_steps`
+        """
+        z = self.random_state.randn(traj.pop_size, self.mean.size)
+        if traj.diagonal_covariance_enabled:
+            steps = z * self.D
+        else:
+            steps = np.dot(z * self.D, self.B.T)
+        self.eval_pop_arr = self._bound_population(self.mean + self.sigma * steps)
+        self.current_steps = (self.eval_pop_arr - self.mean) / self.sigma
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in self.eval_pop_arr]
+
+    def _inverse_sqrt_covariance_dot(self, y):
+        """
+        :return: C^(-1/2) * y, computed with the (possibly outdated) eigendecomposition of C
+        """
+        if self.B is None:
+            return y / self.D
+        return np.dot(self.B, np.dot(self.B.T, y) / self.D)
+
+    def _update_eigendecomposition(self):
+        """
+        Recomputes the eigendecomposition C = B * D^2 * B^T
+        """
+        if self.B is None:
+            self.D = np.sqrt(self.C)
+            return
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T  # enforce symmetry
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        self.eigen_generation = self.g
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        n_iteration, stop_criterion = traj.n_iteration, traj.stop_criterion
+
+        weighted_fitness_list = []
+        # **************************************************************************************************************
+        # Storing run-information in the trajectory
+        # Reading fitnesses and performing distribution update
+        # **************************************************************************************************************
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            weighted_fitness_list.append(np.dot(fitness, self.optimizee_fitness_weights))
+        traj.v_idx = -1  # set trajectory back to default
+
+        weighted_fitness_list = np.array(weighted_fitness_list).ravel()
+        # NOTE: It is necessary to clear the finesses_results to clear the data in the reference, and del
+        # is used to make sure it's not used in the rest of this function
+        fitnesses_results.clear()
+        del fitnesses_results
+
+        # Performs descending arg-sort of weighted fitness
+        fitness_sorting_indices = np.argsort(weighted_fitness_list)[::-1]
+        best_index = fitness_sorting_indices[0]
+        best_fitness_in_run = weighted_fitness_list[best_index]
+        if best_fitness_in_run > self.best_fitness:
+            self.best_fitness = best_fitness_in_run
+            self.best_individual = list_to_dict(self.eval_pop_arr[best_index], self.optimizee_individual_dict_spec)
+
+        logger.info("-- End of generation %d --", self.g)
+        logger.info("  Evaluated %d individuals", len(weighted_fitness_list))
+        logger.info('  Best Fitness: %.4f', best_fitness_in_run)
+        logger.info('  Average Fitness: %.4f', np.mean(weighted_fitness_list))
+        logger.info('  Step size: %.4g', self.sigma)
+
+        # **************************************************************************************************************
+        # Storing Generation Parameters / Results in the trajectory
+        # **************************************************************************************************************
+        # These entries correspond to the generation that has been simulated prior to this post-processing run
+
+        # Documentation of algorithm parameters for the current generation
+        #
+        # generation             - The index of the evaluated generation
+        # best_fitness_in_run    - The highest fitness among the individuals in the
+        #                          evaluated generation
+        # average_fitness_in_run - The mean fitness of the evaluated generation
+        # pop_size               - Population size
+        generation_result_dict = {
+            'generation': self.g,
+            'best_fitness_in_run': best_fitness_in_run,
+            'average_fitness_in_run': np.mean(weighted_fitness_list),
+            'pop_size': self.pop_size
+        }
+
+        generation_name = 'generation_{}'.format(self.g)
+        traj.results.generation_params.f_add_result_group(generation_name)
+        traj.results.generation_params.f_add_result(
+            generation_name + '.algorithm_params',
+            generation_result_dict,
+            comment="These are the parameters that correspond to the algorithm. "
+                    "Look at the source code for `CMAESOptimizer::post_process()` "
+                    "for comments documenting these parameters"
+        )
+
+        # The covariance matrix itself is not stored, as it may be large. The axis ratio is its square root condition
+        traj.results.generation_params.f_add_result(
+            generation_name + '.distribution_params',
+            {'mean': self.mean.copy(), 'sigma': self.sigma, 'axis_ratio': np.max(self.D) / np.min(self.D)},
+            comment="These are the parameters of the distribution that underlies the"
+                    " currently evaluated generation")
+
+        # **************************************************************************************************************
+        # Update the parameters of the search distribution
+        # **************************************************************************************************************
+        n = self.mean.size
+        selected_steps = self.current_steps[fitness_sorting_indices[:self.mu]]
+        weighted_step = np.dot(self.weights, selected_steps)
+
+        self.mean = self.mean + self.sigma * weighted_step
+
+        # Evolution paths
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma + \
+            np.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * self._inverse_sqrt_covariance_dot(weighted_step)
+        p_sigma_norm = np.linalg.norm(self.p_sigma)
+        h_sigma = float(p_sigma_norm / np.sqrt(1 - (1 - self.c_sigma) ** (2 * (self.g + 1))) / self.chi_n <
+                        1.4 + 2 / (n + 1))
+        self.p_c = (1 - self.c_c) * self.p_c + \
+            h_sigma * np.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * weighted_step
+
+        # Rank-one and rank-mu update of the covariance matrix
+        c_1_correction = (1 - h_sigma) * self.c_c * (2 - self.c_c)
+        if traj.diagonal_covariance_enabled:
+            rank_one = self.p_c ** 2
+            rank_mu = np.dot(self.weights, selected_steps ** 2)
+        else:
+            rank_one = np.outer(self.p_c, self.p_c)
+            rank_mu = np.dot(selected_steps.T * self.weights, selected_steps)
+        self.C = (1 - self.c_1 - self.c_mu) * self.C + self.c_1 * (rank_one + c_1_correction * self.C) + \
+            self.c_mu * rank_mu
+
+        # Step size control
+        self.sigma *= np.exp((self.c_sigma / self.d_sigma) * (p_sigma_norm / self.chi_n - 1))
+
+        # **************************************************************************************************************
+        # Create the next generation by sampling the inferred distribution
+        # **************************************************************************************************************
+        # Note that this is only done in case the evaluated run is not the last run
+
+        self.eval_pop.clear()
+
+        # check if to stop
+        if self.g < n_iteration - 1 and self.best_fitness < stop_criterion:
+            self.g += 1  # Update generation counter
+            if traj.diagonal_covariance_enabled or self.g - self.eigen_generation >= traj.eigen_update_interval:
+                self._update_eigendecomposition()
+            self._sample_eval_pop(traj)
+            self._expand_trajectory(traj)
+
+    def end(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
+        """
+        traj.f_add_result('final_individual', self.best_individual)
+        traj.f_add_result('final_fitness', self.best_fitness)
+        traj.f_add_result('n_iteration', self.g + 1)
+
+        # ------------ Finished all runs and print result --------------- #
+        logger.info("-- End of (successful) CMA-ES optimization --")
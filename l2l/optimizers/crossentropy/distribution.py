@@ -1,18 +1,38 @@
 import abc
+import copy
 import logging
+import time
+import warnings
 from abc import ABCMeta
 
 import numpy as np
+import scipy.stats
 import sklearn.mixture
+from sklearn.exceptions import ConvergenceWarning
 
 logger = logging.getLogger('optimizers.crossentropy.distribution')
 
 
+def _get_bias_correction(weights):
+    """
+    :return: The factor that makes the weighted variance unbiased, as in `np.cov` with `aweights`
+    """
+    weights = np.asarray(weights, dtype=float)
+    return np.sum(weights) ** 2 / (np.sum(weights) ** 2 - np.sum(weights ** 2))
+
+
 class Distribution(metaclass=ABCMeta):
     """
     Generic base for a distribution. Needs to implement the functions fit and sample.
+
+    Distributions that set `supports_weights` to True also implement :meth:`.log_likelihood`, and
+    accept a `weights` argument in `fit` to fit weighted individuals (see the `archive_size` of
+    :class:`~l2l.optimizers.crossentropy.CrossEntropyParameters`).
     """
 
+    #: Whether the distribution implements :meth:`.log_likelihood` and weighted fits
+    supports_weights = False
+
     @abc.abstractmethod
     def init_random_state(self, random_state):
         """
@@ -53,12 +73,23 @@ class Distribution(metaclass=ABCMeta):
         """
         pass
 
+    def log_likelihood(self, data_list):
+        """
+        :param data_list: A list or array of individuals
+
+        :return: numpy array with the logarithm of the probability density of each individual under
+            the current parametrization (i.e. of the distribution the individuals are sampled from)
+        """
+        raise NotImplementedError()
+
 
 class Gaussian(Distribution):
     """
     Gaussian distribution.
     """
 
+    supports_weights = True
+
     def __init__(self):
         self.random_state = None
         self.mean = None
@@ -73,13 +104,14 @@ class Gaussian(Distribution):
         params_dict_items = [("distribution_name", self.__class__.__name__)]
         return dict(params_dict_items)
 
-    def fit(self, data_list, smooth_update=0):
+    def fit(self, data_list, smooth_update=0, weights=None):
         """
         Fit a gaussian distribution to the given data
 
         :param data_list: list or numpy array with individuals as rows
         :param smooth_update: determines to which extent the new samples account for the new distribution.
           default is 0 -> old parameters are fully discarded
+        :param weights: (Optional) non-negative weight of each individual
         
         :return dict: specifying current parametrization
         """
@@ -87,8 +119,8 @@ class Gaussian(Distribution):
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
-        mean = np.mean(data_list, axis=0)
-        cov_mat = np.cov(data_list, rowvar=False)
+        mean = np.average(data_list, axis=0, weights=weights)
+        cov_mat = np.cov(data_list, rowvar=False, aweights=weights)
 
         if self.mean is None:
             self.mean = mean
@@ -114,6 +146,208 @@ class Gaussian(Distribution):
             " 'init_random_state' member function to set it"
         return self.random_state.multivariate_normal(self.mean, self.cov, n_individuals)
 
+    def log_likelihood(self, data_list):
+        """
+        See :meth:`.Distribution.log_likelihood`
+        """
+        return np.atleast_1d(scipy.stats.multivariate_normal.logpdf(data_list, self.mean, self.cov,
+                                                                    allow_singular=True))
+
+
+class DiagonalGaussian(Distribution):
+    """
+    Gaussian distribution with a diagonal covariance matrix, i.e. with independent coordinates.
+    Fitting and sampling need O(d) memory and O(n * d) time for n individuals of dimension d,
+    instead of the O(d^2) memory and O(d^3) time of :class:`.Gaussian`.
+    """
+
+    supports_weights = True
+
+    def __init__(self):
+        self.random_state = None
+        self.mean = None
+        self.var = None
+
+    def init_random_state(self, random_state):
+        assert self.random_state is None, "The random_state has already been set for the distribution"
+        assert isinstance(random_state, np.random.RandomState)
+        self.random_state = random_state
+
+    def get_params(self):
+        params_dict_items = [("distribution_name", self.__class__.__name__)]
+        return dict(params_dict_items)
+
+    def fit(self, data_list, smooth_update=0, weights=None):
+        """
+        Fit a gaussian distribution with diagonal covariance to the given data
+
+        :param data_list: list or numpy array with individuals as rows
+        :param smooth_update: determines to which extent the new samples account for the new distribution.
+          default is 0 -> old parameters are fully discarded
+        :param weights: (Optional) non-negative weight of each individual
+
+        :return dict: specifying current parametrization
+        """
+        assert self.random_state is not None, \
+            "The random_state for the distribution has not been set, call the" \
+            " 'init_random_state' member function to set it"
+
+        if weights is None:
+            mean = np.mean(data_list, axis=0)
+            var = np.var(data_list, axis=0, ddof=1)
+        else:
+            # The same (unbiased) estimate as `np.cov` with `aweights`
+            mean = np.average(data_list, axis=0, weights=weights)
+            var = np.average((np.asarray(data_list) - mean) ** 2, axis=0, weights=weights) * \
+                _get_bias_correction(weights)
+
+        if self.mean is None:
+            self.mean = mean
+            self.var = var
+
+        self.mean = smooth_update * self.mean + (1 - smooth_update) * mean
+        self.var = smooth_update * self.var + (1 - smooth_update) * var
+
+        logger.debug('Diagonal Gaussian center\n%s', self.mean)
+        logger.debug('Diagonal Gaussian variance\n%s', self.var)
+
+        return {'mean': self.mean, 'variance': self.var}
+
+    def sample(self, n_individuals):
+        """Sample n_individuals individuals under the current parametrization
+
+        :param n_individuals: number of individuals to sample.
+
+        :return: numpy array with n_individual rows of individuals
+        """
+        assert self.random_state is not None, \
+            "The random_state for the distribution has not been set, call the" \
+            " 'init_random_state' member function to set it"
+        return self.mean + np.sqrt(self.var) * self.random_state.standard_normal((n_individuals, len(self.mean)))
+
+    def log_likelihood(self, data_list):
+        """
+        See :meth:`.Distribution.log_likelihood`
+        """
+        var = np.maximum(self.var, np.finfo(float).tiny)
+        return -0.5 * np.sum(np.log(2 * np.pi * var) + (np.asarray(data_list) - self.mean) ** 2 / var, axis=1)
+
+
+class LowRankGaussian(Distribution):
+    """
+    Gaussian distribution whose covariance matrix is the sum of a rank-`rank` matrix and of a diagonal
+    matrix, i.e. `factor @ factor.T + diag(diagonal_variance)` with a `factor` of shape (d, rank). The
+    factor captures the `rank` directions of largest variance of the fitted data, and the diagonal the
+    remaining variance of each coordinate, so that the variance of each coordinate is the one of the
+    data. Fitting needs O(n^2 * d) time for n individuals of dimension d, and sampling O(n * rank * d)
+    time, with O(rank * d) memory.
+
+    :param rank: The rank of the factor
+    """
+
+    supports_weights = True
+
+    def __init__(self, rank=1):
+        if rank < 1:
+            raise ValueError("rank needs to be at least 1")
+        self.random_state = None
+        self.rank = rank
+        self.mean = None
+        self.factor = None
+        self.diagonal_var = None
+
+    def init_random_state(self, random_state):
+        assert self.random_state is None, "The random_state has already been set for the distribution"
+        assert isinstance(random_state, np.random.RandomState)
+        self.random_state = random_state
+
+    def get_params(self):
+        params_dict_items = [("distribution_name", self.__class__.__name__),
+                             ("rank", self.rank)]
+        return dict(params_dict_items)
+
+    def _truncate(self, factor):
+        """
+        :return: The factor of rank (at most) `rank` that best approximates `factor @ factor.T`, and the
+            variance of each coordinate that it does not capture
+        """
+        u, singular_values, _ = np.linalg.svd(factor, full_matrices=False)
+        truncated_factor = u[:, :self.rank] * singular_values[:self.rank]
+        residual_var = np.sum((u[:, self.rank:] * singular_values[self.rank:]) ** 2, axis=1)
+        return truncated_factor, residual_var
+
+    def fit(self, data_list, smooth_update=0, weights=None):
+        """
+        Fit a gaussian distribution with low rank plus diagonal covariance to the given data. The
+        smoothing is applied to the mean and to the covariance matrix, which is truncated to the rank
+        again afterwards
+
+        :param data_list: list or numpy array with individuals as rows
+        :param smooth_update: determines to which extent the new samples account for the new distribution.
+          default is 0 -> old parameters are fully discarded
+        :param weights: (Optional) non-negative weight of each individual
+
+        :return dict: specifying current parametrization
+        """
+        assert self.random_state is not None, \
+            "The random_state for the distribution has not been set, call the" \
+            " 'init_random_state' member function to set it"
+
+        data = np.asarray(data_list)
+        # The sample covariance matrix (as estimated by `np.cov`) is factor @ factor.T
+        if weights is None:
+            mean = np.mean(data, axis=0)
+            factor = (data - mean).T / np.sqrt(len(data) - 1)
+        else:
+            mean = np.average(data, axis=0, weights=weights)
+            factor = (data - mean).T * np.sqrt(weights / np.sum(weights) * _get_bias_correction(weights))
+        diagonal_var = np.zeros(len(mean))
+
+        if self.mean is not None and smooth_update > 0:
+            mean = smooth_update * self.mean + (1 - smooth_update) * mean
+            factor = np.concatenate((np.sqrt(smooth_update) * self.factor, np.sqrt(1 - smooth_update) * factor),
+                                    axis=1)
+            diagonal_var = smooth_update * self.diagonal_var
+
+        self.mean = mean
+        self.factor, residual_var = self._truncate(factor)
+        self.diagonal_var = diagonal_var + residual_var
+
+        logger.debug('Low rank Gaussian center\n%s', self.mean)
+        logger.debug('Low rank Gaussian factor\n%s', self.factor)
+        logger.debug('Low rank Gaussian diagonal variance\n%s', self.diagonal_var)
+
+        return {'mean': self.mean, 'factor': self.factor, 'diagonal_variance': self.diagonal_var}
+
+    def sample(self, n_individuals):
+        """Sample n_individuals individuals under the current parametrization
+
+        :param n_individuals: number of individuals to sample.
+
+        :return: numpy array with n_individual rows of individuals
+        """
+        assert self.random_state is not None, \
+            "The random_state for the distribution has not been set, call the" \
+            " 'init_random_state' member function to set it"
+        n_dims, rank = self.factor.shape
+        return self.mean + self.random_state.standard_normal((n_individuals, rank)) @ self.factor.T + \
+            np.sqrt(self.diagonal_var) * self.random_state.standard_normal((n_individuals, n_dims))
+
+    def log_likelihood(self, data_list):
+        """
+        See :meth:`.Distribution.log_likelihood`. Uses the Woodbury identity and the matrix determinant
+        lemma, in O(n * rank * d) time
+        """
+        deviations = np.asarray(data_list) - self.mean
+        diagonal_var = np.maximum(self.diagonal_var, np.finfo(float).tiny)
+        scaled_factor = self.factor / diagonal_var[:, np.newaxis]
+        capacitance = np.eye(self.factor.shape[1]) + self.factor.T @ scaled_factor
+        projections = deviations @ scaled_factor
+        mahalanobis = np.sum(deviations ** 2 / diagonal_var, axis=1) - \
+            np.sum(projections * np.linalg.solve(capacitance, projections.T).T, axis=1)
+        log_determinant = np.sum(np.log(diagonal_var)) + np.linalg.slogdet(capacitance)[1]
+        return -0.5 * (mahalanobis + log_determinant + len(self.mean) * np.log(2 * np.pi))
+
 
 class BayesianGaussianMixture(Distribution):
     """
@@ -124,19 +358,38 @@ class BayesianGaussianMixture(Distribution):
     number of active modes present in the given data.
 
     :param n_components: components of the mixture model
+    :param warm_start: If True, every fit after the first one starts the EM algorithm from the
+        components of the previous fit (i.e. of the previous generation) instead of a new
+        initialization. This also keeps the components aligned between generations, so that
+        they are smoothed with the matching previous component
+    :param warm_start_max_iter: Maximum number of EM iterations of the warm-started fits. As
+        the previous components are usually close to the new optimum, a few iterations suffice
+    :param covariance_type: The covariance matrix of each component, either 'full', 'tied' (one
+        full matrix shared by all components) or 'diag' (diagonal matrices). 'tied' and 'diag'
+        are much cheaper to fit for many components in high dimensions
     :param kwargs: Additional arguments that get passed on to :class:`sklearn.mixture.BayesianGaussianMixture`
     """
 
-    def __init__(self, n_components=2, **kwargs):
+    covariance_types = ('full', 'tied', 'diag')
+
+    def __init__(self, n_components=2, warm_start=False, warm_start_max_iter=10, covariance_type='full', **kwargs):
+        if covariance_type not in self.covariance_types:
+            raise ValueError("Unknown covariance type '{}', expected one of {}".format(
+                covariance_type, self.covariance_types))
         self.random_state = None
         self.bayesian_mixture = sklearn.mixture.BayesianGaussianMixture(
-            n_components,
+            n_components=n_components,
             weight_concentration_prior_type='dirichlet_distribution',
+            covariance_type=covariance_type,
             random_state=self.random_state, **kwargs)
         # taken from check_fitted function of BaysianGaussianMixture in the sklearn repository
         self.parametrization = ('covariances_', 'means_', 'weight_concentration_', 'weights_',
                                 'mean_precision_', 'degrees_of_freedom_', 'precisions_', 'precisions_cholesky_')
         self.n_components = n_components
+        self.warm_start = warm_start
+        self.warm_start_max_iter = warm_start_max_iter
+        self.covariance_type = covariance_type
+        self.fitted = False
 
     def init_random_state(self, random_state):
         assert self.random_state is None, "The random_state has already been set for the distribution"
@@ -161,7 +414,10 @@ class BayesianGaussianMixture(Distribution):
 
     def get_params(self):
         params_dict_items = [("distribution_name", self.__class__.__name__),
-                             ("n_components", self.n_components)]
+                             ("n_components", self.n_components),
+                             ("warm_start", self.warm_start),
+                             ("warm_start_max_iter", self.warm_start_max_iter),
+                             ("covariance_type", self.covariance_type)]
         return dict(params_dict_items)
 
     def fit(self, data_list, smooth_update=0):
@@ -171,14 +427,32 @@ class BayesianGaussianMixture(Distribution):
         :param data_list: list or numpy array with individuals as rows
         :param smooth_update: determines to which extent the new samples account for the
             new distribution.
-        :return: dict specifiying current parametrization
+        :return: dict specifiying current parametrization, and the time the fit took in seconds
+            as `fit_time`
         """
         assert self.random_state is not None, \
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
-        old = self.bayesian_mixture
-        self.bayesian_mixture.fit(data_list)
+        # The previous parametrization is copied, as the model is fitted in-place
+        old = None
+        if self.fitted and smooth_update > 0:
+            old = {p: copy.deepcopy(getattr(self.bayesian_mixture, p)) for p in self.parametrization}
+
+        start_time = time.perf_counter()
+        if self.fitted and self.warm_start:
+            self.bayesian_mixture.warm_start = True
+            self.bayesian_mixture.max_iter = self.warm_start_max_iter
+            with warnings.catch_warnings():
+                # The capped warm-started fits are not expected to converge
+                warnings.simplefilter('ignore', ConvergenceWarning)
+                self.bayesian_mixture.fit(data_list)
+        else:
+            self.bayesian_mixture.fit(data_list)
+        fit_time = time.perf_counter() - start_time
+        self.fitted = True
+        logger.debug('Fitted the mixture in %d EM iterations (%.3f s)', self.bayesian_mixture.n_iter_, fit_time)
+
         self._postprocess_fitted(self.bayesian_mixture)
         distribution_parameters = dict()
 
@@ -186,14 +460,17 @@ class BayesianGaussianMixture(Distribution):
         # distribution parameters can also be tuples of ndarray
         for p in self.parametrization:
             hdf_name = p.rstrip('_')  # remove sklearn trailing underscore
-            orig = getattr(old, p)
             new = getattr(self.bayesian_mixture, p)
-            if isinstance(orig, tuple):
-                mix = tuple(smooth_update * a + (1 - smooth_update) * b for a, b in zip(orig, new))
+            if old is None:
+                mix = new
+            elif isinstance(new, tuple):
+                mix = tuple(smooth_update * a + (1 - smooth_update) * b for a, b in zip(old[p], new))
+            else:
+                mix = smooth_update * old[p] + (1 - smooth_update) * new
+            if isinstance(mix, tuple):
                 for index in range(len(mix)):
                     distribution_parameters[hdf_name + '_' + str(index)] = mix[index]
             else:
-                mix = smooth_update * orig + (1 - smooth_update) * new
                 distribution_parameters[hdf_name] = mix
             setattr(self.bayesian_mixture, p, mix)
             if p == 'covariances_':
@@ -201,6 +478,7 @@ class BayesianGaussianMixture(Distribution):
             elif p == 'means_':
                 logger.debug('New means:\n%s', str(mix))
         self._append_additional_parameters(distribution_parameters)
+        distribution_parameters['fit_time'] = fit_time
         return distribution_parameters
 
     def sample(self, n_individuals):
@@ -247,7 +525,7 @@ class NoisyBayesianGaussianMixture(BayesianGaussianMixture):
         else:
             self.coordinate_scale = np.array(coordinate_scale).astype(np.float64)
         self.current_noise_magnitude = self.noise_magnitude
-        self.noise_value = None  # list containing the additive noise values for each component
+        self.noise_value = None  # array containing the additive noise values for each (tied) covariance matrix
 
     def _postprocess_fitted(self, model):
         """
@@ -256,15 +534,18 @@ class NoisyBayesianGaussianMixture(BayesianGaussianMixture):
         :param model: the considered model
         """
         if hasattr(model, 'covariances_'):
-            self.noise_value = []
-            n_dims = model.covariances_[0].shape[0]
-            for i, cov in enumerate(model.covariances_):
-                current_noise_value = \
-                    np.abs(self.random_state.normal(loc=0.0,
-                                                    scale=self.current_noise_magnitude * self.coordinate_scale,
-                                                    size=n_dims))
-                self.noise_value.append(current_noise_value)
-                model.covariances_[i] += np.diag(current_noise_value)
+            n_dims = model.means_.shape[1]
+            # A tied model has a single covariance matrix for all components
+            n_covariances = 1 if self.covariance_type == 'tied' else len(model.covariances_)
+            self.noise_value = np.abs(self.random_state.normal(
+                loc=0.0, scale=self.current_noise_magnitude * self.coordinate_scale, size=(n_covariances, n_dims)))
+            diagonal = np.arange(n_dims)
+            if self.covariance_type == 'full':
+                model.covariances_[:, diagonal, diagonal] += self.noise_value
+            elif self.covariance_type == 'tied':
+                model.covariances_[diagonal, diagonal] += self.noise_value[0]
+            else:
+                model.covariances_ += self.noise_value
             self.current_noise_magnitude *= self.noise_decay
 
     def _append_additional_parameters(self, distribution_parameters):
@@ -318,7 +599,7 @@ class NoisyGaussian(Gaussian):
                                 noise_decay=self.noise_decay))
         return params_dict
 
-    def fit(self, data_list, smooth_update=0):
+    def fit(self, data_list, smooth_update=0, weights=None):
         """
         Fits the parameters to the given data (see :class:`.Gaussian`) and additionally
         adds noise in form of variance to the covariance matrix. Also, the noise
@@ -327,6 +608,7 @@ class NoisyGaussian(Gaussian):
         :param data_list: Data to be fitted to
         :param smooth_update: Smooth the parameter update with regard to the
             previous configuration
+        :param weights: (Optional) non-negative weight of each individual
 
         :return dict: describing parameter configuration
         """
@@ -334,7 +616,7 @@ class NoisyGaussian(Gaussian):
             "The random_state for the distribution has not been set, call the" \
             " 'init_random_state' member function to set it"
 
-        Gaussian.fit(self, data_list, smooth_update)
+        Gaussian.fit(self, data_list, smooth_update, weights)
         n_dims = self.cov.shape[0]
         self.noise_value = np.abs(
             self.random_state.normal(loc=0.0, scale=self.current_noise_magnitude * self.coordinate_scale,
@@ -356,3 +638,10 @@ class NoisyGaussian(Gaussian):
             " 'init_random_state' member function to set it"
 
         return self.random_state.multivariate_normal(self.mean, self.noisy_cov, n_individuals)
+
+    def log_likelihood(self, data_list):
+        """
+        See :meth:`.Distribution.log_likelihood`
+        """
+        return np.atleast_1d(scipy.stats.multivariate_normal.logpdf(data_list, self.mean, self.noisy_cov,
+                                                                    allow_singular=True))
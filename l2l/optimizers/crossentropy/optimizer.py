@@ -10,7 +10,8 @@ logger = logging.getLogger("optimizers.crossentropy")
 
 CrossEntropyParameters = namedtuple('CrossEntropyParameters',
                                     ['pop_size', 'rho', 'smoothing', 'temp_decay', 'n_iteration', 'distribution',
-                                     'stop_criterion', 'seed'])
+                                     'stop_criterion', 'seed', 'archive_size'],
+                                    defaults=(0,))
 
 CrossEntropyParameters.__doc__ = """
 :param pop_size: Minimal number of individuals per simulation.
@@ -27,10 +28,17 @@ CrossEntropyParameters.__doc__ = """
 
 :param n_iteration: Number of iterations to perform
 :param distribution: Distribution object to use. Has to implement a fit and sample function. Should be one of 
-  :class:`~.Gaussian`, :class:`~.NoisyGaussian`, :class:`~.BayesianGaussianMixture`, :class:`~.NoisyBayesianGaussianMixture`
+  :class:`~.Gaussian`, :class:`~.NoisyGaussian`, :class:`~.DiagonalGaussian`, :class:`~.LowRankGaussian`,
+  :class:`~.BayesianGaussianMixture`, :class:`~.NoisyBayesianGaussianMixture`. For high dimensional individuals, use
+  :class:`~.DiagonalGaussian` or :class:`~.LowRankGaussian`, which need memory linear in the dimension
 :param stop_criterion: (Optional) Stop if this fitness is reached.
 :param seed: The random seed used to sample and fit the distribution. :class:`.CrossEntropyOptimizer`
     uses a random generator seeded with this seed.
+:param archive_size: (Optional) Maximum number of samples of previous generations that are reused, together with the
+  samples of the current generation, to select the elite and fit the distribution (0 by default, i.e. no samples are
+  reused). The reused samples are weighted by the likelihood ratio between the current distribution and the
+  distribution they were sampled from (capped at 1), so that fewer new samples (i.e. a smaller `pop_size`) are needed
+  per generation. Requires a distribution that supports weights, e.g. :class:`~.Gaussian`
 """
 
 
@@ -42,7 +50,8 @@ class CrossEntropyOptimizer(Optimizer):
     For n iterations do:
       - Sample individuals from distribution
       - evaluate individuals and get fitness
-      - pick rho * pop_size number of elite individuals
+      - pick rho * pop_size number of elite individuals (if samples of previous generations are reused, the
+        best individuals whose total importance weight corresponds to rho * pop_size individuals)
       - Out of the remaining non-elite individuals, select them using a simulated-annealing style
         selection based on the difference between their fitness and the `1-rho` quantile (*gamma*)
         fitness, and the current temperature
@@ -85,6 +94,11 @@ class CrossEntropyOptimizer(Optimizer):
             raise Exception("pop_size needs to be greater than 0")
         if parameters.smoothing >= 1 or parameters.smoothing < 0:
             raise Exception("smoothing has to be in interval [0, 1)")
+        if parameters.archive_size < 0:
+            raise ValueError("archive_size needs to be non-negative")
+        if parameters.archive_size > 0 and not parameters.distribution.supports_weights:
+            raise ValueError("The distribution {} does not support the weights needed to reuse samples".format(
+                parameters.distribution.__class__.__name__))
 
         # The following parameters are recorded
         traj.f_add_parameter('pop_size', parameters.pop_size,
@@ -101,6 +115,8 @@ class CrossEntropyOptimizer(Optimizer):
                              comment='Decay factor for temperature')
         traj.f_add_parameter('seed', np.uint32(parameters.seed),
                              comment='Seed used for random number generation in optimizer')
+        traj.f_add_parameter('archive_size', parameters.archive_size,
+                             comment='Maximum number of reused samples of previous generations')
 
         self.random_state = np.random.RandomState(traj.parameters.seed)
 
@@ -134,11 +150,9 @@ class CrossEntropyOptimizer(Optimizer):
         # Thus needs to handle the optimizee individuals as vectors
         current_eval_pop = [self.optimizee_create_individual() for _ in range(parameters.pop_size)]
 
-        if optimizee_bounding_func is not None:
-            current_eval_pop = [self.optimizee_bounding_func(ind) for ind in current_eval_pop]
-
-        self.eval_pop = current_eval_pop
-        self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+        self.eval_pop_asarray = self._bound_population([dict_to_list(x) for x in current_eval_pop])
+        self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
+                         for ind_asarray in self.eval_pop_asarray]
 
         # Max Likelihood
         self.current_distribution = parameters.distribution
@@ -151,8 +165,42 @@ class CrossEntropyOptimizer(Optimizer):
         self.current_distribution.init_random_state(self.random_state)
         self.current_distribution.fit(self.eval_pop_asarray)
 
+        # The archive of reused samples of previous generations, with their fitness and the log-density of the
+        # distribution they were sampled from
+        self.archive_individuals = np.empty((0, len(temp_indiv)))
+        self.archive_fitness = np.empty(0)
+        self.archive_log_density = np.empty(0)
+        # The log-density of the distribution the current generation was sampled from, None for the initial population
+        self.eval_pop_log_density = None
+
         self._expand_trajectory(traj)
 
+    def _get_weighted_samples(self, fitness):
+        """
+        :return: The samples of the current generation followed by the archived samples, their fitness and their
+            importance weights (None if no samples are reused)
+        """
+        if len(self.archive_fitness) == 0:
+            return self.eval_pop_asarray, fitness, None
+        with np.errstate(invalid='ignore'):
+            log_ratios = self.current_distribution.log_likelihood(self.archive_individuals) - self.archive_log_density
+        # Samples outside the support of both (singular) distributions are not reused
+        log_ratios[np.isnan(log_ratios)] = -np.inf
+        weights = np.concatenate((np.ones(len(fitness)), np.exp(np.minimum(log_ratios, 0.))))
+        return (np.concatenate((self.eval_pop_asarray, self.archive_individuals)),
+                np.concatenate((fitness, self.archive_fitness)), weights)
+
+    def _update_archive(self, traj, fitness):
+        """
+        Adds the samples of the current generation to the archive, which keeps the `archive_size` most recent samples
+        """
+        if traj.archive_size == 0 or self.eval_pop_log_density is None:
+            return
+        self.archive_individuals = np.concatenate((self.eval_pop_asarray, self.archive_individuals))[:traj.archive_size]
+        self.archive_fitness = np.concatenate((fitness, self.archive_fitness))[:traj.archive_size]
+        self.archive_log_density = np.concatenate((self.eval_pop_log_density,
+                                                   self.archive_log_density))[:traj.archive_size]
+
     def post_process(self, traj, fitnesses_results):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
@@ -180,13 +228,21 @@ class CrossEntropyOptimizer(Optimizer):
         traj.v_idx = -1  # set trajectory back to default
 
         weighted_fitness_list = np.array(weighted_fitness_list).ravel()
+        # The samples of the current generation, and the reused samples of previous generations
+        population, population_fitness, weights = self._get_weighted_samples(weighted_fitness_list)
 
         # Performs descending arg-sort of weighted fitness
-        fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
+        fitness_sorting_indices = list(reversed(np.argsort(population_fitness)))
 
         # Sorting the data according to fitness
-        sorted_population = self.eval_pop_asarray[fitness_sorting_indices]
-        sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
+        sorted_population = population[fitness_sorting_indices]
+        sorted_fitness = population_fitness[fitness_sorting_indices]
+
+        if weights is not None:
+            # The elite is made of the best individuals whose total weight is the one of n_elite (new) individuals
+            sorted_weights = weights[fitness_sorting_indices]
+            elite_weight = n_elite * np.sum(weights) / self.pop_size
+            n_elite = min(int(np.searchsorted(np.cumsum(sorted_weights), elite_weight)) + 1, len(sorted_weights))
 
         # Elite individuals are with performance better than or equal to the (1-rho) quantile.
         # See original describtion of cross entropy for optimization
@@ -200,7 +256,7 @@ class CrossEntropyOptimizer(Optimizer):
         logger.info("-- End of generation %d --", self.g)
         logger.info("  Evaluated %d individuals", len(fitnesses_results))
         logger.info('  Best Fitness: %.4f', self.best_fitness_in_run)
-        logger.info('  Average Fitness: %.4f', np.mean(sorted_fitness))
+        logger.info('  Average Fitness: %.4f', np.mean(weighted_fitness_list))
         logger.debug('  Calculated gamma: %.4f', self.gamma)
 
         #**************************************************************************************************************
@@ -216,15 +272,18 @@ class CrossEntropyOptimizer(Optimizer):
         # T                   - Temperature used to select non-elite elements among the individuals
         #                       of the evaluated generation
         # best_fitness_in_run - The highest fitness among the individuals in the
-        #                       evaluated generation
+        #                       evaluated generation (and the reused individuals)
         # pop_size            - Population size
+        # effective_pop_size  - The effective sample size of the evaluated generation and of the reused
+        #                       individuals, given their importance weights
         generation_result_dict = {
             'generation': self.g,
             'gamma': self.gamma,
             'T': self.T,
             'best_fitness_in_run': self.best_fitness_in_run,
-            'average_fitness_in_run': np.mean(sorted_fitness),
-            'pop_size': self.pop_size
+            'average_fitness_in_run': np.mean(weighted_fitness_list),
+            'pop_size': self.pop_size,
+            'effective_pop_size': len(population) if weights is None else np.sum(weights) ** 2 / np.sum(weights ** 2)
         }
 
         generation_name = 'generation_{}'.format(self.g)
@@ -237,18 +296,24 @@ class CrossEntropyOptimizer(Optimizer):
 
         # new distribution fit
         individuals_to_be_fitted = elite_individuals
+        fitted_indices = np.arange(n_elite)
 
         # Temperature dependent sampling of non elite individuals
         if temp_decay > 0:
             # Keeping non-elite samples with certain probability dependent on temperature (like Simulated Annealing)
-            non_elite_selection_probs = np.clip(np.exp((weighted_fitness_list[n_elite:] - self.gamma) / self.T),
+            non_elite_selection_probs = np.clip(np.exp((sorted_fitness[n_elite:] - self.gamma) / self.T),
                                                 a_min=0.0, a_max=1.0)
             non_elite_selected_indices = self.random_state.binomial(1, non_elite_selection_probs).astype(bool)
             non_elite_eval_pop_asarray = sorted_population[n_elite:][non_elite_selected_indices]
             individuals_to_be_fitted = np.concatenate((elite_individuals, non_elite_eval_pop_asarray))
+            fitted_indices = np.concatenate((fitted_indices, n_elite + np.flatnonzero(non_elite_selected_indices)))
 
         # Fitting New distribution parameters.
-        self.distribution_results = self.current_distribution.fit(individuals_to_be_fitted, smoothing)
+        if weights is None:
+            self.distribution_results = self.current_distribution.fit(individuals_to_be_fitted, smoothing)
+        else:
+            self.distribution_results = self.current_distribution.fit(individuals_to_be_fitted, smoothing,
+                                                                      weights=sorted_weights[fitted_indices])
 
         #Add the results of the distribution fitting to the trajectory
         traj.results.generation_params.f_add_result(
@@ -260,19 +325,19 @@ class CrossEntropyOptimizer(Optimizer):
         # Create the next generation by sampling the inferred distribution
         #**************************************************************************************************************
         # Note that this is only done in case the evaluated run is not the last run
+        self._update_archive(traj, weighted_fitness_list)
         fitnesses_results.clear()
         self.eval_pop.clear()
 
         # check if to stop
         if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
             #Sample from the constructed distribution
-            self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
+            # Clip to boundaries
+            self.eval_pop_asarray = self._bound_population(self.current_distribution.sample(self.pop_size))
             self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
                              for ind_asarray in self.eval_pop_asarray]
-            # Clip to boundaries
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
-                self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+            if traj.archive_size > 0:
+                self.eval_pop_log_density = self.current_distribution.log_likelihood(self.eval_pop_asarray)
             self.g += 1  # Update generation counter
             self.T *= temp_decay
             self._expand_trajectory(traj)
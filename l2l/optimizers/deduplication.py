@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def get_individual_keys(population, tolerance=None):
+    """
+    Computes a hashable key for every individual of a population, such that two individuals have the same key if and
+    only if they are duplicates.
+
+    :param population: Array (or list of lists) of shape (n_individuals, n_parameters), with one flattened individual
+        per row
+    :param tolerance: (Optional) If given, the parameters are quantised to multiples of `tolerance` first, so that
+        individuals whose parameters are (roughly) within `tolerance` of each other are considered duplicates.
+        Otherwise only exactly equal individuals are duplicates
+
+    :return: List of `bytes` keys, one per individual
+    """
+    population = np.asarray(population, dtype=float)
+    if tolerance is not None:
+        population = np.round(population / tolerance).astype(np.int64)
+    else:
+        # Adding 0. turns -0. into 0., so that equal individuals have equal bytes
+        population = population + 0.
+    population = np.ascontiguousarray(population.reshape(len(population), -1))
+    return [row.tobytes() for row in population]
+
+
+def get_duplicate_mask(population, tolerance=None, known_keys=None):
+    """
+    Finds the duplicates in a population by hashing the individuals, in O(n_individuals * n_parameters) time (instead of
+    comparing all pairs of individuals).
+
+    :param population: Array (or list of lists) of shape (n_individuals, n_parameters), with one flattened individual
+        per row
+    :param tolerance: (Optional) Quantisation of the parameters before the comparison, see :func:`.get_individual_keys`
+    :param known_keys: (Optional) Set of keys of individuals seen before (e.g. evaluated in previous generations).
+        Individuals with one of these keys are duplicates as well. The keys of the population are added to the set, so
+        that the same set can be passed in every generation
+
+    :return: Boolean array which is True for each individual that duplicates an individual earlier in the population
+        (or one of `known_keys`), i.e. the first occurrence of each individual is not marked
+    """
+    keys = get_individual_keys(population, tolerance)
+    seen_keys = known_keys if known_keys is not None else set()
+    duplicate_mask = np.zeros(len(keys), dtype=bool)
+    for i, key in enumerate(keys):
+        if key in seen_keys:
+            duplicate_mask[i] = True
+        else:
+            seen_keys.add(key)
+    return duplicate_mask
@@ -0,0 +1,3 @@
+from .optimizer import DifferentialEvolutionOptimizer, DifferentialEvolutionParameters
+
+__all__ = ['DifferentialEvolutionOptimizer', 'DifferentialEvolutionParameters']
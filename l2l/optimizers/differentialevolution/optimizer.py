@@ -0,0 +1,289 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.optimizer import Optimizer
+
+logger = logging.getLogger("optimizers.differentialevolution")
+
+DifferentialEvolutionParameters = namedtuple('DifferentialEvolutionParameters', [
+    'pop_size',
+    'mutation_factor',
+    'crossover_rate',
+    'n_iteration',
+    'stop_criterion',
+    'seed',
+    'strategy',
+], defaults=('rand/1/bin',))
+
+DifferentialEvolutionParameters.__doc__ = """
+:param pop_size: Number of individuals in the population, at least 4
+:param mutation_factor: Scale factor F of the difference vectors, typically in [0.4, 1]
+:param crossover_rate: Probability CR that a parameter of the trial individual is taken from the mutant
+:param n_iteration: Number of iterations to perform
+:param stop_criterion: (Optional) Stop if this fitness is reached.
+:param seed: The random seed used for generating new individuals
+:param strategy: (Optional) The mutation strategy, either 'rand/1/bin' (robust, the default) or
+    'current-to-best/1/bin' (faster convergence on unimodal problems). Both use binomial crossover
+"""
+
+STRATEGIES = ('rand/1/bin', 'current-to-best/1/bin')
+
+
+class DifferentialEvolutionOptimizer(Optimizer):
+    """
+    Class implementing differential evolution as described in:
+
+    Storn, R., & Price, K. (1997). Differential evolution - a simple and efficient heuristic for global optimization
+    over continuous spaces. Journal of global optimization, 11(4), 341-359.
+
+    In the pseudo code the algorithm does:
+
+    For n iterations do:
+      - For every individual x_i of the population, create a mutant v_i from the randomly chosen, mutually
+        different individuals x_r1, x_r2, x_r3 (all different from x_i) as
+
+            v_i <- x_r1 + F * (x_r2 - x_r3)                          (rand/1/bin)
+            v_i <- x_i + F * (x_best - x_i) + F * (x_r1 - x_r2)      (current-to-best/1/bin)
+
+      - Create the trial individual u_i by taking each parameter from v_i with probability CR (and at least one
+        parameter at a random position), and from x_i otherwise
+      - Evaluate the trial individuals, and replace x_i by u_i if its fitness is at least as high as the fitness of x_i
+
+    The population is stored as an N x d matrix, and the mutation indices, the crossover masks and the bounding are
+    computed for the whole population at once in every generation. In the first generation, the initial population
+    (created with `optimizee_create_individual`) is evaluated.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj:
+      Use this trajectory to store the parameters of the specific runs. The parameters should be
+      initialized based on the values in `parameters`
+
+    :param optimizee_create_individual:
+      Function that creates a new individual. All parameters of the Individual-Dict returned should be
+      of numpy.float64 type
+
+    :param optimizee_fitness_weights:
+      Fitness weights. The fitness returned by the Optimizee is multiplied by these values (one for each
+      element of the fitness vector)
+
+    :param parameters:
+      Instance of :func:`~collections.namedtuple` :class:`.DifferentialEvolutionParameters` containing the
+      parameters needed by the Optimizer
+
+    :param optimizee_bounding_func:
+      This is a function that takes an individual as argument and returns another individual that is
+      within bounds (The bounds are defined by the function itself)
+    """
+
+    def __init__(self,
+                 traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        super().__init__(
+            traj,
+            optimizee_create_individual=optimizee_create_individual,
+            optimizee_fitness_weights=optimizee_fitness_weights,
+            parameters=parameters,
+            optimizee_bounding_func=optimizee_bounding_func)
+
+        if parameters.pop_size < 4:
+            raise ValueError("pop_size needs to be at least 4")
+        if parameters.strategy not in STRATEGIES:
+            raise ValueError("Unknown strategy '{}', expected one of {}".format(parameters.strategy, STRATEGIES))
+        if not 0. <= parameters.crossover_rate <= 1.:
+            raise ValueError("crossover_rate needs to be in [0, 1]")
+
+        # The following parameters are recorded
+        traj.f_add_parameter('pop_size', parameters.pop_size, comment='Number of individuals in the population')
+        traj.f_add_parameter('mutation_factor', parameters.mutation_factor, comment='Scale factor F')
+        traj.f_add_parameter('crossover_rate', parameters.crossover_rate, comment='Crossover probability CR')
+        traj.f_add_parameter('n_iteration', parameters.n_iteration, comment='Number of iterations to run')
+        traj.f_add_parameter(
+            'stop_criterion', parameters.stop_criterion, comment='Stop if best individual reaches this fitness')
+        traj.f_add_parameter(
+            'seed', np.uint32(parameters.seed), comment='Seed used for random number generation in optimizer')
+        traj.f_add_parameter('strategy', parameters.strategy, comment='Mutation strategy')
+
+        self.random_state = np.random.RandomState(traj.parameters.seed)
+
+        _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
+
+        # Added a generation-wise parameter logging
+        traj.results.f_add_result_group(
+            'generation_params',
+            comment='This contains the optimizer parameters that are'
+                    ' common across a generation')
+
+        # The following parameters are recorded as generation parameters i.e. once per generation
+        self.g = 0  # the current generation
+        self.best_fitness = -np.inf
+        self.best_individual = None
+
+        #: The current population and the fitness of its individuals, set after the first generation was evaluated
+        self.population = None
+        self.population_fitness = None
+
+        # The initial population is evaluated in the first generation
+        initial_population = [dict_to_list(self.optimizee_create_individual()) for _ in range(parameters.pop_size)]
+        self._set_eval_pop(self._bound_population(initial_population))
+
+        self._expand_trajectory(traj)
+
+    def _set_eval_pop(self, population):
+        """
+        Fills `eval_pop` (and its array form `eval_pop_arr`) with the individuals of the given population matrix
+        """
+        self.eval_pop_arr = np.asarray(population, dtype=float)
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in self.eval_pop_arr]
+
+    def _get_mutation_indices(self, n_indices):
+        """
+        :return: Array of shape (pop_size, n_indices) containing, for each individual i, `n_indices` mutually different
+            indices of other individuals, drawn uniformly (in O(pop_size) time and memory)
+        """
+        pop_size = len(self.population)
+        rows = np.arange(pop_size)
+        indices = np.empty((pop_size, n_indices), dtype=int)
+        # Each index is drawn from the indices that are still free and mapped past the already drawn ones (in
+        # ascending order), which gives a uniform draw without replacement from {0, ..., pop_size - 2}
+        for k in range(n_indices):
+            index = self.random_state.randint(0, pop_size - 1 - k, size=pop_size)
+            for drawn_index in np.sort(indices[:, :k], axis=1).T:
+                index += index >= drawn_index
+            indices[:, k] = index
+        # Skip the individual itself
+        indices += indices >= rows[:, np.newaxis]
+        return indices
+
+    def _create_trial_population(self, traj):
+        """
+        :return: The (bounded) trial individuals of the next generation, as matrix of shape (pop_size, d)
+        """
+        population = self.population
+        pop_size, dimension = population.shape
+        mutation_factor = traj.mutation_factor
+
+        if traj.strategy == 'rand/1/bin':
+            r = self._get_mutation_indices(3)
+            mutants = population[r[:, 0]] + mutation_factor * (population[r[:, 1]] - population[r[:, 2]])
+        else:
+            r = self._get_mutation_indices(2)
+            best = population[np.argmax(self.population_fitness)]
+            mutants = population + mutation_factor * (best - population) + \
+                mutation_factor * (population[r[:, 0]] - population[r[:, 1]])
+
+        # Binomial crossover, with at least one parameter taken from the mutant
+        crossover_mask = self.random_state.rand(pop_size, dimension) < traj.crossover_rate
+        crossover_mask[np.arange(pop_size), self.random_state.randint(0, dimension, size=pop_size)] = True
+        trials = np.where(crossover_mask, mutants, population)
+        return self._bound_population(trials)
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        n_iteration, stop_criterion = traj.n_iteration, traj.stop_criterion
+
+        weighted_fitness_list = np.empty(len(self.eval_pop))
+        # **************************************************************************************************************
+        # Storing run-information in the trajectory
+        # Reading fitnesses and performing distribution update
+        # **************************************************************************************************************
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            weighted_fitness_list[ind_index] = np.dot(fitness, self.optimizee_fitness_weights)
+        traj.v_idx = -1  # set trajectory back to default
+
+        # NOTE: It is necessary to clear the finesses_results to clear the data in the reference, and del
+        # is used to make sure it's not used in the rest of this function
+        fitnesses_results.clear()
+        del fitnesses_results
+
+        # **************************************************************************************************************
+        # Selection: Every trial individual replaces its target individual if it is at least as fit
+        # **************************************************************************************************************
+        if self.population is None:
+            self.population = self.eval_pop_arr.copy()
+            self.population_fitness = weighted_fitness_list
+            n_replaced = len(weighted_fitness_list)
+        else:
+            replace_mask = weighted_fitness_list >= self.population_fitness
+            self.population[replace_mask] = self.eval_pop_arr[replace_mask]
+            self.population_fitness[replace_mask] = weighted_fitness_list[replace_mask]
+            n_replaced = int(np.sum(replace_mask))
+
+        best_index = np.argmax(self.population_fitness)
+        if self.population_fitness[best_index] > self.best_fitness:
+            self.best_fitness = self.population_fitness[best_index]
+            self.best_individual = list_to_dict(self.population[best_index], self.optimizee_individual_dict_spec)
+
+        logger.info("-- End of generation %d --", self.g)
+        logger.info("  Evaluated %d individuals", len(weighted_fitness_list))
+        logger.info("  Replaced %d individuals", n_replaced)
+        logger.info('  Best Fitness: %.4f', self.best_fitness)
+        logger.info('  Average Fitness: %.4f', np.mean(self.population_fitness))
+
+        # **************************************************************************************************************
+        # Storing Generation Parameters / Results in the trajectory
+        # **************************************************************************************************************
+        # These entries correspond to the generation that has been simulated prior to this post-processing run
+
+        # Documentation of algorithm parameters for the current generation
+        #
+        # generation             - The index of the evaluated generation
+        # best_fitness_in_run    - The highest fitness among the trial individuals of the evaluated generation
+        # average_fitness_in_run - The mean fitness of the population after the selection
+        # n_replaced             - The number of individuals of the population replaced by trial individuals
+        generation_result_dict = {
+            'generation': self.g,
+            'best_fitness_in_run': np.max(weighted_fitness_list),
+            'average_fitness_in_run': np.mean(self.population_fitness),
+            'n_replaced': n_replaced,
+        }
+
+        generation_name = 'generation_{}'.format(self.g)
+        traj.results.generation_params.f_add_result_group(generation_name)
+        traj.results.generation_params.f_add_result(
+            generation_name + '.algorithm_params',
+            generation_result_dict,
+            comment="These are the parameters that correspond to the algorithm. "
+                    "Look at the source code for `DifferentialEvolutionOptimizer::post_process()` "
+                    "for comments documenting these parameters"
+        )
+
+        # **************************************************************************************************************
+        # Create the next generation of trial individuals
+        # **************************************************************************************************************
+        # Note that this is only done in case the evaluated run is not the last run
+
+        self.eval_pop.clear()
+
+        # check if to stop
+        if self.g < n_iteration - 1 and self.best_fitness < stop_criterion:
+            self._set_eval_pop(self._create_trial_population(traj))
+
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
+
+    def end(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
+        """
+        traj.f_add_result('final_individual', self.best_individual)
+        traj.f_add_result('final_fitness', self.best_fitness)
+        traj.f_add_result('n_iteration', self.g + 1)
+
+        # ------------ Finished all runs and print result --------------- #
+        logger.info("-- End of (successful) differential evolution optimization --")
@@ -1,7 +1,14 @@
 from .optimizer import GeneticAlgorithmParameters
 from .optimizer import GeneticAlgorithmOptimizer
+from .numpy_optimizer import NumpyGeneticAlgorithmOptimizer
+from .island_optimizer import IslandGeneticAlgorithmOptimizer, IslandGeneticAlgorithmParameters
+from .steady_state_optimizer import SteadyStateGeneticAlgorithmOptimizer
 
 __all__ = [
     'GeneticAlgorithmParameters',
     'GeneticAlgorithmOptimizer',
+    'NumpyGeneticAlgorithmOptimizer',
+    'IslandGeneticAlgorithmOptimizer',
+    'IslandGeneticAlgorithmParameters',
+    'SteadyStateGeneticAlgorithmOptimizer',
 ]
@@ -0,0 +1,163 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from l2l import dict_to_list
+from l2l.optimizers.evolution.numpy_optimizer import NumpyGeneticAlgorithmOptimizer
+from l2l.optimizers.evolution.optimizer import GeneticAlgorithmParameters
+
+logger = logging.getLogger("l2l-ga")
+
+# The fields with defaults (of the GA parameters and the migration topology) come last
+IslandGeneticAlgorithmParameters = namedtuple(
+    'IslandGeneticAlgorithmParameters',
+    tuple(field for field in GeneticAlgorithmParameters._fields
+          if field not in GeneticAlgorithmParameters._field_defaults) +
+    ('n_islands', 'migration_interval', 'migration_size', 'migration_topology') +
+    tuple(GeneticAlgorithmParameters._field_defaults),
+    defaults=('ring',) + tuple(GeneticAlgorithmParameters._field_defaults.values()))
+IslandGeneticAlgorithmParameters.__doc__ = """
+The parameters of :class:`~l2l.optimizers.evolution.GeneticAlgorithmParameters`, where `popsize` is the size of each
+island, and additionally:
+
+:param n_islands: Number of islands, i.e. of sub-populations that evolve independently
+:param migration_interval: Number of generations between two migrations
+:param migration_size: Number of (best) individuals each island sends to another island in a migration, where they
+    replace the worst individuals
+:param migration_topology: (Optional) Either 'ring', where island k sends its migrants to island k + 1 (the default),
+    or 'random', where the islands send their migrants along a ring over a new random permutation of the islands in each
+    migration
+"""
+
+MIGRATION_TOPOLOGIES = ('ring', 'random')
+
+
+class IslandGeneticAlgorithmOptimizer(NumpyGeneticAlgorithmOptimizer):
+    """
+    Implements the island model of the evolutionary algorithm of :class:`.NumpyGeneticAlgorithmOptimizer`. The
+    population is split into `n_islands` sub-populations of `popsize` individuals each, which are selected and mated
+    independently of each other. Every `migration_interval` generations, each island sends copies of its
+    `migration_size` best individuals to another island (given by `migration_topology`), where they replace the worst
+    individuals. The migrants keep their fitness, so that they are not evaluated again.
+
+    The individuals of all islands are evaluated together in one generation of the trajectory, so that the workers stay
+    saturated, while the selection of each island only considers its own `popsize` individuals. The islands keep the
+    diversity of large total populations, which would otherwise be dominated quickly by the best individuals.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj: Use this trajectory to store the parameters of the specific runs.
+      The parameters should be initialized based on the values in `parameters`
+    :param optimizee_create_individual: Function that creates a new individual
+    :param optimizee_fitness_weights: Fitness weights. The fitness returned by the Optimizee is multiplied by these
+      values (one for each element of the fitness vector)
+    :param parameters: Instance of :func:`~collections.namedtuple` :class:`.IslandGeneticAlgorithmParameters`
+      containing the parameters needed by the Optimizer
+    :param optimizee_bounding_func: This is a function that takes an individual as argument and returns another
+      individual that is within bounds (The bounds are defined by the function itself)
+    """
+
+    def __init__(self, traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        if parameters.n_islands < 1:
+            raise ValueError("n_islands needs to be at least 1")
+        if parameters.migration_topology not in MIGRATION_TOPOLOGIES:
+            raise ValueError("Unknown migration topology '{}', expected one of {}".format(
+                parameters.migration_topology, MIGRATION_TOPOLOGIES))
+        if not 0 <= parameters.migration_size <= parameters.popsize:
+            raise ValueError("migration_size needs to be in [0, popsize]")
+        if parameters.migration_interval < 1:
+            raise ValueError("migration_interval needs to be at least 1")
+
+        traj.f_add_parameter('n_islands', parameters.n_islands, comment='Number of islands')
+        traj.f_add_parameter('migration_interval', parameters.migration_interval,
+                             comment='Number of generations between migrations')
+        traj.f_add_parameter('migration_size', parameters.migration_size,
+                             comment='Number of individuals sent by each island in a migration')
+        traj.f_add_parameter('migration_topology', parameters.migration_topology,
+                             comment='Topology of the migrations between the islands')
+
+        super().__init__(traj,
+                         optimizee_create_individual=optimizee_create_individual,
+                         optimizee_fitness_weights=optimizee_fitness_weights,
+                         parameters=parameters, optimizee_bounding_func=optimizee_bounding_func)
+
+    @property
+    def n_islands(self):
+        return self.island_pop_fitness.shape[0]
+
+    @property
+    def island_pop_fitness(self):
+        """
+        The fitness of the population as matrix of shape (n_islands, popsize), i.e. one row per island
+        """
+        return self.pop_fitness.reshape(-1, self.parameters.popsize)
+
+    def _create_population(self, traj):
+        """
+        :return: The (bounded) initial population of all islands, as matrix of shape (n_islands * popsize,
+            n_parameters). The individuals of island k are the rows k * popsize to (k + 1) * popsize - 1
+        """
+        return self._bound_population([dict_to_list(self.optimizee_create_individual())
+                                       for _ in range(traj.n_islands * traj.popsize)]).astype(float)
+
+    def _get_island_offsets(self):
+        """
+        :return: Column vector of the index of the first individual of each island
+        """
+        return (np.arange(self.n_islands) * self.parameters.popsize)[:, np.newaxis]
+
+    def _select(self, n_individuals, tournsize):
+        """
+        :return: The indices of `popsize` individuals of each island, selected by tournaments of `tournsize` aspirants
+            of the same island
+        """
+        popsize = self.parameters.popsize
+        aspirants = self.random_state.randint(0, popsize, size=(self.n_islands, popsize, tournsize))
+        aspirants = (aspirants + self._get_island_offsets()[:, :, np.newaxis]).reshape(-1, tournsize)
+        return aspirants[np.arange(len(aspirants)), np.argmax(self.pop_fitness[aspirants], axis=1)]
+
+    def _get_mating_pairs(self, n_individuals):
+        """
+        :return: The indices of the pairs of consecutive offspring of each island
+        """
+        n_pairs = self.parameters.popsize // 2
+        offsets = self._get_island_offsets()
+        return (offsets + np.arange(0, 2 * n_pairs, 2)).ravel(), (offsets + np.arange(1, 2 * n_pairs, 2)).ravel()
+
+    def _get_migration_targets(self, traj):
+        """
+        :return: The index of the island each island sends its migrants to. Every island receives the migrants of
+            exactly one other island
+        """
+        if traj.migration_topology == 'ring':
+            return (np.arange(self.n_islands) + 1) % self.n_islands
+        # A ring over a random permutation of the islands
+        order = self.random_state.permutation(self.n_islands)
+        targets = np.empty(self.n_islands, dtype=int)
+        targets[order] = np.roll(order, -1)
+        return targets
+
+    def _update_population(self, traj):
+        """
+        Performs the migration every `migration_interval` generations
+        """
+        migration_size = traj.migration_size
+        if self.n_islands < 2 or migration_size == 0 or (self.g + 1) % traj.migration_interval != 0:
+            return
+
+        # Ranks of the individuals of each island in descending order of fitness
+        island_ranking = np.argsort(self.island_pop_fitness, axis=1, kind='stable')[:, ::-1] + \
+            self._get_island_offsets()
+        migrants = island_ranking[:, :migration_size]
+        targets = self._get_migration_targets(traj)
+        # The migrants of island k replace the worst individuals of island targets[k]
+        replaced = island_ranking[targets, -migration_size:]
+
+        migrant_individuals, migrant_fitness = self.pop[migrants.ravel()], self.pop_fitness[migrants.ravel()]
+        self.pop[replaced.ravel()] = migrant_individuals
+        self.pop_fitness[replaced.ravel()] = migrant_fitness
+        logger.info("  Migrated %d individuals from each island", migration_size)
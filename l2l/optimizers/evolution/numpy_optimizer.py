@@ -0,0 +1,254 @@
+import logging
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.deduplication import get_duplicate_mask
+from l2l.optimizers.optimizer import Optimizer
+
+logger = logging.getLogger("l2l-ga")
+
+
+class NumpyGeneticAlgorithmOptimizer(Optimizer):
+    """
+    Implements the same evolutionary algorithm as :class:`~l2l.optimizers.evolution.GeneticAlgorithmOptimizer`, with
+    the same :class:`~l2l.optimizers.evolution.GeneticAlgorithmParameters`, but stores the population and its fitness
+    as arrays instead of DEAP individuals. Every generation
+
+      - `popsize` offspring are selected by tournament selection (with replacement) of size `tournsize`
+      - consecutive pairs of offspring are mated with probability `CXPB` by blend crossover with `alpha = matepar`
+      - each offspring is mutated with probability `MUTPB`, by adding Gaussian noise with standard deviation `mutpar`
+        to each of its parameters with probability `indpb`
+      - duplicate offspring are mutated again until there are no duplicates left (at most 10 times)
+
+    and only the offspring that were changed are evaluated, while the others keep their fitness. A NaN fitness is ranked
+    below all other fitnesses (i.e. as -inf). All the operators are applied to the whole population at once with random
+    masks, which makes the optimizer side cheap even for large populations and long genomes. The results are
+    statistically equivalent to the DEAP implementation, but note that the fitness of an individual is the weighted sum
+    of its fitness vector (as for the other optimizers), while DEAP compares the weighted fitness vectors
+    lexicographically. The random numbers are drawn from a generator seeded with `seed`, so that runs are reproducible.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj: Use this trajectory to store the parameters of the specific runs.
+      The parameters should be initialized based on the values in `parameters`
+    :param optimizee_create_individual: Function that creates a new individual
+    :param optimizee_fitness_weights: Fitness weights. The fitness returned by the Optimizee is multiplied by these
+      values (one for each element of the fitness vector)
+    :param parameters: Instance of :func:`~collections.namedtuple` :class:`.GeneticAlgorithmParameters` containing the
+      parameters needed by the Optimizer
+    :param optimizee_bounding_func: This is a function that takes an individual as argument and returns another
+      individual that is within bounds (The bounds are defined by the function itself)
+    """
+
+    def __init__(self, traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        super().__init__(traj,
+                         optimizee_create_individual=optimizee_create_individual,
+                         optimizee_fitness_weights=optimizee_fitness_weights,
+                         parameters=parameters, optimizee_bounding_func=optimizee_bounding_func)
+        __, self.optimizee_individual_dict_spec = dict_to_list(optimizee_create_individual(), get_dict_spec=True)
+
+        traj.f_add_parameter('seed', parameters.seed, comment='Seed for RNG')
+        traj.f_add_parameter('popsize', parameters.popsize, comment='Population size')  # 185
+        traj.f_add_parameter('CXPB', parameters.CXPB, comment='Crossover term')
+        traj.f_add_parameter('MUTPB', parameters.MUTPB, comment='Mutation probability')
+        traj.f_add_parameter('n_iteration', parameters.NGEN, comment='Number of generations')
+
+        traj.f_add_parameter('indpb', parameters.indpb, comment='Mutation parameter')
+        traj.f_add_parameter('tournsize', parameters.tournsize, comment='Selection parameter')
+        traj.f_add_parameter('matepar', parameters.matepar, comment='Blend crossover parameter')
+        traj.f_add_parameter('mutpar', parameters.mutpar, comment='Standard deviation of the Gaussian mutation')
+        # NOTE: The tolerance is optional and not stored in the trajectory, as None can not be stored there
+        self.duplicate_tolerance = parameters.duplicate_tolerance
+
+        self.random_state = np.random.RandomState(parameters.seed)
+
+        # ------- Initialize Population and Trajectory -------- #
+        #: The population as matrix of shape (popsize, n_parameters)
+        self.pop = self._create_population(traj)
+        #: The weighted fitness of the individuals of the population, -inf if not evaluated yet (or NaN)
+        self.pop_fitness = np.full(len(self.pop), -np.inf)
+        #: Whether the individuals of the population have been evaluated
+        self.pop_evaluated = np.zeros(len(self.pop), dtype=bool)
+        self._set_eval_pop()
+
+        self.g = 0  # the current generation
+        self.hall_of_fame_size = 20
+        self.hall_of_fame = np.empty((0, self.pop.shape[1]))
+        self.hall_of_fame_fitness = np.empty(0)
+        self.best_individual = None
+
+        self._expand_trajectory(traj)
+
+    def _create_population(self, traj):
+        """
+        :return: The (bounded) initial population, as matrix of shape (popsize, n_parameters)
+        """
+        return self._bound_population([dict_to_list(self.optimizee_create_individual())
+                                       for _ in range(traj.popsize)]).astype(float)
+
+    def _set_eval_pop(self):
+        """
+        Fills `eval_pop` with the individuals of the population that have not been evaluated yet
+        """
+        self.eval_pop_indices = np.flatnonzero(~self.pop_evaluated)
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
+                         for ind in self.pop[self.eval_pop_indices]]
+
+    def _get_weighted_fitness(self, fitness):
+        """
+        :return: The weighted sum of a fitness vector, where NaN is replaced by -inf so that it is never ranked first
+        """
+        weighted_fitness = np.dot(fitness, self.optimizee_fitness_weights)
+        return -np.inf if np.isnan(weighted_fitness) else weighted_fitness
+
+    def _select(self, n_individuals, tournsize):
+        """
+        :return: The indices of `n_individuals` individuals selected by tournaments of `tournsize` aspirants each
+        """
+        aspirants = self.random_state.randint(0, len(self.pop), size=(n_individuals, tournsize))
+        return aspirants[np.arange(n_individuals), np.argmax(self.pop_fitness[aspirants], axis=1)]
+
+    def _get_mating_pairs(self, n_individuals):
+        """
+        :return: The indices of the first and of the second individual of each pair of offspring that can be mated, i.e.
+            of consecutive offspring
+        """
+        n_pairs = n_individuals // 2
+        return np.arange(0, 2 * n_pairs, 2), np.arange(1, 2 * n_pairs, 2)
+
+    def _mate(self, offspring, changed, CXPB, alpha):
+        """
+        Applies blend crossover in-place to the pairs of offspring that are mated with probability `CXPB`
+        """
+        first, second = self._get_mating_pairs(len(offspring))
+        mate_mask = self.random_state.rand(len(first)) < CXPB
+        first, second = first[mate_mask], second[mate_mask]
+        gamma = (1. + 2. * alpha) * self.random_state.rand(len(first), offspring.shape[1]) - alpha
+        parents1, parents2 = offspring[first], offspring[second]
+        offspring[first] = (1. - gamma) * parents1 + gamma * parents2
+        offspring[second] = gamma * parents1 + (1. - gamma) * parents2
+        changed[first] = changed[second] = True
+
+    def _mutate(self, offspring, changed, mutant_mask, indpb, sigma):
+        """
+        Applies Gaussian mutation in-place to the offspring selected by `mutant_mask`
+        """
+        mutants = np.flatnonzero(mutant_mask)
+        gene_mask = self.random_state.rand(len(mutants), offspring.shape[1]) < indpb
+        offspring[mutants] += gene_mask * self.random_state.normal(0., sigma, size=gene_mask.shape)
+        changed[mutants] = True
+
+    def _update_population(self, traj):
+        """
+        Called after the fitness of the evaluated individuals has been read and before the next generation is bred. It
+        does nothing here, but may be overridden to modify the (fully evaluated) population
+        """
+        pass
+
+    def _update_hall_of_fame(self, individuals, fitness):
+        """
+        Keeps the `hall_of_fame_size` best distinct individuals evaluated so far
+        """
+        candidates = np.concatenate((self.hall_of_fame, individuals))
+        candidate_fitness = np.concatenate((self.hall_of_fame_fitness, fitness))
+        _, unique_indices = np.unique(candidates, axis=0, return_index=True)
+        best = unique_indices[np.argsort(candidate_fitness[unique_indices], kind='stable')[::-1]]
+        best = best[:self.hall_of_fame_size]
+        self.hall_of_fame, self.hall_of_fame_fitness = candidates[best], candidate_fitness[best]
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        CXPB, MUTPB, NGEN = traj.CXPB, traj.MUTPB, traj.n_iteration
+
+        logger.info("  Evaluating %i individuals" % len(fitnesses_results))
+
+        # **************************************************************************************************************
+        # Storing run-information in the trajectory
+        # Reading fitnesses and performing distribution update
+        # **************************************************************************************************************
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            # Use the ind_idx to update the fitness
+            self.pop_fitness[self.eval_pop_indices[ind_index]] = self._get_weighted_fitness(fitness)
+            self.pop_evaluated[self.eval_pop_indices[ind_index]] = True
+
+        traj.v_idx = -1  # set the trajectory back to default
+
+        logger.info("-- End of generation {} --".format(self.g))
+        evaluated_fitness = self.pop_fitness[self.eval_pop_indices]
+        best_index = self.eval_pop_indices[np.argmax(evaluated_fitness)]
+        self.best_individual = list_to_dict(self.pop[best_index], self.optimizee_individual_dict_spec)
+        logger.info("Best individual is %s, %s", self.best_individual, self.pop_fitness[best_index])
+
+        self._update_hall_of_fame(self.pop[self.eval_pop_indices], evaluated_fitness)
+        logger.info("-- Hall of fame --")
+        for hof_ind, hof_fitness in zip(self.hall_of_fame[:2], self.hall_of_fame_fitness[:2]):
+            logger.info("HOF individual is %s, %s", list_to_dict(hof_ind, self.optimizee_individual_dict_spec),
+                        hof_fitness)
+
+        # ------- Create the next generation by crossover and mutation -------- #
+        if self.g < NGEN - 1:  # not necessary for the last generation
+            self._update_population(traj)
+
+            # Select the next generation individuals (the fancy indexing copies them)
+            selected = self._select(len(self.pop), traj.tournsize)
+            offspring = self.pop[selected]
+            offspring_fitness = self.pop_fitness[selected]
+            offspring_evaluated = self.pop_evaluated[selected]
+            changed = np.zeros(len(offspring), dtype=bool)
+
+            # Apply crossover and mutation on the offspring
+            self._mate(offspring, changed, CXPB, traj.matepar)
+            self._mutate(offspring, changed, self.random_state.rand(len(offspring)) < MUTPB, traj.indpb, traj.mutpar)
+
+            if not np.any(changed):
+                # At least one offspring is evaluated in every generation, so that the generation is not empty
+                self._mutate(offspring, changed, np.arange(len(offspring)) == self.random_state.randint(len(offspring)),
+                             traj.indpb, traj.mutpar)
+            offspring[changed] = self._bound_population(offspring[changed])
+
+            # Mutate (all but one of each group of) duplicate offspring again, until there are no duplicates left (a
+            # limited number of times)
+            for _ in range(10):
+                duplicate_mask = get_duplicate_mask(offspring, tolerance=self.duplicate_tolerance)
+                if not np.any(duplicate_mask):
+                    break
+                logger.info("Mutating more")
+                self._mutate(offspring, changed, duplicate_mask, traj.indpb, traj.mutpar)
+                offspring[duplicate_mask] = self._bound_population(offspring[duplicate_mask])
+
+            offspring_fitness[changed] = -np.inf
+            offspring_evaluated[changed] = False
+
+            # The population is entirely replaced by the offspring
+            self.pop, self.pop_fitness, self.pop_evaluated = offspring, offspring_fitness, offspring_evaluated
+            self._set_eval_pop()
+
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
+
+    def end(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
+        """
+        # ------------ Finished all runs and print result --------------- #
+        logger.info("-- End of (successful) evolution --")
+        for index in np.argsort(self.pop_fitness)[::-1][:10]:
+            logger.info("Best individual is %s, %s", self.pop[index], self.pop_fitness[index])
+
+        logger.info("-- Hall of fame --")
+        for hof_ind, hof_fitness in zip(self.hall_of_fame, self.hall_of_fame_fitness):
+            logger.info("HOF individual is %s, %s", hof_ind, hof_fitness)
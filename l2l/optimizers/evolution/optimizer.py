@@ -1,3 +1,4 @@
+import bisect
 import logging
 import random
 
@@ -7,13 +8,14 @@ from deap import base, creator, tools
 from deap.tools import HallOfFame
 
 from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.deduplication import get_individual_keys
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("l2l-ga")
 
 GeneticAlgorithmParameters = namedtuple('GeneticAlgorithmParameters',
                                         ['seed', 'popsize', 'CXPB', 'MUTPB', 'NGEN', 'indpb', 'tournsize', 'matepar',
-                                         'mutpar'])
+                                         'mutpar', 'duplicate_tolerance'], defaults=(None,))
 GeneticAlgorithmParameters.__doc__ = """
 :param seed: Random seed
 :param popsize: Size of the population
@@ -23,6 +25,10 @@ GeneticAlgorithmParameters.__doc__ = """
 :param indpb: Probability of mutation of each element in individual
 :param tournsize: Size of the tournamaent used for fitness evaluation and selection
 :param matepar: Paramter used for blending two values during mating
+:param mutpar: Standard deviation of the Gaussian mutation
+:param duplicate_tolerance: (Optional) If given, offspring whose parameters are equal after quantisation to multiples
+    of `duplicate_tolerance` are considered duplicates (see :func:`~l2l.optimizers.deduplication.get_duplicate_mask`).
+    By default only exactly equal offspring are duplicates
 """
 
 
@@ -60,6 +66,8 @@ class GeneticAlgorithmOptimizer(Optimizer):
 
         traj.f_add_parameter('indpb', parameters.indpb, comment='Mutation parameter')
         traj.f_add_parameter('tournsize', parameters.tournsize, comment='Selection parameter')
+        # NOTE: The tolerance is optional and not stored in the trajectory, as None can not be stored there
+        self.duplicate_tolerance = parameters.duplicate_tolerance
 
         # ------- Create and register functions with DEAP ------- #
         # delay_rate, slope, std_err, max_fraction_active
@@ -82,12 +90,10 @@ class GeneticAlgorithmOptimizer(Optimizer):
                 else:
                     # Deap Functions modify individuals in-place, Hence we must do the same
                     result_individuals_deap = func(*args, **kwargs)
-                    result_individuals = [list_to_dict(x, self.optimizee_individual_dict_spec)
-                                          for x in result_individuals_deap]
-                    bounded_individuals = [self.optimizee_bounding_func(x) for x in result_individuals]
+                    bounded_individuals = self._bound_population([list(x) for x in result_individuals_deap])
                     for i, deap_indiv in enumerate(result_individuals_deap):
-                        deap_indiv[:] = dict_to_list(bounded_individuals[i])
-                    print("Bounded Individual: {}".format(bounded_individuals))
+                        deap_indiv[:] = bounded_individuals[i]
+                    logger.debug("Bounded Individual: %s", bounded_individuals)
                     return result_individuals_deap
 
             return bounding_wrapper
@@ -172,14 +178,26 @@ class GeneticAlgorithmOptimizer(Optimizer):
                     self.toolbox.mutate(mutant)
                     del mutant.fitness.values
 
-            if len(set(map(tuple, offspring))) < len(offspring):
+            # Mutate duplicate offspring with probability 0.8, once for every earlier offspring they are equal to. The
+            # pairs of equal offspring are found by hashing, but visited in the same order as when comparing all pairs
+            # of offspring, so that the same random numbers are drawn
+            keys = get_individual_keys(offspring, tolerance=self.duplicate_tolerance)
+            if len(set(keys)) < len(keys):
                 logger.info("Mutating more")
-                for i, o1 in enumerate(offspring[:-1]):
-                    for o2 in offspring[i + 1:]:
-                        if tuple(o1) == tuple(o2):
-                            if random.random() < 0.8:
-                                self.toolbox.mutate(o2)
-                                del o2.fitness.values
+                rows_by_key = {}
+                for row, key in enumerate(keys):
+                    rows_by_key.setdefault(key, []).append(row)
+                for i in range(len(offspring) - 1):
+                    rows = rows_by_key[keys[i]]
+                    for j in rows[bisect.bisect_right(rows, i):]:
+                        if random.random() < 0.8:
+                            self.toolbox.mutate(offspring[j])
+                            del offspring[j].fitness.values
+                            key = get_individual_keys([offspring[j]], tolerance=self.duplicate_tolerance)[0]
+                            if key != keys[j]:
+                                rows_by_key[keys[j]].remove(j)
+                                bisect.insort(rows_by_key.setdefault(key, []), j)
+                                keys[j] = key
 
             # The population is entirely replaced by the offspring
             self.pop[:] = offspring
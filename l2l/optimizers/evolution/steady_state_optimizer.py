@@ -0,0 +1,185 @@
+import logging
+from collections import deque
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.deduplication import get_duplicate_mask, get_individual_keys
+from l2l.optimizers.evolution.numpy_optimizer import NumpyGeneticAlgorithmOptimizer
+
+logger = logging.getLogger("l2l-ga")
+
+
+class SteadyStateGeneticAlgorithmOptimizer(NumpyGeneticAlgorithmOptimizer):
+    """
+    Implements a steady-state variant of the evolutionary algorithm of :class:`.NumpyGeneticAlgorithmOptimizer`, with
+    the same :class:`~l2l.optimizers.evolution.GeneticAlgorithmParameters`. Instead of breeding whole generations,
+    single children are bred on demand and inserted into the population as soon as their fitness is known:
+
+      - :meth:`.ask` returns new individuals to evaluate. The individuals of the initial population are handed out
+        first. Afterwards, each child is bred from two parents selected by tournaments among the evaluated individuals,
+        mated with probability `CXPB` and mutated with probability `MUTPB`. Children that duplicate an individual handed
+        out before are mutated again
+      - :meth:`.tell` inserts evaluated individuals into the population, where each child replaces the worst individual
+        if it is at least as fit
+
+    This is meant for asynchronous execution with
+    :meth:`~l2l.utils.environment.Environment.run_asynchronously`, where every worker gets a new child as soon as it
+    has finished its previous evaluation, instead of waiting for the slowest evaluation of a generation. In total,
+    `NGEN * popsize` individuals are evaluated, as for the generational algorithm.
+
+    When run generation by generation with :meth:`~l2l.utils.environment.Environment.run` instead, each generation
+    consists of `popsize` children which are asked for at once, and told after they have all been evaluated.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj: Use this trajectory to store the parameters of the specific runs.
+      The parameters should be initialized based on the values in `parameters`
+    :param optimizee_create_individual: Function that creates a new individual
+    :param optimizee_fitness_weights: Fitness weights. The fitness returned by the Optimizee is multiplied by these
+      values (one for each element of the fitness vector)
+    :param parameters: Instance of :func:`~collections.namedtuple` :class:`.GeneticAlgorithmParameters` containing the
+      parameters needed by the Optimizer
+    :param optimizee_bounding_func: This is a function that takes an individual as argument and returns another
+      individual that is within bounds (The bounds are defined by the function itself)
+    """
+
+    def __init__(self, traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        #: Number of individuals handed out by :meth:`.ask` and received by :meth:`.tell`
+        self.n_asked = 0
+        self.n_told = 0
+        #: Total number of individuals to evaluate
+        self.n_evaluations = parameters.NGEN * parameters.popsize
+
+        super().__init__(traj,
+                         optimizee_create_individual=optimizee_create_individual,
+                         optimizee_fitness_weights=optimizee_fitness_weights,
+                         parameters=parameters, optimizee_bounding_func=optimizee_bounding_func)
+
+        # The individuals of the initial population which have not been handed out yet, and the rows of the initial
+        # individuals (by key) which have not been evaluated yet
+        self.initial_queue = deque(range(len(self.pop)))
+        self.initial_rows = {}
+        for row, key in enumerate(get_individual_keys(self.pop)):
+            self.initial_rows.setdefault(key, []).append(row)
+        #: The keys of all the individuals handed out so far
+        self.asked_keys = set()
+        get_duplicate_mask(self.pop, tolerance=self.duplicate_tolerance, known_keys=self.asked_keys)
+
+    def _breed(self):
+        """
+        :return: A new (bounded) child, bred from two parents selected among the evaluated individuals
+        """
+        parameters = self.parameters
+        evaluated = np.flatnonzero(self.pop_evaluated)
+        aspirants = evaluated[self.random_state.randint(0, len(evaluated), size=(2, parameters.tournsize))]
+        parents = aspirants[np.arange(2), np.argmax(self.pop_fitness[aspirants], axis=1)]
+        offspring = self.pop[parents]
+        changed = np.zeros(2, dtype=bool)
+        self._mate(offspring, changed, parameters.CXPB, parameters.matepar)
+        mutant_mask = self.random_state.rand(2) < parameters.MUTPB
+        self._mutate(offspring, changed, mutant_mask, parameters.indpb, parameters.mutpar)
+        child = self._bound_population(offspring[:1])
+
+        # Children which duplicate individuals handed out before are mutated again (a limited number of times)
+        for _ in range(10):
+            if not get_duplicate_mask(child, tolerance=self.duplicate_tolerance, known_keys=self.asked_keys)[0]:
+                break
+            self._mutate(child, np.zeros(1, dtype=bool), np.ones(1, dtype=bool), parameters.indpb, parameters.mutpar)
+            child = self._bound_population(child)
+        return child[0]
+
+    def ask(self, n_individuals=None):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.ask`. New children can be handed out at any time, independently
+        of the individuals whose fitness is not known yet.
+
+        :param n_individuals: (Optional) The maximum number of individuals to return, `popsize` by default
+        :return: List of Individual-Dicts to evaluate. It is empty once all `NGEN * popsize` individuals have been
+            handed out
+        """
+        if n_individuals is None:
+            n_individuals = len(self.pop)
+        n_individuals = max(0, min(n_individuals, self.n_evaluations - self.n_asked))
+        individuals = []
+        for _ in range(n_individuals):
+            if self.initial_queue:
+                individual = self.pop[self.initial_queue.popleft()]
+            elif np.sum(self.pop_evaluated) >= 2:
+                individual = self._breed()
+            else:
+                # Not enough individuals evaluated yet to select parents
+                individual = self._bound_population([dict_to_list(self.optimizee_create_individual())])[0]
+            self.n_asked += 1
+            individuals.append(list_to_dict(individual, self.optimizee_individual_dict_spec))
+        return individuals
+
+    def tell(self, individuals, fitnesses):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.tell`. Inserts the evaluated individuals into the population.
+        The individuals of the initial population take their place in the population, while each other individual
+        replaces the worst individual of the population if it is at least as fit. A NaN fitness is ranked below all
+        other fitnesses.
+
+        :param individuals: List of Individual-Dicts (e.g. as returned by :meth:`.ask`)
+        :param fitnesses: The fitness (vector) of each individual, as returned by the optimizee
+        """
+        for individual, fitness in zip(individuals, fitnesses):
+            individual = np.asarray(dict_to_list(individual), dtype=float)
+            weighted_fitness = self._get_weighted_fitness(fitness)
+            key = get_individual_keys([individual])[0]
+            initial_rows = self.initial_rows.get(key)
+            if initial_rows:
+                row = initial_rows.pop()
+                if row in self.initial_queue:
+                    # Evaluated without being handed out by `ask`, i.e. in the first generation of a synchronous run
+                    self.initial_queue.remove(row)
+                self.pop_fitness[row] = weighted_fitness
+                self.pop_evaluated[row] = True
+            else:
+                evaluated = np.flatnonzero(self.pop_evaluated)
+                worst = evaluated[np.argmin(self.pop_fitness[evaluated])] if len(evaluated) else None
+                if worst is not None and weighted_fitness >= self.pop_fitness[worst]:
+                    self.pop[worst] = individual
+                    self.pop_fitness[worst] = weighted_fitness
+            self._update_hall_of_fame(individual[np.newaxis], np.array([weighted_fitness]))
+
+            self.n_told += 1
+            if self.n_told % len(self.pop) == 0:
+                logger.info("-- Evaluated %d individuals --", self.n_told)
+                logger.info("  Best Fitness: %.4f", self.hall_of_fame_fitness[0])
+                logger.info("  Average Fitness: %.4f", np.mean(self.pop_fitness[self.pop_evaluated]))
+
+        evaluated = np.flatnonzero(self.pop_evaluated)
+        if len(evaluated):
+            best_index = evaluated[np.argmax(self.pop_fitness[evaluated])]
+            self.best_individual = list_to_dict(self.pop[best_index], self.optimizee_individual_dict_spec)
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        individuals, fitnesses = [], []
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            individuals.append(self.eval_pop[ind_index])
+            fitnesses.append(fitness)
+        traj.v_idx = -1  # set the trajectory back to default
+
+        logger.info("-- End of generation {} --".format(self.g))
+        self.tell(individuals, fitnesses)
+
+        if self.g < traj.n_iteration - 1:  # not necessary for the last generation
+            self.eval_pop = self.ask(traj.popsize)
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
@@ -1,10 +1,12 @@
 import logging
 from collections import namedtuple
+from functools import lru_cache
 
 import numpy as np
 
 from l2l import dict_to_list, list_to_dict
 from l2l.optimizers.optimizer import Optimizer
+from l2l.optimizers.seeded_perturbations import SeededPerturbationEncoding
 
 logger = logging.getLogger("optimizers.evolutionstrategies")
 
@@ -17,7 +19,10 @@ EvolutionStrategiesParameters = namedtuple('EvolutionStrategiesParameters', [
     'n_iteration',
     'stop_criterion',
     'seed',
-])
+    'dtype',
+    'seeded_perturbations_enabled',
+    'noise_table',
+], defaults=('float64', False, None))
 
 EvolutionStrategiesParameters.__doc__ = """
 :param learning_rate: Learning rate
@@ -29,9 +34,51 @@ EvolutionStrategiesParameters.__doc__ = """
 :param n_iteration: Number of iterations to perform
 :param stop_criterion: (Optional) Stop if this fitness is reached.
 :param seed: The random seed used for generating new individuals
+:param dtype: (Optional) Floating point type of the individual, the perturbations and the population matrices, e.g.
+    'float32' to halve the memory and bandwidth needed for large individuals. Default is 'float64'
+:param seeded_perturbations_enabled: (Optional) If True, each individual is sent to the optimizee as the current
+    individual plus the seed and the sign of its perturbation (see
+    :class:`~l2l.optimizers.seeded_perturbations.SeededPerturbationEncoding`) instead of as a full parameter vector,
+    and the perturbations are regenerated from the seeds for the update. Default is False
+:param noise_table: (Optional) A :class:`~l2l.optimizers.seeded_perturbations.NoiseTable` from which the perturbations
+    are taken as slices at random offsets, instead of being generated anew in every generation. With seeded
+    perturbations, the offsets are used as seeds. Default is None
 """
 
 
+@lru_cache(maxsize=16)
+def get_fitness_shaping_utilities(n_individuals):
+    """
+    Returns the (rank based) utilities used for fitness shaping, i.e.
+
+        u_k = max(0, log(n/2 + 1) - log(k)) / sum_{j=1}^{n}{max(0, log(n/2 + 1) - log(j))} - 1 / n
+
+    for the individuals of rank k = 1...n in descending order of fitness. The utilities only depend on the population
+    size, so they are computed once per population size and cached.
+
+    :param n_individuals: The number of individuals n
+    :return: A read-only array of the n utilities, ordered by rank
+    """
+    ranks = np.arange(1, n_individuals + 1)
+    sorted_utilities = np.maximum(0., np.log((n_individuals / 2) + 1) - np.log(ranks))
+    sorted_utilities /= np.sum(sorted_utilities)
+    sorted_utilities -= (1. / n_individuals)
+    sorted_utilities.flags.writeable = False
+    return sorted_utilities
+
+
+def get_utilities(fitnesses, fitness_sorting_indices):
+    """
+    :param fitnesses: The fitnesses of the individuals
+    :param fitness_sorting_indices: The indices of the individuals in descending order of fitness
+    :return: The fitness shaping utility of each individual, in the order of `fitnesses` (i.e. without reordering the
+        individuals)
+    """
+    utilities = np.empty(len(fitnesses))
+    utilities[fitness_sorting_indices] = get_fitness_shaping_utilities(len(fitnesses))
+    return utilities
+
+
 class EvolutionStrategiesOptimizer(Optimizer):
     """
     Class Implementing the evolution strategies optimizer
@@ -62,8 +109,8 @@ class EvolutionStrategiesOptimizer(Optimizer):
 
 
 
-    NOTE: This is not the most efficient implementation in terms of communication, since the new parameters are
-    communicated to the individuals rather than the seed as in the paper.
+    NOTE: By default, the new parameters are communicated to the individuals rather than the seed as in the paper.
+    Enable `seeded_perturbations_enabled` to communicate the seeds instead.
     NOTE: Doesn't yet contain fitness shaping and mirrored sampling
 
     :param  ~l2l.utils.trajectory.Trajectory traj:
@@ -119,11 +166,19 @@ class EvolutionStrategiesOptimizer(Optimizer):
             'stop_criterion', parameters.stop_criterion, comment='Stop if best individual reaches this fitness')
         traj.f_add_parameter(
             'seed', np.uint32(parameters.seed), comment='Seed used for random number generation in optimizer')
+        traj.f_add_parameter('dtype', np.dtype(parameters.dtype).name, comment='Floating point type of the population')
+        traj.f_add_parameter(
+            'seeded_perturbations_enabled',
+            parameters.seeded_perturbations_enabled,
+            comment='Flag to send the seeds of the perturbations instead of the individuals')
 
         self.random_state = np.random.RandomState(traj.parameters.seed)
+        self.dtype = np.dtype(parameters.dtype)
+        self.noise_table = parameters.noise_table
 
         self.current_individual_arr, self.optimizee_individual_dict_spec = dict_to_list(
             self.optimizee_create_individual(), get_dict_spec=True)
+        self.current_individual_arr = self.current_individual_arr.astype(self.dtype)
 
         noise_std_shape = np.array(parameters.noise_std).shape
         assert noise_std_shape == () or noise_std_shape == self.current_individual_arr.shape
@@ -151,23 +206,66 @@ class EvolutionStrategiesOptimizer(Optimizer):
         # Note that this array stores individuals as an np.array of floats as opposed to Individual-Dicts
         # This is because this array is used within the context of the cross entropy algorithm and
         # Thus needs to handle the optimizee individuals as vectors
-        self.current_perturbations = self._get_perturbations(traj)
-        current_eval_pop_arr = (self.current_individual_arr + self.current_perturbations).tolist()
+        self._sample_eval_pop(traj)
 
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
-        self.eval_pop.append(list_to_dict(self.current_individual_arr, self.optimizee_individual_dict_spec))
+        self._expand_trajectory(traj)
 
-        # Bounding function has to be applied AFTER the individual has been converted to a dict
-        if optimizee_bounding_func is not None:
-            self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
+    def _sample_eval_pop(self, traj):
+        """
+        Samples the perturbations of the next generation, and fills `eval_pop` with the individuals to evaluate
+        """
+        if traj.seeded_perturbations_enabled:
+            self.current_noise_seeds, self.current_noise_signs = self._get_noise_seeds(traj)
+            self._set_seeded_eval_pop(traj)
+        else:
+            self.current_perturbations = self._get_perturbations(traj)
+            self._set_eval_pop()
 
-        self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+    def _set_eval_pop(self):
+        """
+        Fills `eval_pop` (and its array form `eval_pop_arr`) with the perturbed individuals followed by the current
+        individual, bounded via :meth:`~l2l.optimizers.optimizer.Optimizer._bound_population`
+        """
+        eval_pop_arr = np.vstack((self.current_individual_arr + self.current_perturbations,
+                                  self.current_individual_arr))
+        self.eval_pop_arr = self._bound_population(eval_pop_arr)
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in self.eval_pop_arr]
 
-        self._expand_trajectory(traj)
+    def _set_seeded_eval_pop(self, traj):
+        """
+        Fills `eval_pop` with the encoded perturbed individuals followed by the (encoded) current individual
+        """
+        self.current_encoding = SeededPerturbationEncoding(
+            self.current_individual_arr, traj.noise_std, self.optimizee_individual_dict_spec, dtype=self.dtype,
+            bounding_func=self.optimizee_bounding_func, noise_table=self.noise_table)
+        self.eval_pop = [self.current_encoding.encode(int(seed), int(sign))
+                         for seed, sign in zip(self.current_noise_seeds, self.current_noise_signs)]
+        self.eval_pop.append(self.current_encoding.encode(0, 0))
+        self.eval_pop_arr = None
+
+    def _get_noise_seeds(self, traj):
+        """
+        :return: The seeds and the signs of the perturbations of the next generation
+        """
+        if self.noise_table is not None:
+            noise_seeds = self.noise_table.sample_offsets(self.random_state, traj.pop_size,
+                                                          self.current_individual_arr.size)
+        else:
+            noise_seeds = self.random_state.randint(np.iinfo(np.int32).max, size=traj.pop_size)
+        noise_signs = np.ones(traj.pop_size, dtype=int)
+        if traj.mirrored_sampling_enabled:
+            return np.concatenate((noise_seeds, noise_seeds)), np.concatenate((noise_signs, -noise_signs))
+        return noise_seeds, noise_signs
 
     def _get_perturbations(self, traj):
         pop_size, noise_std, mirrored_sampling_enabled = traj.pop_size, traj.noise_std, traj.mirrored_sampling_enabled
-        perturbations = noise_std * self.random_state.randn(pop_size, *self.current_individual_arr.shape)
+        if self.noise_table is not None:
+            offsets = self.noise_table.sample_offsets(self.random_state, pop_size, self.current_individual_arr.size)
+            noise = self.noise_table.get_batch(offsets, self.current_individual_arr.size)
+            perturbations = noise_std * noise.reshape(pop_size, *self.current_individual_arr.shape)
+        else:
+            perturbations = noise_std * self.random_state.randn(pop_size, *self.current_individual_arr.shape)
+        perturbations = perturbations.astype(self.dtype, copy=False)
         if mirrored_sampling_enabled:
             return np.vstack((perturbations, -perturbations))
         return perturbations
@@ -207,21 +305,22 @@ class EvolutionStrategiesOptimizer(Optimizer):
         weighted_fitness_list = weighted_fitness_list[:-1]
         current_individual_fitness = weighted_fitness_list[-1]
 
-        # Performs descending arg-sort of weighted fitness
-        fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
-
-        # Sorting the data according to fitness
-        sorted_population = self.eval_pop_arr[fitness_sorting_indices]
-        sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
-        sorted_perturbations = self.current_perturbations[fitness_sorting_indices]
+        # Performs descending arg-sort of weighted fitness. The individuals and perturbations are not reordered, but
+        # indexed by rank where needed
+        fitness_sorting_indices = np.argsort(weighted_fitness_list)[::-1]
+        best_index = fitness_sorting_indices[0]
 
-        self.best_individual = list_to_dict(sorted_population[0], self.optimizee_individual_dict_spec)
-        self.best_fitness_in_run = sorted_fitness[0]
+        if traj.seeded_perturbations_enabled:
+            self.best_individual = self.current_encoding.decode_individual(self.current_noise_seeds[best_index],
+                                                                           self.current_noise_signs[best_index])
+        else:
+            self.best_individual = list_to_dict(self.eval_pop_arr[best_index], self.optimizee_individual_dict_spec)
+        self.best_fitness_in_run = weighted_fitness_list[best_index]
 
         logger.info("-- End of generation %d --", self.g)
         logger.info("  Evaluated %d individuals", len(weighted_fitness_list) + 1)
         logger.info('  Best Fitness: %.4f', self.best_fitness_in_run)
-        logger.info('  Average Fitness: %.4f', np.mean(sorted_fitness))
+        logger.info('  Average Fitness: %.4f', np.mean(weighted_fitness_list))
 
         #**************************************************************************************************************
         # Storing Generation Parameters / Results in the trajectory
@@ -238,7 +337,7 @@ class EvolutionStrategiesOptimizer(Optimizer):
             'generation': self.g,
             'best_fitness_in_run': self.best_fitness_in_run,
             'current_individual_fitness': current_individual_fitness,
-            'average_fitness_in_run': np.mean(sorted_fitness),
+            'average_fitness_in_run': np.mean(weighted_fitness_list),
             'pop_size': self.pop_size
         }
 
@@ -253,23 +352,22 @@ class EvolutionStrategiesOptimizer(Optimizer):
         )
 
         if fitness_shaping_enabled:
-            sorted_utilities = []
-            n_individuals = len(sorted_fitness)
-            for i in range(n_individuals):
-                u = max(0., np.log((n_individuals / 2) + 1) - np.log(i + 1))
-                sorted_utilities.append(u)
-            sorted_utilities = np.array(sorted_utilities)
-            sorted_utilities /= np.sum(sorted_utilities)
-            sorted_utilities -= (1. / n_individuals)
-            # assert np.sum(sorted_utilities) == 0., "Sum of utilities is not 0, but %.4f" % np.sum(sorted_utilities)
-            fitnesses_to_fit = sorted_utilities
+            fitnesses_to_fit = get_utilities(weighted_fitness_list, fitness_sorting_indices)
         else:
-            fitnesses_to_fit = sorted_fitness
+            fitnesses_to_fit = weighted_fitness_list
 
-        assert len(fitnesses_to_fit) == len(sorted_perturbations)
+        if traj.seeded_perturbations_enabled:
+            # The perturbations are regenerated from their seeds as sign * noise_std * noise(seed)
+            weighted_noise_sum, _ = self.current_encoding.get_weighted_noise_sums(
+                self.current_noise_seeds, fitnesses_to_fit * self.current_noise_signs)
+            weighted_perturbation_sum = noise_std * weighted_noise_sum
+        else:
+            assert len(fitnesses_to_fit) == len(self.current_perturbations)
+            # A single matrix-vector product, in the precision of the perturbations
+            weighted_perturbation_sum = np.dot(fitnesses_to_fit.astype(self.current_perturbations.dtype),
+                                               self.current_perturbations)
 
-        self.current_individual_arr += learning_rate \
-                                       * np.sum([f * e for f, e in zip(fitnesses_to_fit, sorted_perturbations)], axis=0) \
+        self.current_individual_arr += learning_rate * weighted_perturbation_sum \
                                        / (len(fitnesses_to_fit) * noise_std ** 2)
 
         #**************************************************************************************************************
@@ -280,17 +378,7 @@ class EvolutionStrategiesOptimizer(Optimizer):
 
         # check if to stop
         if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
-            self.current_perturbations = self._get_perturbations(traj)
-            current_eval_pop_arr = (self.current_individual_arr + self.current_perturbations).tolist()
-
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
-            self.eval_pop.append(list_to_dict(self.current_individual_arr, self.optimizee_individual_dict_spec))
-
-            # Bounding function has to be applied AFTER the individual has been converted to a dict
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
-
-            self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+            self._sample_eval_pop(traj)
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
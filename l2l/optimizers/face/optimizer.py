@@ -25,7 +25,9 @@ FACEParameters.__doc__ = """
 :param temp_decay: This parameter is the factor (necessarily between 0 and 1) by which the temperature decays each
   generation. To see the use of temperature, look at the documentation of :class:`.FACEOptimizer`
 :param n_iteration: Number of iterations to perform
-:param distribution: Distribution class to use. Has to implement a fit and sample function.
+:param distribution: Distribution class to use. Has to implement a fit and sample function. For high dimensional
+  individuals, use :class:`~l2l.optimizers.crossentropy.distribution.DiagonalGaussian` or
+  :class:`~l2l.optimizers.crossentropy.distribution.LowRankGaussian`, which need memory linear in the dimension
 :param stop_criterion: (Optional) Stop if this fitness is reached.
 :param n_expand: (Optional) This is the amount by which the sample size is increased if FACE becomes active
 """
@@ -136,11 +138,9 @@ class FACEOptimizer(Optimizer):
         # Thus needs to handle the optimizee individuals as vectors
         current_eval_pop = [self.optimizee_create_individual() for _ in range(parameters.min_pop_size)]
 
-        if optimizee_bounding_func is not None:
-            current_eval_pop = [self.optimizee_bounding_func(ind) for ind in current_eval_pop]
-
-        self.eval_pop = current_eval_pop
-        self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+        self.eval_pop_asarray = self._bound_population([dict_to_list(x) for x in current_eval_pop])
+        self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
+                         for ind_asarray in self.eval_pop_asarray]
 
         # Max Likelihood
         self.current_distribution = parameters.distribution
@@ -262,13 +262,10 @@ class FACEOptimizer(Optimizer):
         self.eval_pop.clear()
         if expand:
             # Sample from the constructed distribution
-            self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
+            # Clip to boundaries
+            self.eval_pop_asarray = self._bound_population(self.current_distribution.sample(self.pop_size))
             self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
                              for ind_asarray in self.eval_pop_asarray]
-            # Clip to boundaries
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
-                self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
             self.g += 1  # Update generation counter
             self.T *= temp_decay
             self._expand_trajectory(traj)
@@ -12,19 +12,24 @@ logger = logging.getLogger("optimizers.gradientdescent")
 
 ClassicGDParameters = namedtuple(
     'ClassicGDParameters',
-    ['learning_rate', 'exploration_step_size', 'n_random_steps', 'n_iteration', 'stop_criterion', 'seed'])
+    ['learning_rate', 'exploration_step_size', 'n_random_steps', 'n_iteration', 'stop_criterion', 'seed',
+     'spsa_enabled'],
+    defaults=(False,))
 ClassicGDParameters.__doc__ = """
 :param learning_rate: The rate of learning per step of gradient descent
 :param exploration_step_size: The standard deviation of random steps used for finite difference gradient
 :param n_random_steps: The amount of random steps used to estimate gradient
 :param n_iteration: number of iteration to perform
 :param stop_criterion: Stop if change in fitness is below this value
+:param spsa_enabled: (Optional) Estimate the gradient by simultaneous perturbation (see
+    :class:`.GradientDescentOptimizer`) instead of a least-squares fit. False by default
 """
 
 StochasticGDParameters = namedtuple(
     'StochasticGDParameters',
     ['learning_rate', 'stochastic_deviation', 'stochastic_decay', 'exploration_step_size', 'n_random_steps', 'n_iteration',
-     'stop_criterion', 'seed'])
+     'stop_criterion', 'seed', 'spsa_enabled'],
+    defaults=(False,))
 StochasticGDParameters.__doc__ = """
 :param learning_rate: The rate of learning per step of gradient descent
 :param stochastic_deviation: The standard deviation of the random vector used to perturbate the gradient
@@ -34,12 +39,15 @@ StochasticGDParameters.__doc__ = """
 :param n_random_steps: The amount of random steps used to estimate gradient
 :param n_iteration: number of iteration to perform
 :param stop_criterion: Stop if change in fitness is below this value
+:param spsa_enabled: (Optional) Estimate the gradient by simultaneous perturbation (see
+    :class:`.GradientDescentOptimizer`) instead of a least-squares fit. False by default
 """
 
 AdamParameters = namedtuple(
     'AdamParameters',
     ['learning_rate', 'exploration_step_size', 'n_random_steps', 'first_order_decay', 'second_order_decay', 'n_iteration',
-     'stop_criterion', 'seed'])
+     'stop_criterion', 'seed', 'spsa_enabled'],
+    defaults=(False,))
 AdamParameters.__doc__ = """
 :param learning_rate: The rate of learning per step of gradient descent
 :param exploration_step_size: The standard deviation of random steps used for finite difference gradient
@@ -48,12 +56,16 @@ AdamParameters.__doc__ = """
 :param second_order_decay: Specifies the amount of decay of the historic second order momentum per gradient descent step
 :param n_iteration: number of iteration to perform
 :param stop_criterion: Stop if change in fitness is below this value
+:param spsa_enabled: (Optional) Estimate the gradient by simultaneous perturbation (see
+    :class:`.GradientDescentOptimizer`) instead of a least-squares fit. False by default
 
 """
 
 RMSPropParameters = namedtuple(
     'RMSPropParameters',
-    ['learning_rate', 'exploration_step_size', 'n_random_steps', 'momentum_decay', 'n_iteration', 'stop_criterion', 'seed'])
+    ['learning_rate', 'exploration_step_size', 'n_random_steps', 'momentum_decay', 'n_iteration', 'stop_criterion', 'seed',
+     'spsa_enabled'],
+    defaults=(False,))
 RMSPropParameters.__doc__ = """
 :param learning_rate: The rate of learning per step of gradient descent
 :param exploration_step_size: The standard deviation of random steps used for finite difference gradient
@@ -62,6 +74,8 @@ RMSPropParameters.__doc__ = """
 :param n_iteration: number of iteration to perform
 :param stop_criterion: Stop if change in fitness is below this value
 :param seed: The random seed used for random number generation in the optimizer
+:param spsa_enabled: (Optional) Estimate the gradient by simultaneous perturbation (see
+    :class:`.GradientDescentOptimizer`) instead of a least-squares fit. False by default
 """
 
 
@@ -76,6 +90,18 @@ class GradientDescentOptimizer(Optimizer):
         - Create the new 'current individual' by taking a step in the parameters space along the direction
             of the largest ascent of the plane
 
+    The gradient is estimated in one of two ways:
+        - By default, from the fitness of `n_random_steps` gaussian random steps around the current individual, as
+          the least-squares solution of the finite differences. This is only well-posed with at least as many random
+          steps as parameters.
+        - If `spsa_enabled` is set in the parameters, by simultaneous perturbation stochastic approximation (SPSA):
+          Each of the `n_random_steps` random steps changes every parameter by +/- `exploration_step_size` and is
+          evaluated in both directions (antithetic pair). The gradient is the average over the pairs of the
+          difference of fitness divided by the difference of the (bounded) parameters, where parameters that the
+          bounding function clipped to the same value in both directions are left out. This needs
+          2 * `n_random_steps` evaluations per iteration, independently of the number of parameters.
+        In both cases, the current individual is evaluated as well.
+
     NOTE: This expects all parameters of the system to be of floating point
 
     :param  ~l2l.utils.trajectory.Trajectory traj:
@@ -117,6 +143,8 @@ class GradientDescentOptimizer(Optimizer):
         traj.f_add_parameter('n_iteration', parameters.n_iteration, comment='Number of iteration to perform')
         traj.f_add_parameter('stop_criterion', parameters.stop_criterion, comment='Stopping criterion parameter')
         traj.f_add_parameter('seed', np.uint32(parameters.seed), comment='Optimizer random seed')
+        traj.f_add_parameter('spsa_enabled', parameters.spsa_enabled,
+                             comment='Estimate the gradient by simultaneous perturbation')
         
         _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
         self.random_state = np.random.RandomState(seed=traj.par.seed)
@@ -144,27 +172,53 @@ class GradientDescentOptimizer(Optimizer):
                                         comment='This contains the optimizer parameters that are'
                                                 ' common across a generation')
 
-        # Explore the neighbourhood in the parameter space of current individual
-        new_individual_list = [
-            list_to_dict(self.current_individual + 
-                         self.random_state.normal(0.0, parameters.exploration_step_size, self.current_individual.size),
-                         self.optimizee_individual_dict_spec)
-            for i in range(parameters.n_random_steps)
-        ]
-
-        # Also add the current individual to determine it's fitness
-        new_individual_list.append(list_to_dict(self.current_individual, self.optimizee_individual_dict_spec))
-            
-        if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
-
         # Storing the fitness of the current individual
         self.current_fitness = -np.Inf
         self.g = 0
-        
-        self.eval_pop = new_individual_list
+
+        # Explore the neighbourhood in the parameter space of current individual
+        self.eval_pop = self._get_exploration_population(traj)
         self._expand_trajectory(traj)
 
+    def _get_exploration_population(self, traj):
+        """
+        Samples the random steps around the current individual used to estimate the gradient
+
+        :return: List of the (bounded) Individual-Dicts to evaluate, the current individual last
+        """
+        if traj.spsa_enabled:
+            # Symmetric Bernoulli perturbations, each evaluated in both directions
+            perturbations = self.random_state.choice([-1., 1.], size=(traj.n_random_steps, self.current_individual.size))
+            steps = traj.exploration_step_size * perturbations
+            steps = np.concatenate((steps, -steps))
+        else:
+            steps = self.random_state.normal(0.0, traj.exploration_step_size,
+                                             (traj.n_random_steps, self.current_individual.size))
+
+        # Also add the current individual to determine it's fitness
+        new_individual_arr = np.concatenate((self.current_individual + steps, [self.current_individual]))
+        new_individual_arr = self._bound_population(new_individual_arr)
+        return [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in new_individual_arr]
+
+    def _estimate_gradient(self, traj, population, fitnesses):
+        """
+        :param population: Array of the evaluated individuals, as returned by :meth:`._get_exploration_population`
+        :param fitnesses: Array of their weighted fitness
+
+        :return: The estimated gradient of the fitness at the current individual
+        """
+        if traj.spsa_enabled:
+            forward_fitnesses, backward_fitnesses = np.split(fitnesses[:-1], 2)
+            # The evaluated steps may be shorter than the perturbations if the population was bounded
+            forward_individuals, backward_individuals = np.split(population[:-1], 2)
+            dx = forward_individuals - backward_individuals
+            perturbed = dx != 0
+            quotients = np.divide((forward_fitnesses - backward_fitnesses)[:, np.newaxis], dx,
+                                  out=np.zeros_like(dx), where=perturbed)
+            return np.sum(quotients, axis=0) / np.maximum(np.sum(perturbed, axis=0), 1)
+        dx = population[:-1] - self.current_individual
+        return np.linalg.lstsq(dx, fitnesses[:-1] - self.current_fitness, rcond=None)[0]
+
     def post_process(self, traj, fitnesses_results):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
@@ -173,15 +227,13 @@ class GradientDescentOptimizer(Optimizer):
         self.eval_pop.clear()
 
         logger.info("  Evaluating %i individuals" % len(fitnesses_results))
-        
-        assert len(fitnesses_results) - 1 == traj.n_random_steps
 
-        # We need to collect the directions of the random steps along with the fitness evaluated there
-        fitnesses = np.zeros((traj.n_random_steps))
-        dx = np.zeros((traj.n_random_steps, len(self.current_individual)))
-        weighted_fitness_list = []
+        assert len(fitnesses_results) == len(old_eval_pop)
+
+        # We need to collect the random steps along with the fitness evaluated there
+        weighted_fitness_list = np.zeros(len(old_eval_pop))
 
-        for i, (run_index, fitness) in enumerate(fitnesses_results):
+        for run_index, fitness in fitnesses_results:
             # We need to convert the current run index into an ind_idx
             # (index of individual within one generation
             traj.v_idx = run_index
@@ -192,17 +244,12 @@ class GradientDescentOptimizer(Optimizer):
             traj.f_add_result('$set.$.individual', individual)
             traj.f_add_result('$set.$.fitness', fitness)
 
-            weighted_fitness = np.dot(fitness, self.optimizee_fitness_weights)
-            weighted_fitness_list.append(weighted_fitness)
-
-            # The last element of the list is the evaluation of the individual obtained via gradient descent
-            if i == len(fitnesses_results) - 1:
-                self.current_fitness = weighted_fitness
-            else:
-                fitnesses[i] = weighted_fitness
-                dx[i] = np.array(dict_to_list(individual)) - self.current_individual
+            weighted_fitness_list[ind_index] = np.dot(fitness, self.optimizee_fitness_weights)
         traj.v_idx = -1  # set the trajectory back to default
 
+        # The last individual is the one obtained via gradient descent
+        self.current_fitness = weighted_fitness_list[-1]
+
         # Performs descending arg-sort of weighted fitness
         fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
         old_eval_pop_as_array = np.array([dict_to_list(x) for x in old_eval_pop])
@@ -234,25 +281,12 @@ class GradientDescentOptimizer(Optimizer):
 
         if self.g < traj.n_iteration - 1 and traj.stop_criterion > self.current_fitness:
             # Create new individual using the appropriate gradient descent
-            self.update_function(traj, np.dot(np.linalg.pinv(dx), fitnesses - self.current_fitness))
-            current_individual_dict = list_to_dict(self.current_individual, self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                current_individual_dict = self.optimizee_bounding_func(current_individual_dict)
-            self.current_individual = np.array(dict_to_list(current_individual_dict))
+            self.update_function(traj, self._estimate_gradient(traj, old_eval_pop_as_array, weighted_fitness_list))
+            self.current_individual = self._bound_population([self.current_individual])[0]
 
             # Explore the neighbourhood in the parameter space of the current individual
-            new_individual_list = [
-                list_to_dict(self.current_individual + 
-                             self.random_state.normal(0.0, traj.exploration_step_size, self.current_individual.size),
-                             self.optimizee_individual_dict_spec)
-                for _ in range(traj.n_random_steps)
-            ]
-            if self.optimizee_bounding_func is not None:
-                new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
-            new_individual_list.append(current_individual_dict)
-
             fitnesses_results.clear()
-            self.eval_pop = new_individual_list
+            self.eval_pop = self._get_exploration_population(traj)
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
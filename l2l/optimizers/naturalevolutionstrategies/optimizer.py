@@ -4,7 +4,9 @@ from collections import namedtuple
 import numpy as np
 
 from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.evolutionstrategies.optimizer import get_utilities
 from l2l.optimizers.optimizer import Optimizer
+from l2l.optimizers.seeded_perturbations import SeededPerturbationEncoding
 
 logger = logging.getLogger("optimizers.naturalevolutionstrategies")
 
@@ -19,7 +21,10 @@ NaturalEvolutionStrategiesParameters = namedtuple('NaturalEvolutionStrategiesPar
     'n_iteration',
     'stop_criterion',
     'seed',
-])
+    'dtype',
+    'seeded_perturbations_enabled',
+    'noise_table',
+], defaults=('float64', False, None))
 
 NaturalEvolutionStrategiesParameters.__doc__ = """
 :param learning_rate_mu: Learning rate for mean of distribution
@@ -33,6 +38,15 @@ NaturalEvolutionStrategiesParameters.__doc__ = """
 :param n_iteration: Number of iterations to perform
 :param stop_criterion: (Optional) Stop if this fitness is reached.
 :param seed: The random seed used for generating new individuals
+:param dtype: (Optional) Floating point type of the search distribution, the perturbations and the population matrices,
+    e.g. 'float32' to halve the memory and bandwidth needed for large individuals. Default is 'float64'
+:param seeded_perturbations_enabled: (Optional) If True, each individual is sent to the optimizee as the mean of the
+    search distribution plus the seed and the sign of its perturbation (see
+    :class:`~l2l.optimizers.seeded_perturbations.SeededPerturbationEncoding`) instead of as a full parameter vector,
+    and the perturbations are regenerated from the seeds for the update. Default is False
+:param noise_table: (Optional) A :class:`~l2l.optimizers.seeded_perturbations.NoiseTable` from which the perturbations
+    are taken as slices at random offsets, instead of being generated anew in every generation. With seeded
+    perturbations, the offsets are used as seeds. Default is None
 """
 
 
@@ -145,7 +159,15 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         traj.f_add_parameter(
             'seed', np.uint32(parameters.seed), comment='Seed used for random number generation in optimizer')
 
+        traj.f_add_parameter('dtype', np.dtype(parameters.dtype).name, comment='Floating point type of the population')
+        traj.f_add_parameter(
+            'seeded_perturbations_enabled',
+            parameters.seeded_perturbations_enabled,
+            comment='Flag to send the seeds of the perturbations instead of the individuals')
+
         self.random_state = np.random.RandomState(traj.parameters.seed)
+        self.dtype = np.dtype(parameters.dtype)
+        self.noise_table = parameters.noise_table
 
         self.current_individual_arr, self.optimizee_individual_dict_spec = dict_to_list(
             self.optimizee_create_individual(), get_dict_spec=True)
@@ -168,25 +190,65 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         self.best_individual_in_run = None
 
         # Set initial parameters of search distribution
-        self.mu = traj.mu
-        self.sigma = traj.sigma
+        self.mu = np.asarray(traj.mu, dtype=self.dtype)
+        self.sigma = np.asarray(traj.sigma, dtype=self.dtype)
 
         # Generate initial distribution
-        self.current_perturbations = self._get_perturbations(traj)
-        current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
+        self._sample_eval_pop(traj)
 
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
+        self._expand_trajectory(traj)
 
-        # Bounding function has to be applied AFTER the individual has been converted to a dict
-        if optimizee_bounding_func is not None:
-            self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
+    def _sample_eval_pop(self, traj):
+        """
+        Samples the perturbations of the next generation, and fills `eval_pop` with the individuals to evaluate
+        """
+        if traj.seeded_perturbations_enabled:
+            self.current_noise_seeds, self.current_noise_signs = self._get_noise_seeds(traj)
+            self._set_seeded_eval_pop()
+        else:
+            self.current_perturbations = self._get_perturbations(traj)
+            self._set_eval_pop()
 
-        self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+    def _set_eval_pop(self):
+        """
+        Fills `eval_pop` (and its array form `eval_pop_arr`) with individuals sampled from the search distribution,
+        bounded via :meth:`~l2l.optimizers.optimizer.Optimizer._bound_population`
+        """
+        self.eval_pop_arr = self._bound_population(self.mu + self.sigma * self.current_perturbations)
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in self.eval_pop_arr]
 
-        self._expand_trajectory(traj)
+    def _set_seeded_eval_pop(self):
+        """
+        Fills `eval_pop` with the encoded individuals sampled from the search distribution
+        """
+        self.current_encoding = SeededPerturbationEncoding(
+            self.mu, self.sigma, self.optimizee_individual_dict_spec, dtype=self.dtype,
+            bounding_func=self.optimizee_bounding_func, noise_table=self.noise_table)
+        self.eval_pop = [self.current_encoding.encode(int(seed), int(sign))
+                         for seed, sign in zip(self.current_noise_seeds, self.current_noise_signs)]
+        self.eval_pop_arr = None
+
+    def _get_noise_seeds(self, traj):
+        """
+        :return: The seeds and the signs of the perturbations of the next generation
+        """
+        if self.noise_table is not None:
+            noise_seeds = self.noise_table.sample_offsets(self.random_state, traj.pop_size,
+                                                          self.current_individual_arr.size)
+        else:
+            noise_seeds = self.random_state.randint(np.iinfo(np.int32).max, size=traj.pop_size)
+        noise_signs = np.ones(traj.pop_size, dtype=int)
+        if traj.mirrored_sampling_enabled:
+            return np.concatenate((noise_seeds, noise_seeds)), np.concatenate((noise_signs, -noise_signs))
+        return noise_seeds, noise_signs
 
     def _get_perturbations(self, traj):
-        perturbations = self.random_state.randn(traj.pop_size, *traj.dimension)
+        if self.noise_table is not None:
+            offsets = self.noise_table.sample_offsets(self.random_state, traj.pop_size, self.current_individual_arr.size)
+            perturbations = self.noise_table.get_batch(offsets, self.current_individual_arr.size)
+            perturbations = perturbations.reshape(traj.pop_size, *traj.dimension).astype(self.dtype, copy=False)
+        else:
+            perturbations = self.random_state.randn(traj.pop_size, *traj.dimension).astype(self.dtype, copy=False)
 
         if traj.mirrored_sampling_enabled:
             return np.vstack([perturbations, -perturbations])
@@ -228,21 +290,27 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         weighted_fitness_list = weighted_fitness_list[:-1]
         current_individual_fitness = weighted_fitness_list[-1]
 
-        # Performs descending arg-sort of weighted fitness
-        fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
-
-        # Sorting the data according to fitness
-        sorted_population = self.eval_pop_arr[fitness_sorting_indices]
-        sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
-        sorted_perturbations = self.current_perturbations[fitness_sorting_indices]
-
-        self.best_individual_in_run = sorted_population[0]
-        self.best_fitness_in_run = sorted_fitness[0]
+        # Performs descending arg-sort of weighted fitness. The individuals and perturbations are not reordered, but
+        # indexed by rank where needed
+        fitness_sorting_indices = np.argsort(weighted_fitness_list)[::-1]
+        best_index = fitness_sorting_indices[0]
+        # Only the perturbations of the individuals with a fitness are used (see the note above)
+        n_individuals = len(weighted_fitness_list)
+
+        if traj.seeded_perturbations_enabled:
+            noise_seeds = self.current_noise_seeds[:n_individuals]
+            noise_signs = self.current_noise_signs[:n_individuals]
+            self.best_individual_in_run = dict_to_list(
+                self.current_encoding.decode_individual(noise_seeds[best_index], noise_signs[best_index]))
+        else:
+            perturbations = self.current_perturbations[:n_individuals]
+            self.best_individual_in_run = self.eval_pop_arr[best_index]
+        self.best_fitness_in_run = weighted_fitness_list[best_index]
 
         logger.info("-- End of generation %d --", self.g)
         logger.info("  Evaluated %d individuals", len(weighted_fitness_list) + 1)
         logger.info('  Best Fitness: %.4f', self.best_fitness_in_run)
-        logger.info('  Average Fitness: %.4f', np.mean(sorted_fitness))
+        logger.info('  Average Fitness: %.4f', np.mean(weighted_fitness_list))
 
         # **************************************************************************************************************
         # Storing Generation Parameters / Results in the trajectory
@@ -259,7 +327,7 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
             'generation': self.g,
             'best_fitness_in_run': self.best_fitness_in_run,
             'current_individual_fitness': current_individual_fitness,
-            'average_fitness_in_run': np.mean(sorted_fitness),
+            'average_fitness_in_run': np.mean(weighted_fitness_list),
             'pop_size': self.pop_size
         }
 
@@ -279,17 +347,32 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
                     " currently evaluated generation")
 
         if fitness_shaping_enabled:
-            fitnesses_to_fit = self._compute_utility(sorted_fitness)
+            fitnesses_to_fit = self._compute_utility(weighted_fitness_list, fitness_sorting_indices)
         else:
-            fitnesses_to_fit = sorted_fitness
-
-        assert len(fitnesses_to_fit) == len(sorted_perturbations)
+            fitnesses_to_fit = weighted_fitness_list
 
         # **************************************************************************************************************
         # Update the parameters of the search distribution using the natural gradient in natural coordinates
         # **************************************************************************************************************
-        self.mu += traj.learning_rate_mu * traj.sigma * np.dot(fitnesses_to_fit, sorted_perturbations)
-        self.sigma *= np.exp(traj.learning_rate_sigma / 2. * np.dot(fitnesses_to_fit, sorted_perturbations ** 2 - 1.))
+        if traj.seeded_perturbations_enabled:
+            # The perturbations s = sign * noise(seed) are regenerated from their seeds (note that s ** 2 = noise ** 2)
+            weighted_perturbation_sum, weighted_squared_perturbation_sum = \
+                self.current_encoding.get_weighted_noise_sums(
+                    noise_seeds, fitnesses_to_fit * noise_signs, squared_coefficients=fitnesses_to_fit)
+            self.mu += traj.learning_rate_mu * self.sigma * weighted_perturbation_sum
+            self.sigma *= np.exp(traj.learning_rate_sigma / 2. *
+                                 (weighted_squared_perturbation_sum - np.sum(fitnesses_to_fit)))
+        else:
+            assert len(fitnesses_to_fit) == len(perturbations)
+
+            # Matrix-vector products in the precision of the perturbations. The weighted sum of the squared
+            # perturbations is computed without materialising `perturbations ** 2`
+            fitnesses_to_fit = fitnesses_to_fit.astype(perturbations.dtype)
+            weighted_perturbation_sum = np.dot(fitnesses_to_fit, perturbations)
+            weighted_squared_perturbation_sum = np.einsum('i,ij,ij->j', fitnesses_to_fit, perturbations, perturbations)
+            self.mu += traj.learning_rate_mu * self.sigma * weighted_perturbation_sum
+            self.sigma *= np.exp(traj.learning_rate_sigma / 2. *
+                                 (weighted_squared_perturbation_sum - np.sum(fitnesses_to_fit)))
 
         # **************************************************************************************************************
         # Create the next generation by sampling the inferred distribution
@@ -300,26 +383,16 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
 
         # check if to stop
         if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
-            self.current_perturbations = self._get_perturbations(traj)
-            current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
-
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
-
-            # Bounding function has to be applied AFTER the individual has been converted to a dict
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
-
-            self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+            self._sample_eval_pop(traj)
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
-    def _compute_utility(self, sorted_fitness):
-        n_individuals = len(sorted_fitness)
-        sorted_utilities = np.array([max(0., np.log((n_individuals / 2) + 1) - np.log(i + 1)) for i in range(n_individuals)])
-        sorted_utilities /= np.sum(sorted_utilities)
-        sorted_utilities -= (1. / n_individuals)
-        return sorted_utilities
+    def _compute_utility(self, fitnesses, fitness_sorting_indices):
+        """
+        See :func:`~l2l.optimizers.evolutionstrategies.optimizer.get_utilities`
+        """
+        return get_utilities(fitnesses, fitness_sorting_indices)
 
     def end(self, traj):
         """
@@ -1,12 +1,44 @@
 from collections import namedtuple
 
+import numpy as np
+
 from l2l.utils.tools import cartesian_product
 
-from l2l import get_grouped_dict
+from l2l import get_grouped_dict, dict_to_list, list_to_dict
 
 OptimizerParameters = namedtuple('OptimizerParamters', [])
 
 
+def _individuals_equal(individual, other_individual):
+    """
+    :return: True if both Individual-Dicts have the same keys and equal values
+    """
+    return individual.keys() == other_individual.keys() and \
+        all(np.array_equal(individual[key], other_individual[key]) for key in individual)
+
+
+def _get_bounding_func_batch(bounding_func):
+    """
+    :return: The `bounding_func_batch` method of the optimizee whose `bounding_func` method is `bounding_func`, or None
+        if there is none. It is None as well if `bounding_func` is overridden in a subclass of the class that defines
+        `bounding_func_batch`, since the inherited batched version would bound the individuals differently
+    """
+    optimizee = getattr(bounding_func, '__self__', None)
+    if optimizee is None or bounding_func != getattr(optimizee, 'bounding_func', None):
+        return None
+    mro = type(optimizee).__mro__
+
+    def get_defining_class_index(name):
+        return next((i for i, cls in enumerate(mro) if name in vars(cls)), None)
+
+    bounding_func_index = get_defining_class_index('bounding_func')
+    bounding_func_batch_index = get_defining_class_index('bounding_func_batch')
+    if bounding_func_index is None or bounding_func_batch_index is None or \
+            bounding_func_index < bounding_func_batch_index:
+        return None
+    return optimizee.bounding_func_batch
+
+
 class Optimizer:
     """
     This is the base class for the Optimizers i.e. the outer loop algorithms. These algorithms generate parameters, \
@@ -22,6 +54,11 @@ class Optimizer:
         multi-dimensional). If some element is negative, the Optimizer minimizes that element of fitness instead of
         maximizing. By default, the `Optimizer` maximizes all fitness dimensions.
 
+    :param optimizee_bounding_func: A function which when called with an Individual-Dict returns the bounded
+        Individual-Dict. If this is the `bounding_func` method of an optimizee which also implements
+        :meth:`~l2l.optimizees.optimizee.Optimizee.bounding_func_batch` (in the same class as `bounding_func`, or in a
+        subclass), the batched version is used to bound whole populations at once (see :meth:`._bound_population`)
+
     :param parameters: A named tuple containing the parameters for the Optimizer class
 
     """
@@ -39,6 +76,8 @@ class Optimizer:
         self.optimizee_create_individual = optimizee_create_individual
         self.optimizee_fitness_weights = optimizee_fitness_weights
         self.optimizee_bounding_func = optimizee_bounding_func
+        # The batched bounding function is looked up on the optimizee the bounding function belongs to
+        self.optimizee_bounding_func_batch = _get_bounding_func_batch(optimizee_bounding_func)
         self.parameters = parameters
 
         #: The current generation number
@@ -46,6 +85,10 @@ class Optimizer:
         #: The population (i.e. list of individuals) to be evaluated at the next iteration
         self.eval_pop = None
 
+        # State of the ask/tell interface, which drives `post_process` with this trajectory
+        self._ask_tell_traj = traj
+        self._ask_tell_state = None
+
     def post_process(self, traj, fitnesses_results):
         """
         This is the key function of this class. Given a set of :obj:`fitnesses_results`,  and the :obj:`traj`, it uses
@@ -67,6 +110,95 @@ class Optimizer:
         self.g += 1
         self._expand_trajectory(traj)
 
+    def ask(self, n_individuals=None):
+        """
+        Returns individuals to evaluate. Together with :meth:`.tell`, this allows driving the optimizer without
+        :meth:`~l2l.utils.environment.Environment.run`, e.g. with
+        :meth:`~l2l.utils.environment.Environment.run_asynchronously`, an external scheduler or from within another
+        program.
+
+        This implementation adapts the generational :meth:`.post_process`: It hands out the individuals of the current
+        generation (i.e. of :attr:`.Optimizer.eval_pop`). Once all of them have been handed out, it returns an empty
+        list until all their fitnesses have been passed to :meth:`.tell`. It returns an empty list as well after
+        `n_iteration` generations, or once :meth:`.post_process` did not create a new generation (e.g. because the
+        stop criterion was reached).
+
+        :param n_individuals: (Optional) The maximum number of individuals to return. By default all the individuals
+            that are available
+
+        :return: List of Individual-Dicts
+        """
+        state = self._get_ask_tell_state()
+        if state['finished']:
+            return []
+        n_handed_out = state['n_handed_out']
+        n_available = len(self.eval_pop) - n_handed_out
+        if n_individuals is not None:
+            n_available = min(n_available, n_individuals)
+        state['n_handed_out'] += n_available
+        return self.eval_pop[n_handed_out:n_handed_out + n_available]
+
+    def tell(self, individuals, fitnesses):
+        """
+        Passes the fitnesses of evaluated individuals to the optimizer. This may be called with any part of the
+        individuals returned by :meth:`.ask`, in any order.
+
+        This implementation collects the fitnesses of the current generation, and calls :meth:`.post_process` once the
+        fitnesses of all its individuals are known, as :meth:`~l2l.utils.environment.Environment.run` does.
+
+        :param individuals: List of Individual-Dicts, as returned by :meth:`.ask`
+        :param fitnesses: The fitness (vector) of each individual, as returned by the optimizee
+        """
+        state = self._get_ask_tell_state()
+        for individual, fitness in zip(individuals, fitnesses):
+            state['fitnesses'][self._get_eval_pop_index(individual, state)] = fitness
+
+        if len(state['fitnesses']) == len(self.eval_pop):
+            traj = self._ask_tell_traj
+            results = [(ind_idx, state['fitnesses'][ind_idx]) for ind_idx in range(len(self.eval_pop))]
+            traj.results.f_add_result_to_group("all_results", self.g, results)
+            traj.current_results = results
+            generation = self.g
+            self.post_process(traj, list(results))
+
+            n_generations = state['n_generations'] + 1
+            self._ask_tell_state = None
+            state = self._get_ask_tell_state()
+            state['n_generations'] = n_generations
+            state['finished'] = self.g == generation or n_generations >= traj.par['n_iteration']
+
+    def _get_ask_tell_state(self):
+        """
+        :return: The state of the ask/tell interface for the current generation, i.e. the number of individuals handed
+            out, the fitnesses received (by index in `eval_pop`) and the indices of the individuals without fitness (by
+            id of the individual)
+        """
+        if self._ask_tell_state is None:
+            untold_indices = {}
+            for ind_idx, individual in enumerate(self.eval_pop):
+                untold_indices.setdefault(id(individual), []).append(ind_idx)
+            self._ask_tell_state = {'n_handed_out': 0, 'fitnesses': {}, 'untold_indices': untold_indices,
+                                    'n_generations': 0, 'finished': False}
+        return self._ask_tell_state
+
+    def _get_eval_pop_index(self, individual, state):
+        """
+        :return: The index in `eval_pop` of an individual of the current generation without fitness. Individuals are
+            found by identity, or else by their values (e.g. if they were copied to another process)
+        """
+        untold_indices = state['untold_indices']
+        indices = untold_indices.get(id(individual))
+        if not indices:
+            indices = next((indices for indices in untold_indices.values()
+                            if _individuals_equal(self.eval_pop[indices[0]], individual)), None)
+        if not indices:
+            raise ValueError("The individual {} is not an individual of the current generation without fitness".format(
+                individual))
+        ind_idx = indices.pop(0)
+        if not indices:
+            del untold_indices[id(self.eval_pop[ind_idx])]
+        return ind_idx
+
     def end(self, traj):
         """
         Run any code required to clean-up, print final individuals etc.
@@ -78,6 +210,31 @@ class Optimizer:
         """
         pass
 
+    def _bound_population(self, population):
+        """
+        Applies the bounding function of the optimizee to a whole population. If the optimizee implements
+        :meth:`~l2l.optimizees.optimizee.Optimizee.bounding_func_batch`, the population is bounded in a single call.
+        Otherwise every row is converted to an Individual-Dict (using `self.optimizee_individual_dict_spec`), bounded
+        via `optimizee_bounding_func` and converted back.
+
+        :param population: Array (or list of lists) of shape (n_individuals, n_parameters), with one flattened
+            individual per row
+
+        :return: An :class:`~numpy.ndarray` of shape (n_individuals, n_parameters) containing the bounded population
+        """
+        population = np.asarray(population)
+        if self.optimizee_bounding_func_batch is not None:
+            try:
+                return np.asarray(self.optimizee_bounding_func_batch(population))
+            except NotImplementedError:
+                # Fall back to the per-individual path from now on
+                self.optimizee_bounding_func_batch = None
+        if self.optimizee_bounding_func is None:
+            return population
+        bounded_individuals = [self.optimizee_bounding_func(list_to_dict(ind, self.optimizee_individual_dict_spec))
+                               for ind in population]
+        return np.array([dict_to_list(ind) for ind in bounded_individuals])
+
     def _expand_trajectory(self, traj):
         """
         Add as many explored runs as individuals that need to be evaluated. Furthermore, add the individuals as explored
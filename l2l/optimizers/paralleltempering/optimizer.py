@@ -1,6 +1,5 @@
 
 import logging
-import random
 from collections import namedtuple
 
 import numpy as np
@@ -113,22 +112,26 @@ class ParallelTemperingOptimizer(Optimizer):
     on it. 
     
     Note: For simplicity sake, not the positions, but the temperature and
-    the schedule are swapped, which ammounts to the exact same. The 
-    temperature and the schedules are each stored in lists, which are both 
-    indexed by 'compare_indices'. If the swap criterion between two schedules
-    are met, the respective entries for 'compare_indices' are swapped.
+    the schedule are swapped, which ammounts to the exact same. The
+    temperatures, decay parameters and bounds of the schedules are stored in
+    arrays, which are indexed by 'parallel_indices' (the schedule of each
+    parallel run). If the swap criterion between two parallel runs is met,
+    their entries of 'parallel_indices' are swapped.
     To get the parallel runs, 'n_parallel_runs" is used - each individual 
-    is one of the parallel runs..
+    is one of the parallel runs. The fitnesses and individuals of the parallel
+    runs are stored in arrays as well, so that all runs are updated at once.
     
     The algorithm does:
 
-    For n iterations and each cooling schedule do:
-        - Take a step of size noisy step in a random direction
+    For n iterations do:
+        - Cool the temperatures of all cooling schedules
+        - For each parallel run, take a step of size noisy step in a random direction
         - If it reduces the cost, keep the solution
         - Otherwise keep with probability exp(- (f_new - f) / T)
-        - Swap positions between two randomly chosen schedules 
-          with probability exp(-((f_1 - f_2) * (1 / (k * T_1) - 1 / (k * T_2)))) with k being a constant
-        
+        - Swap the schedules between pairs of parallel runs with adjacent temperatures (alternately starting from the
+          lowest and the second lowest temperature) with probability
+          exp(-|(f_1 - f_2) * (1 / (k * T_1) - 1 / (k * T_2))|) with k being a constant
+
     NOTE: This expects all parameters of the system to be of floating point
 
     :param  ~l2l.utils.trajectory.Trajectory traj:
@@ -190,53 +193,56 @@ class ParallelTemperingOptimizer(Optimizer):
         traj.f_add_parameter('cooling_schedules', cooling_schedules_string,
                              comment='The used cooling schedule')
 
+        self.random_state = np.random.RandomState(parameters.seed)
+
         _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
 
-        # Note that this array stores individuals as an np.array of floats as opposed to Individual-Dicts
-        # This is because this array is used within the context of the simulated annealing algorithm and
-        # Thus needs to handle the optimizee individuals as vectors
-        self.current_individual_list = [np.array(dict_to_list(self.optimizee_create_individual()))
-                                        for _ in range(parameters.n_parallel_runs)]
+        # Note that this array stores individuals as an np.array of floats (one row per parallel run) as opposed to
+        # Individual-Dicts. This is because this array is used within the context of the simulated annealing
+        # algorithm and Thus needs to handle the optimizee individuals as vectors
+        self.current_individuals = np.array([dict_to_list(self.optimizee_create_individual())
+                                             for _ in range(parameters.n_parallel_runs)])
 
         traj.f_add_result('fitnesses', [], comment='Fitnesses of all individuals')
 
-        self.T_all = parameters.temperature_bounds[:,0]  # Initialize temperature
-        self.T = 1
+        n_parallel_runs = parameters.n_parallel_runs
         self.g = 0  # the current generation
-        self.cooling_schedules = parameters.cooling_schedules
-        self.decay_parameters = parameters.decay_parameters
-        self.temperature_bounds = parameters.temperature_bounds
+        self.cooling_schedules = parameters.cooling_schedules[:n_parallel_runs]
+        self.decay_parameters = np.asarray(parameters.decay_parameters, dtype=float)[:n_parallel_runs]
+        self.temperature_bounds = np.asarray(parameters.temperature_bounds, dtype=float)[:n_parallel_runs]
+        self.T_all = self.temperature_bounds[:, 0].copy()  # Initialize temperature
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
-        self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
+        self.current_fitness_values = np.full(n_parallel_runs, -np.inf)
 
-        new_individual_list = [
-            list_to_dict(ind_as_list + np.random.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step,
-                         self.optimizee_individual_dict_spec)
-            for ind_as_list in self.current_individual_list
-        ]
-        if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
+        new_individual_arr = self._bound_population(
+            self.current_individuals +
+            self.random_state.normal(0.0, parameters.noisy_step, self.current_individuals.shape) * traj.noisy_step)
 
-        self.eval_pop = new_individual_list
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in new_individual_arr]
         self._expand_trajectory(traj)
         
-        #initialize container for the indices of the parallel runs
-        self.parallel_indices = []
-        for i in range(0,traj.n_parallel_runs):
-            self.parallel_indices.append(i)
+        # initialize container for the indices of the schedules of the parallel runs
+        self.parallel_indices = np.arange(n_parallel_runs)
         
         self.available_cooling_schedules = AvailableCoolingSchedules
         
         # assert if all cooling schedules are among the known cooling schedules
-        schedule_known = True  # start off as True - if any schdule is unknown gets False
-        for i in range(np.size(self.cooling_schedules)):
-            schedule_known = schedule_known and self.cooling_schedules[i] in AvailableCoolingSchedules
+        schedule_known = all(cooling_schedule in AvailableCoolingSchedules
+                             for cooling_schedule in self.cooling_schedules)
         
         assert schedule_known, print("Warning: Unknown cooling schedule")
+
+        # The indices of the schedules of each cooling schedule type, which are cooled together
+        self.schedule_groups = {}
+        for i, cooling_schedule in enumerate(self.cooling_schedules):
+            self.schedule_groups.setdefault(cooling_schedule, []).append(i)
         
     def cooling(self,temperature, cooling_schedule, decay_parameter, temperature_bounds, steps_total):        
-        
-        T0, temperature_end = temperature_bounds
+        """
+        Cools the temperatures of schedules of the same type. `temperature` and `decay_parameter` can be arrays (one
+        entry per schedule), with `temperature_bounds` of shape (n_schedules, 2)
+        """
+        T0, temperature_end = np.transpose(temperature_bounds)
         
         k = self.g + 1        
         if cooling_schedule == AvailableCoolingSchedules.DEFAULT:
@@ -268,16 +274,13 @@ class ParallelTemperingOptimizer(Optimizer):
         return -1
 
     # get tthe transistion probability between two simulated annealing systems with
-    # tempereatures T and energies E
+    # tempereatures T and energies E (scalars or arrays)
     def metropolis_hasting(self,E1,E2,T1,T2):
         # k = 1.387 * (10 ** -23)  # boltzmann konstant
         # Note: do not use real Blotzmann kosntant, because both energies and temperatures are divorced from any real physical representation
         k = 5
         p = np.exp(-np.abs((E1 - E2) * (1 / (k * T1) - 1 / (k * T2))))
-        if p < 1:
-            return p
-            
-        return 1
+        return np.minimum(p, 1)
         
     def post_process(self, traj, fitnesses_results):
         """
@@ -285,82 +288,70 @@ class ParallelTemperingOptimizer(Optimizer):
         """
         noisy_step, n_iteration, stop_criterion = \
             traj.noisy_step, traj.n_iteration, traj.stop_criterion
-        cooling_schedules = self.cooling_schedules
-        decay_parameters = self.decay_parameters
-        temperature_bounds = self.temperature_bounds
         old_eval_pop = self.eval_pop.copy()
         self.eval_pop.clear()
-        temperature = self.T_all
-        for i in range(0,traj.n_parallel_runs):
-            self.T_all[self.parallel_indices[i]] = self.cooling(temperature[self.parallel_indices[i]], cooling_schedules[self.parallel_indices[i]], decay_parameters[self.parallel_indices[i]], temperature_bounds[self.parallel_indices[i],:], n_iteration)
+        for cooling_schedule, schedule_indices in self.schedule_groups.items():
+            self.T_all[schedule_indices] = self.cooling(self.T_all[schedule_indices], cooling_schedule,
+                                                        self.decay_parameters[schedule_indices],
+                                                        self.temperature_bounds[schedule_indices], n_iteration)
         logger.info("  Evaluating %i individuals" % len(fitnesses_results))
   
         assert len(fitnesses_results) == traj.n_parallel_runs
-        weighted_fitness_list = []
-        for i, (run_index, fitness) in enumerate(fitnesses_results):
-            
-            self.T = self.T_all[self.parallel_indices[i]]
-
-            weighted_fitness = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
-            weighted_fitness_list.append(weighted_fitness)
-
+        weighted_fitnesses = np.zeros(traj.n_parallel_runs)
+        for run_index, fitness in fitnesses_results:
             # We need to convert the current run index into an ind_idx
             # (index of individual within one generation)
             traj.v_idx = run_index
             ind_index = traj.par.ind_idx
             individual = old_eval_pop[ind_index]
-
-            # Accept or reject the new solution
-            current_fitness_value_i = self.current_fitness_value_list[i]
-            r = np.random.rand()
-            p = np.exp((weighted_fitness - current_fitness_value_i) / self.T)
-
-            # Accept
-            if r < p or weighted_fitness >= current_fitness_value_i:
-                self.current_fitness_value_list[i] = weighted_fitness
-                self.current_individual_list[i] = np.array(dict_to_list(individual))
+            weighted_fitnesses[ind_index] = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
 
             traj.f_add_result('$set.$.individual', individual)
             # Watchout! if weighted fitness is a tuple/np array it should be converted to a list first here
-            traj.f_add_result('$set.$.fitness', weighted_fitness)
-
-            current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(current_individual + np.random.randn(current_individual.size) * noisy_step * self.T,
-                                          self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                new_individual = self.optimizee_bounding_func(new_individual)
+            traj.f_add_result('$set.$.fitness', weighted_fitnesses[ind_index])
+        traj.v_idx = -1  # set the trajectory back to default
 
-            logger.debug("Current best fitness for individual %d is %.2f. New individual is %s", 
-                         i, self.current_fitness_value_list[i], new_individual)
-            self.eval_pop.append(new_individual)
+        # The temperature of each parallel run
+        temperatures = self.T_all[self.parallel_indices]
+
+        # Accept or reject the new solutions
+        r = self.random_state.rand(traj.n_parallel_runs)
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            p = np.exp((weighted_fitnesses - self.current_fitness_values) / temperatures)
+        accepted = (r < p) | (weighted_fitnesses >= self.current_fitness_values)
+        self.current_fitness_values[accepted] = weighted_fitnesses[accepted]
+        self.current_individuals[accepted] = np.array([dict_to_list(ind) for ind in old_eval_pop])[accepted]
+        logger.debug("Current best fitness of the individuals is %s", self.current_fitness_values)
+
+        # The new individuals of all parallel runs are bounded together
+        new_individual_arr = self._bound_population(
+            self.current_individuals +
+            self.random_state.randn(*self.current_individuals.shape) * noisy_step * temperatures[:, np.newaxis])
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in new_individual_arr]
             
-        # the parallel tempering swapping starts here
-        for i in range(0,traj.n_parallel_runs):
-            
-            #make a random choice from all the other parallel runs
-            compare_indices = []
-            for j in range(0,traj.n_parallel_runs):
-                compare_indices.append(i)
-            compare_indices.remove(i)
-            random_choice = random.choice(compare_indices)
-            
-            #random variable with unit distribution betwwen 0 and 1
-            random_variable = np.random.rand() 
-            
-            #swap if criterion is met
-            if (self.metropolis_hasting(self.current_fitness_value_list[i], self.current_fitness_value_list[random_choice], self.T_all[i], self.T_all[random_choice]) > random_variable):
-                temp = self.parallel_indices[i]
-                self.parallel_indices[i] = self.parallel_indices[random_choice]
-                self.parallel_indices[random_choice] = temp
+        # the parallel tempering swapping starts here: The parallel runs are paired with the run of the next higher
+        # temperature, starting alternately from the lowest and the second lowest temperature
+        temperature_order = np.argsort(temperatures, kind='stable')
+        first, second = temperature_order[self.g % 2:-1:2], temperature_order[self.g % 2 + 1::2]
+
+        # random variable with unit distribution betwwen 0 and 1
+        random_variables = self.random_state.rand(len(first))
+
+        # swap if criterion is met
+        with np.errstate(divide='ignore', invalid='ignore'):
+            swapped = self.metropolis_hasting(self.current_fitness_values[first], self.current_fitness_values[second],
+                                              temperatures[first], temperatures[second]) > random_variables
+        first, second = first[swapped], second[swapped]
+        self.parallel_indices[first], self.parallel_indices[second] = \
+            self.parallel_indices[second], self.parallel_indices[first]
                 
-        logger.debug("Current best fitness within population is %.2f", max(self.current_fitness_value_list))
+        logger.debug("Current best fitness within population is %.2f", np.max(self.current_fitness_values))
 
-        traj.v_idx = -1  # set the trajectory back to default
         logger.info("-- End of generation {} --".format(self.g))
 
         # ------- Create the next generation by crossover and mutation -------- #
         # not necessary for the last generation
-        if self.g < n_iteration - 1 and stop_criterion > max(self.current_fitness_value_list):
+        if self.g < n_iteration - 1 and stop_criterion > np.max(self.current_fitness_values):
             fitnesses_results.clear()
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
@@ -370,9 +361,9 @@ class ParallelTemperingOptimizer(Optimizer):
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
         # ------------ Finished all runs and print result --------------- #
-        best_last_indiv_index = np.argmax(self.current_fitness_value_list)
-        best_last_indiv = self.current_individual_list[best_last_indiv_index]
-        best_last_fitness = self.current_fitness_value_list[best_last_indiv_index]
+        best_last_indiv_index = np.argmax(self.current_fitness_values)
+        best_last_indiv = self.current_individuals[best_last_indiv_index]
+        best_last_fitness = self.current_fitness_values[best_last_indiv_index]
 
         best_last_indiv_dict = list_to_dict(best_last_indiv.tolist(), self.optimizee_individual_dict_spec)
         traj.f_add_result('final_individual', best_last_indiv_dict)
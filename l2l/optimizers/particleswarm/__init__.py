@@ -0,0 +1,3 @@
+from .optimizer import ParticleSwarmOptimizer, ParticleSwarmParameters
+
+__all__ = ['ParticleSwarmOptimizer', 'ParticleSwarmParameters']
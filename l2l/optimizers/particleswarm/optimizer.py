@@ -0,0 +1,290 @@
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from l2l import dict_to_list, list_to_dict
+from l2l.optimizers.optimizer import Optimizer
+
+logger = logging.getLogger("optimizers.particleswarm")
+
+ParticleSwarmParameters = namedtuple('ParticleSwarmParameters', [
+    'pop_size',
+    'inertia',
+    'cognitive_coefficient',
+    'social_coefficient',
+    'n_iteration',
+    'stop_criterion',
+    'seed',
+    'topology',
+    'neighbourhood_size',
+    'max_velocity',
+], defaults=('global', 1, None))
+
+ParticleSwarmParameters.__doc__ = """
+:param pop_size: Number of particles in the swarm
+:param inertia: Inertia weight w of the velocity, typically in [0.4, 0.9]
+:param cognitive_coefficient: Acceleration coefficient c1 towards the personal best position of a particle
+:param social_coefficient: Acceleration coefficient c2 towards the best position in the neighbourhood of a particle
+:param n_iteration: Number of iterations to perform
+:param stop_criterion: (Optional) Stop if this fitness is reached.
+:param seed: The random seed used for generating new individuals
+:param topology: (Optional) Either 'global', where the neighbourhood of each particle is the whole swarm (the default),
+    or 'ring', where it consists of the `neighbourhood_size` particles on either side of the particle. The ring topology
+    converges more slowly, but is less prone to premature convergence on multimodal problems
+:param neighbourhood_size: (Optional) Number of neighbours on either side of a particle in the ring topology. Default
+    is 1
+:param max_velocity: (Optional) If given, each component of the velocities is clipped to [-max_velocity,
+    max_velocity]. Default is None
+"""
+
+TOPOLOGIES = ('global', 'ring')
+
+
+class ParticleSwarmOptimizer(Optimizer):
+    """
+    Class implementing particle swarm optimization with inertia weight as described in:
+
+    Kennedy, J., & Eberhart, R. (1995). Particle swarm optimization. In Proceedings of ICNN'95 - International
+    Conference on Neural Networks (Vol. 4, pp. 1942-1948).
+
+    Shi, Y., & Eberhart, R. (1998). A modified particle swarm optimizer. In 1998 IEEE international conference on
+    evolutionary computation proceedings (pp. 69-73).
+
+    In the pseudo code the algorithm does:
+
+    For n iterations do:
+      - Evaluate the positions x_i of all particles, and update the personal best positions p_i and the best
+        positions g_i in the neighbourhood of each particle
+      - Update the velocities and positions of all particles as
+
+            v_i <- w * v_i + c1 * r1 * (p_i - x_i) + c2 * r2 * (g_i - x_i)
+            x_i <- x_i + v_i
+
+        where r1 and r2 are vectors of uniform random numbers in [0, 1)
+
+    The positions, velocities, personal bests and neighbourhood bests of the swarm are stored as (pop_size x d) arrays,
+    and are updated for the whole swarm in a single vectorised step. The positions are bounded with the (batched)
+    bounding function of the optimizee, and the velocities are set to the displacement actually performed, so that
+    particles do not keep accelerating into the bounds.
+
+    :param  ~l2l.utils.trajectory.Trajectory traj:
+      Use this trajectory to store the parameters of the specific runs. The parameters should be
+      initialized based on the values in `parameters`
+
+    :param optimizee_create_individual:
+      Function that creates a new individual. All parameters of the Individual-Dict returned should be
+      of numpy.float64 type
+
+    :param optimizee_fitness_weights:
+      Fitness weights. The fitness returned by the Optimizee is multiplied by these values (one for each
+      element of the fitness vector)
+
+    :param parameters:
+      Instance of :func:`~collections.namedtuple` :class:`.ParticleSwarmParameters` containing the
+      parameters needed by the Optimizer
+
+    :param optimizee_bounding_func:
+      This is a function that takes an individual as argument and returns another individual that is
+      within bounds (The bounds are defined by the function itself)
+    """
+
+    def __init__(self,
+                 traj,
+                 optimizee_create_individual,
+                 optimizee_fitness_weights,
+                 parameters,
+                 optimizee_bounding_func=None):
+
+        super().__init__(
+            traj,
+            optimizee_create_individual=optimizee_create_individual,
+            optimizee_fitness_weights=optimizee_fitness_weights,
+            parameters=parameters,
+            optimizee_bounding_func=optimizee_bounding_func)
+
+        if parameters.pop_size < 2:
+            raise ValueError("pop_size needs to be greater than 1")
+        if parameters.topology not in TOPOLOGIES:
+            raise ValueError("Unknown topology '{}', expected one of {}".format(parameters.topology, TOPOLOGIES))
+        if parameters.topology == 'ring' and not 1 <= parameters.neighbourhood_size < parameters.pop_size:
+            raise ValueError("neighbourhood_size needs to be in [1, pop_size)")
+
+        # The following parameters are recorded
+        traj.f_add_parameter('pop_size', parameters.pop_size, comment='Number of particles')
+        traj.f_add_parameter('inertia', parameters.inertia, comment='Inertia weight of the velocity')
+        traj.f_add_parameter('cognitive_coefficient', parameters.cognitive_coefficient,
+                             comment='Acceleration towards the personal best position')
+        traj.f_add_parameter('social_coefficient', parameters.social_coefficient,
+                             comment='Acceleration towards the neighbourhood best position')
+        traj.f_add_parameter('n_iteration', parameters.n_iteration, comment='Number of iterations to run')
+        traj.f_add_parameter(
+            'stop_criterion', parameters.stop_criterion, comment='Stop if best individual reaches this fitness')
+        traj.f_add_parameter(
+            'seed', np.uint32(parameters.seed), comment='Seed used for random number generation in optimizer')
+        traj.f_add_parameter('topology', parameters.topology, comment='Neighbourhood topology of the swarm')
+        traj.f_add_parameter('neighbourhood_size', parameters.neighbourhood_size,
+                             comment='Number of neighbours on either side in the ring topology')
+        # NOTE: The maximal velocity is optional and not stored in the trajectory, as None can not be stored there
+        self.max_velocity = parameters.max_velocity
+
+        self.random_state = np.random.RandomState(traj.parameters.seed)
+
+        _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
+
+        # Added a generation-wise parameter logging
+        traj.results.f_add_result_group(
+            'generation_params',
+            comment='This contains the optimizer parameters that are'
+                    ' common across a generation')
+
+        # The following parameters are recorded as generation parameters i.e. once per generation
+        self.g = 0  # the current generation
+        self.best_fitness = -np.inf
+        self.best_individual = None
+
+        # State of the swarm. The initial velocities point halfway to a second random individual
+        self.positions = self._bound_population(
+            [dict_to_list(self.optimizee_create_individual()) for _ in range(parameters.pop_size)]).astype(float)
+        other_positions = np.array([dict_to_list(self.optimizee_create_individual())
+                                    for _ in range(parameters.pop_size)], dtype=float)
+        self.velocities = self._clip_velocities((other_positions - self.positions) / 2.)
+        self.personal_best_positions = self.positions.copy()
+        self.personal_best_fitness = np.full(parameters.pop_size, -np.inf)
+
+        self._set_eval_pop()
+
+        self._expand_trajectory(traj)
+
+    def _set_eval_pop(self):
+        """
+        Fills `eval_pop` with the current positions of the particles
+        """
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in self.positions]
+
+    def _clip_velocities(self, velocities):
+        if self.max_velocity is None:
+            return velocities
+        return np.clip(velocities, -self.max_velocity, self.max_velocity)
+
+    def _get_neighbourhood_best_indices(self, traj):
+        """
+        :return: For each particle, the index of the particle with the best personal best fitness in its neighbourhood
+        """
+        pop_size = len(self.personal_best_fitness)
+        if traj.topology == 'global':
+            return np.full(pop_size, np.argmax(self.personal_best_fitness))
+        # Candidate indices of shape (2 * neighbourhood_size + 1, pop_size), one row per offset in the ring
+        offsets = np.arange(-traj.neighbourhood_size, traj.neighbourhood_size + 1)
+        candidates = (np.arange(pop_size) + offsets[:, np.newaxis]) % pop_size
+        best_offsets = np.argmax(self.personal_best_fitness[candidates], axis=0)
+        return candidates[best_offsets, np.arange(pop_size)]
+
+    def post_process(self, traj, fitnesses_results):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
+        """
+        n_iteration, stop_criterion = traj.n_iteration, traj.stop_criterion
+
+        weighted_fitness_list = np.empty(len(self.eval_pop))
+        # **************************************************************************************************************
+        # Storing run-information in the trajectory
+        # Reading fitnesses and performing distribution update
+        # **************************************************************************************************************
+        for run_index, fitness in fitnesses_results:
+            # We need to convert the current run index into an ind_idx
+            # (index of individual within one generation)
+            traj.v_idx = run_index
+            ind_index = traj.par.ind_idx
+
+            traj.f_add_result('$set.$.individual', self.eval_pop[ind_index])
+            traj.f_add_result('$set.$.fitness', fitness)
+
+            weighted_fitness_list[ind_index] = np.dot(fitness, self.optimizee_fitness_weights)
+        traj.v_idx = -1  # set trajectory back to default
+
+        # NOTE: It is necessary to clear the finesses_results to clear the data in the reference, and del
+        # is used to make sure it's not used in the rest of this function
+        fitnesses_results.clear()
+        del fitnesses_results
+
+        # Update the personal bests
+        improved_mask = weighted_fitness_list > self.personal_best_fitness
+        self.personal_best_positions[improved_mask] = self.positions[improved_mask]
+        self.personal_best_fitness[improved_mask] = weighted_fitness_list[improved_mask]
+
+        best_index = np.argmax(self.personal_best_fitness)
+        if self.personal_best_fitness[best_index] > self.best_fitness:
+            self.best_fitness = self.personal_best_fitness[best_index]
+            self.best_individual = list_to_dict(self.personal_best_positions[best_index],
+                                                self.optimizee_individual_dict_spec)
+
+        logger.info("-- End of generation %d --", self.g)
+        logger.info("  Evaluated %d individuals", len(weighted_fitness_list))
+        logger.info("  Improved %d personal bests", int(np.sum(improved_mask)))
+        logger.info('  Best Fitness: %.4f', self.best_fitness)
+        logger.info('  Average Fitness: %.4f', np.mean(weighted_fitness_list))
+
+        # **************************************************************************************************************
+        # Storing Generation Parameters / Results in the trajectory
+        # **************************************************************************************************************
+        # These entries correspond to the generation that has been simulated prior to this post-processing run
+
+        # Documentation of algorithm parameters for the current generation
+        #
+        # generation             - The index of the evaluated generation
+        # best_fitness_in_run    - The highest fitness among the particles in the evaluated generation
+        # average_fitness_in_run - The mean fitness of the particles in the evaluated generation
+        # mean_speed             - The mean norm of the velocities of the particles
+        generation_result_dict = {
+            'generation': self.g,
+            'best_fitness_in_run': np.max(weighted_fitness_list),
+            'average_fitness_in_run': np.mean(weighted_fitness_list),
+            'mean_speed': np.mean(np.linalg.norm(self.velocities, axis=1)),
+        }
+
+        generation_name = 'generation_{}'.format(self.g)
+        traj.results.generation_params.f_add_result_group(generation_name)
+        traj.results.generation_params.f_add_result(
+            generation_name + '.algorithm_params',
+            generation_result_dict,
+            comment="These are the parameters that correspond to the algorithm. "
+                    "Look at the source code for `ParticleSwarmOptimizer::post_process()` "
+                    "for comments documenting these parameters"
+        )
+
+        # **************************************************************************************************************
+        # Move the swarm
+        # **************************************************************************************************************
+        # Note that this is only done in case the evaluated run is not the last run
+
+        self.eval_pop.clear()
+
+        # check if to stop
+        if self.g < n_iteration - 1 and self.best_fitness < stop_criterion:
+            neighbourhood_best_positions = self.personal_best_positions[self._get_neighbourhood_best_indices(traj)]
+            r_cognitive = self.random_state.rand(*self.positions.shape)
+            r_social = self.random_state.rand(*self.positions.shape)
+            velocities = traj.inertia * self.velocities + \
+                traj.cognitive_coefficient * r_cognitive * (self.personal_best_positions - self.positions) + \
+                traj.social_coefficient * r_social * (neighbourhood_best_positions - self.positions)
+            velocities = self._clip_velocities(velocities)
+
+            new_positions = self._bound_population(self.positions + velocities)
+            self.velocities = new_positions - self.positions
+            self.positions = new_positions
+            self._set_eval_pop()
+
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
+
+    def end(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
+        """
+        traj.f_add_result('final_individual', self.best_individual)
+        traj.f_add_result('final_fitness', self.best_fitness)
+        traj.f_add_result('n_iteration', self.g + 1)
+
+        # ------------ Finished all runs and print result --------------- #
+        logger.info("-- End of (successful) particle swarm optimization --")
@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+
+from l2l import list_to_dict
+
+
+class NoiseTable:
+    """
+    A large pre-generated table of standard normal noise, from which noise vectors are taken as slices at random
+    offsets. Sampling a noise vector then only requires drawing an offset instead of generating `dimension` random
+    numbers.
+
+    The table is stored as float32 .npy file and opened as read-only memory map. When pickled, only the file path is
+    stored, so that the optimizees (and all the processes on a node) share the same pages of the table.
+
+    :param file_path: Path of the .npy file of the table, e.g. in :attr:`~l2l.paths.Paths.data_path`. If the file
+        does not exist, it is created with the given `size` and `seed`, otherwise the existing table is used
+    :param size: Number of noise values in the table. It must be at least the dimension of the individuals
+    :param seed: Seed used to generate the table
+    """
+
+    def __init__(self, file_path, size=2 ** 25, seed=42):
+        self.file_path = file_path
+        if not os.path.isfile(file_path):
+            self._create(file_path, size, seed)
+        self.noise = np.load(file_path, mmap_mode='r')
+
+    def __getstate__(self):
+        return {'file_path': self.file_path}
+
+    def __setstate__(self, state):
+        self.file_path = state['file_path']
+        self.noise = np.load(self.file_path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.noise)
+
+    @staticmethod
+    def _create(file_path, size, seed, chunk_size=2 ** 20):
+        random_state = np.random.RandomState(seed)
+        # Written to a temporary file first, so that concurrent readers never see a partially written table
+        tmp_file_path = '{}.tmp-{}'.format(file_path, os.getpid())
+        noise = np.lib.format.open_memmap(tmp_file_path, mode='w+', dtype=np.float32, shape=(size,))
+        for start in range(0, size, chunk_size):
+            end = min(start + chunk_size, size)
+            noise[start:end] = random_state.randn(end - start)
+        noise.flush()
+        del noise
+        os.replace(tmp_file_path, file_path)
+
+    def sample_offsets(self, random_state, n_offsets, dimension):
+        """
+        :return: `n_offsets` random offsets of noise vectors of the given dimension
+        """
+        if dimension > len(self):
+            raise ValueError("The noise table of size {} is smaller than the dimension {}".format(len(self), dimension))
+        return random_state.randint(0, len(self) - dimension + 1, size=n_offsets)
+
+    def get(self, offset, dimension):
+        """
+        :return: The (read-only) noise vector of the given dimension at `offset`
+        """
+        return self.noise[offset:offset + dimension]
+
+    def get_batch(self, offsets, dimension):
+        """
+        :return: Array of shape (len(offsets), dimension) containing the noise vectors at `offsets`
+        """
+        return np.stack([self.get(offset, dimension) for offset in offsets])
+
+
+class SeededPerturbationEncoding:
+    """
+    Compact description of the individuals of one generation of a Gaussian perturbation based optimizer (e.g. ES and
+    NES). Each individual is
+
+        mean + sign * scale * noise(seed)
+
+    where `noise(seed)` is a standard normal vector generated from the seed (or, if a :class:`.NoiseTable` is used,
+    the slice of the noise table at the offset `seed`). Only the seed and the sign are stored with
+    each individual (as the parameters `noise_seed` and `noise_sign`), while this object is stored once as the
+    parameter `encoding` and shared by all the individuals of the generation. An individual with sign 0 is the mean
+    itself. The parameters of the optimizee are reconstructed from the seed and the sign when they are accessed (see
+    :class:`~l2l.utils.individual.Individual`), so that the amount of data sent per individual does not depend on the
+    dimension of the individual.
+
+    :param mean: The flattened mean individual
+    :param scale: Standard deviation of the perturbations, either a scalar or an array of the shape of `mean`
+    :param dict_spec: The dict spec (see :func:`~l2l.dict_to_list`) of the Individual-Dicts of the optimizee
+    :param dtype: Floating point type of the decoded individuals
+    :param bounding_func: (Optional) Bounding function of the optimizee, applied to the decoded Individual-Dicts. Note
+        that it is sent along with the encoding, so it should be cheap to pickle
+    :param noise_table: (Optional) :class:`.NoiseTable` the noise is taken from, in which case the seeds are offsets
+        into the table
+    """
+
+    def __init__(self, mean, scale, dict_spec, dtype=np.float64, bounding_func=None, noise_table=None):
+        self.dtype = np.dtype(dtype)
+        self.mean = np.array(mean, dtype=self.dtype)
+        self.scale = np.array(scale, dtype=self.dtype)
+        self.dict_spec = dict_spec
+        self.bounding_func = bounding_func
+        self.noise_table = noise_table
+        self._last_decoded = (None, None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_last_decoded'] = (None, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def get_noise(self, seed):
+        """
+        :return: The standard normal noise vector (of the shape of the mean) generated from `seed`
+        """
+        if self.noise_table is not None:
+            return self.noise_table.get(seed, self.mean.size).reshape(self.mean.shape).astype(self.dtype, copy=False)
+        return np.random.RandomState(seed).randn(*self.mean.shape).astype(self.dtype, copy=False)
+
+    def decode(self, seed, sign):
+        """
+        :return: The flattened (unbounded) individual described by `seed` and `sign`
+        """
+        if sign == 0:
+            return self.mean.copy()
+        return self.mean + sign * self.scale * self.get_noise(seed)
+
+    def decode_individual(self, seed, sign):
+        """
+        :return: The (bounded) Individual-Dict described by `seed` and `sign`
+        """
+        last_key, last_individual = self._last_decoded
+        if last_key == (seed, sign):
+            return last_individual
+        individual = list_to_dict(self.decode(seed, sign), self.dict_spec)
+        if self.bounding_func is not None:
+            individual = self.bounding_func(individual)
+        self._last_decoded = ((seed, sign), individual)
+        return individual
+
+    def encode(self, seed, sign):
+        """
+        :return: The (compact) Individual-Dict describing the individual `mean + sign * scale * noise(seed)`
+        """
+        return {'encoding': self, 'noise_seed': seed, 'noise_sign': sign}
+
+    def get_weighted_noise_sums(self, seeds, coefficients, squared_coefficients=None):
+        """
+        Regenerates the noise of all seeds and returns `sum_i coefficients[i] * noise(seeds[i])`, without materialising
+        the noise matrix. Coefficients of repeated seeds (e.g. of mirrored samples) are combined first, so that the
+        noise of each seed is only generated once.
+
+        :param seeds: The seeds of the noise vectors
+        :param coefficients: The coefficient of each noise vector
+        :param squared_coefficients: (Optional) If given, `sum_i squared_coefficients[i] * noise(seeds[i]) ** 2` is
+            computed as well
+
+        :return: Tuple of the weighted sum of the noise vectors and the weighted sum of the squared noise vectors (which
+            is zero unless `squared_coefficients` is given)
+        """
+        if squared_coefficients is None:
+            squared_coefficients = np.zeros(len(seeds))
+        combined_coefficients = {}
+        for seed, coefficient, squared_coefficient in zip(seeds, coefficients, squared_coefficients):
+            linear_sum, squared_sum = combined_coefficients.get(seed, (0., 0.))
+            combined_coefficients[seed] = (linear_sum + coefficient, squared_sum + squared_coefficient)
+
+        weighted_sum = np.zeros(self.mean.shape)
+        weighted_squared_sum = np.zeros(self.mean.shape)
+        for seed, (coefficient, squared_coefficient) in combined_coefficients.items():
+            noise = self.get_noise(seed)
+            weighted_sum += coefficient * noise
+            if squared_coefficient != 0.:
+                weighted_squared_sum += squared_coefficient * noise ** 2
+        return weighted_sum, weighted_squared_sum
@@ -152,16 +152,12 @@ class SimulatedAnnealingOptimizer(Optimizer):
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
         self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
 
-        new_individual_list = [
-            list_to_dict(
-                ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
+        new_individual_arr = self._bound_population([
+            ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T
             for ind_as_list in self.current_individual_list
-        ]
-        if optimizee_bounding_func is not None:
-            new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
+        ])
 
-        self.eval_pop = new_individual_list
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in new_individual_arr]
         self._expand_trajectory(traj)
         
         self.cooling_schedule = parameters.cooling_schedule
@@ -217,6 +213,7 @@ class SimulatedAnnealingOptimizer(Optimizer):
 
         assert len(fitnesses_results) == traj.n_parallel_runs
         weighted_fitness_list = []
+        new_individual_arr = []
         for i, (run_index, fitness) in enumerate(fitnesses_results):
 
             weighted_fitness = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
@@ -243,15 +240,14 @@ class SimulatedAnnealingOptimizer(Optimizer):
             traj.f_add_result('$set.$.fitness', weighted_fitness)
 
             current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(
-                current_individual + self.random_state.randn(current_individual.size) * noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                new_individual = self.optimizee_bounding_func(new_individual)
-
-            logger.debug("Current best fitness for individual %d is %.2f. New individual is %s",
-                         i, self.current_fitness_value_list[i], new_individual)
-            self.eval_pop.append(new_individual)
+            new_individual_arr.append(
+                current_individual + self.random_state.randn(current_individual.size) * noisy_step * self.T)
+
+            logger.debug("Current best fitness for individual %d is %.2f", i, self.current_fitness_value_list[i])
+
+        # The new individuals of all parallel runs are bounded together
+        new_individual_arr = self._bound_population(new_individual_arr)
+        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in new_individual_arr]
 
         logger.debug("Current best fitness within population is %.2f", max(self.current_fitness_value_list))
 
@@ -3,11 +3,21 @@ import unittest
 
 from l2l.tests import test_ce_optimizer
 from l2l.tests import test_ga_optimizer
+from l2l.tests import test_numpy_ga_optimizer
 from l2l.tests import test_sa_optimizer
 from l2l.tests import test_gd_optimizer
+from l2l.tests import test_cmaes_optimizer
+from l2l.tests import test_de_optimizer
+from l2l.tests import test_pso_optimizer
 from l2l.tests import test_innerloop
 from l2l.tests import test_outerloop
 from l2l.tests import test_setup
+from l2l.tests import test_functions
+from l2l.tests import test_mnist_optimizee
+from l2l.tests import test_seeded_perturbations
+from l2l.tests import test_deduplication
+from l2l.tests import test_ask_tell
+from l2l.tests import test_bounding
 
 
 def test_suite():
@@ -20,6 +30,16 @@ def test_suite():
     suite.addTest(test_sa_optimizer.suite())
     suite.addTest(test_gd_optimizer.suite())
     suite.addTest(test_ga_optimizer.suite())
+    suite.addTest(test_numpy_ga_optimizer.suite())
+    suite.addTest(test_cmaes_optimizer.suite())
+    suite.addTest(test_de_optimizer.suite())
+    suite.addTest(test_pso_optimizer.suite())
+    suite.addTest(test_functions.suite())
+    suite.addTest(test_mnist_optimizee.suite())
+    suite.addTest(test_seeded_perturbations.suite())
+    suite.addTest(test_deduplication.suite())
+    suite.addTest(test_ask_tell.suite())
+    suite.addTest(test_bounding.suite())
 
     return suite
 
@@ -0,0 +1,133 @@
+import copy
+import unittest
+
+import numpy as np
+from l2l.optimizers.cmaes import CMAESOptimizer, CMAESParameters
+from l2l.optimizers.crossentropy import CrossEntropyOptimizer, CrossEntropyParameters
+from l2l.optimizers.crossentropy.distribution import NoisyGaussian
+from l2l.optimizers.differentialevolution import DifferentialEvolutionOptimizer, DifferentialEvolutionParameters
+from l2l.optimizers.evolution import GeneticAlgorithmParameters, NumpyGeneticAlgorithmOptimizer
+from l2l.optimizers.evolutionstrategies import EvolutionStrategiesOptimizer, EvolutionStrategiesParameters
+from l2l.optimizers.gradientdescent import GradientDescentOptimizer, RMSPropParameters
+from l2l.optimizers.particleswarm import ParticleSwarmOptimizer, ParticleSwarmParameters
+from l2l.optimizers.simulatedannealing.optimizer import SimulatedAnnealingOptimizer, SimulatedAnnealingParameters, \
+    AvailableCoolingSchedules
+from l2l.utils.environment import Environment
+from l2l.utils.trajectory import Trajectory
+
+
+def get_fitness(individual):
+    return (np.sum(np.asarray(individual['coords']) ** 2),)
+
+
+class AskTellTestCase(unittest.TestCase):
+    """
+    Checks that driving the optimizers through the ask/tell interface (with partial batches in any order) evaluates the
+    same individuals as running them with the :class:`~l2l.utils.environment.Environment`
+    """
+
+    optimizers = {
+        'es': (EvolutionStrategiesOptimizer,
+               EvolutionStrategiesParameters(learning_rate=0.1, noise_std=1.0, mirrored_sampling_enabled=True,
+                                             fitness_shaping_enabled=True, pop_size=3, n_iteration=4,
+                                             stop_criterion=np.inf, seed=1)),
+        'ce': (CrossEntropyOptimizer,
+               CrossEntropyParameters(pop_size=5, rho=0.5, smoothing=0.0, temp_decay=0, n_iteration=4,
+                                      distribution=NoisyGaussian(noise_magnitude=1., noise_decay=0.99),
+                                      stop_criterion=np.inf, seed=1)),
+        'gd': (GradientDescentOptimizer,
+               RMSPropParameters(learning_rate=0.01, exploration_step_size=0.01, n_random_steps=3, momentum_decay=0.5,
+                                 n_iteration=4, stop_criterion=np.inf, seed=99)),
+        'sa': (SimulatedAnnealingOptimizer,
+               SimulatedAnnealingParameters(n_parallel_runs=3, noisy_step=.03, temp_decay=.99, n_iteration=4,
+                                            stop_criterion=np.inf, seed=1,
+                                            cooling_schedule=AvailableCoolingSchedules.QUADRATIC_ADDAPTIVE)),
+        'ga': (NumpyGeneticAlgorithmOptimizer,
+               GeneticAlgorithmParameters(seed=0, popsize=6, CXPB=0.5, MUTPB=0.3, NGEN=4, indpb=0.5, tournsize=3,
+                                          matepar=0.5, mutpar=1.)),
+        'cmaes': (CMAESOptimizer,
+                  CMAESParameters(sigma=1., pop_size=5, n_iteration=4, stop_criterion=np.inf, seed=1)),
+        'de': (DifferentialEvolutionOptimizer,
+               DifferentialEvolutionParameters(pop_size=5, mutation_factor=0.7, crossover_rate=0.9, n_iteration=4,
+                                               stop_criterion=np.inf, seed=1)),
+        'pso': (ParticleSwarmOptimizer,
+                ParticleSwarmParameters(pop_size=5, inertia=0.7, cognitive_coefficient=1.5, social_coefficient=1.5,
+                                        n_iteration=4, stop_criterion=np.inf, seed=1)),
+    }
+
+    def create_optimizer(self, name, traj):
+        random_state = np.random.RandomState(0)
+        optimizer_class, parameters = self.optimizers[name]
+        # The parameters are copied, as the distribution of the CrossEntropyOptimizer keeps a random state
+        return optimizer_class(traj, optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+                               optimizee_fitness_weights=(-1.,), parameters=copy.deepcopy(parameters))
+
+    def run_environment(self, name):
+        environment = Environment(trajectory='test_ask_tell', multiprocessing=False)
+        optimizer = self.create_optimizer(name, environment.trajectory)
+        evaluated = []
+
+        def simulate(traj):
+            evaluated.append(np.array(traj.individual.coords))
+            return get_fitness(traj.individual)
+
+        environment.add_postprocessing(optimizer.post_process)
+        environment.run(simulate)
+        return evaluated
+
+    def run_ask_tell(self, name):
+        optimizer = self.create_optimizer(name, Trajectory(name='test_ask_tell'))
+        evaluated = []
+        pending = []
+        while True:
+            individuals = optimizer.ask(2)
+            evaluated.extend(np.array(individual['coords']) for individual in individuals)
+            # The fitnesses are told for (copies of) the individuals in reverse order, one batch behind
+            pending = [copy.deepcopy(individual) for individual in individuals] + pending
+            if not individuals:
+                if not pending:
+                    break
+                optimizer.tell(pending, [get_fitness(individual) for individual in pending])
+                pending = []
+            elif len(pending) > 2:
+                optimizer.tell(pending[-2:], [get_fitness(individual) for individual in pending[-2:]])
+                pending = pending[:-2]
+        return evaluated
+
+    def test_ask_tell(self):
+        for name in self.optimizers:
+            with self.subTest(optimizer=name):
+                evaluated = self.run_ask_tell(name)
+                expected = self.run_environment(name)
+                self.assertEqual(len(evaluated), len(expected))
+                np.testing.assert_array_equal(evaluated, expected)
+
+    def test_partial_generation(self):
+        optimizer = self.create_optimizer('ga', Trajectory(name='test_ask_tell'))
+        individuals = optimizer.ask()
+        self.assertEqual(len(individuals), 6)
+        # The next generation is only handed out once all fitnesses are known
+        self.assertEqual(optimizer.ask(), [])
+        optimizer.tell(individuals[:5], [get_fitness(individual) for individual in individuals[:5]])
+        self.assertEqual(optimizer.g, 0)
+        self.assertEqual(optimizer.ask(), [])
+        with self.assertRaises(ValueError):
+            optimizer.tell(individuals[:1], [get_fitness(individuals[0])])
+        optimizer.tell(individuals[5:], [get_fitness(individuals[5])])
+        self.assertEqual(optimizer.g, 1)
+        self.assertEqual(len(optimizer.ask(1)), 1)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(AskTellTestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,129 @@
+import unittest
+
+import numpy as np
+from l2l import dict_to_list
+from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
+from l2l.optimizees.functions.optimizee import FunctionGeneratorOptimizee
+from l2l.optimizees.optimizee import Optimizee
+from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.trajectory import Trajectory
+
+
+def create_individual():
+    return {'a': 0.5, 'b': np.zeros(2)}
+
+
+def clip_individual(individual):
+    return {'a': np.clip(individual['a'], 0., 1.), 'b': np.clip(individual['b'], -1., 0.)}
+
+
+class UnbatchedOptimizee(Optimizee):
+    """
+    Optimizee with a per-individual bounding function only
+    """
+
+    def __init__(self, traj):
+        super().__init__(traj)
+        self.n_calls = 0
+
+    def create_individual(self):
+        return create_individual()
+
+    def bounding_func(self, individual):
+        self.n_calls += 1
+        return clip_individual(individual)
+
+
+class Bounds:
+    """
+    Not an optimizee, but has a bounding method
+    """
+
+    def bound(self, individual):
+        return clip_individual(individual)
+
+
+class ShiftedFunctionGeneratorOptimizee(FunctionGeneratorOptimizee):
+    """
+    Overrides `bounding_func` but inherits `bounding_func_batch`
+    """
+
+    def bounding_func(self, individual):
+        return {'coords': np.clip(individual['coords'], self.bound[0] + 1., self.bound[1] - 1.)}
+
+
+class BoundPopulationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.random_state = np.random.RandomState(0)
+        self.traj = Trajectory(name='test_bounding')
+
+    def create_optimizer(self, optimizee_create_individual, optimizee_bounding_func):
+        optimizer = Optimizer(self.traj, optimizee_create_individual=optimizee_create_individual,
+                              optimizee_fitness_weights=(1.,), optimizee_bounding_func=optimizee_bounding_func,
+                              parameters=None)
+        _, optimizer.optimizee_individual_dict_spec = dict_to_list(optimizee_create_individual(), get_dict_spec=True)
+        return optimizer
+
+    def get_function_optimizee(self, optimizee_class=FunctionGeneratorOptimizee):
+        (_, benchmark_function), _ = BenchmarkedFunctions().get_function_by_name('Rastrigin2d')
+        return optimizee_class(self.traj, benchmark_function, seed=1)
+
+    def test_batch(self):
+        optimizee = self.get_function_optimizee()
+        optimizer = self.create_optimizer(optimizee.create_individual, optimizee.bounding_func)
+        self.assertEqual(optimizer.optimizee_bounding_func_batch, optimizee.bounding_func_batch)
+        population = self.random_state.uniform(2 * optimizee.bound[0], 2 * optimizee.bound[1], size=(50, 2))
+        # The batched bounding gives the same result as bounding every individual
+        expected = np.array([optimizee.bounding_func({'coords': individual})['coords'] for individual in population])
+        np.testing.assert_array_equal(optimizer._bound_population(population), expected)
+
+    def test_overridden_bounding_func(self):
+        optimizee = self.get_function_optimizee(ShiftedFunctionGeneratorOptimizee)
+        optimizer = self.create_optimizer(optimizee.create_individual, optimizee.bounding_func)
+        # The inherited batched version would bound differently, so it is not used
+        self.assertIsNone(optimizer.optimizee_bounding_func_batch)
+        population = self.random_state.uniform(2 * optimizee.bound[0], 2 * optimizee.bound[1], size=(50, 2))
+        expected = np.array([optimizee.bounding_func({'coords': individual})['coords'] for individual in population])
+        np.testing.assert_array_equal(optimizer._bound_population(population), expected)
+
+    def test_unbatched_optimizee(self):
+        optimizee = UnbatchedOptimizee(self.traj)
+        optimizer = self.create_optimizer(optimizee.create_individual, optimizee.bounding_func)
+        population = self.random_state.uniform(-2., 2., size=(5, 3))
+        expected = np.column_stack((np.clip(population[:, 0], 0., 1.), np.clip(population[:, 1:], -1., 0.)))
+        np.testing.assert_array_equal(optimizer._bound_population(population), expected)
+        # After the batched version raised NotImplementedError, the individuals are bounded one by one
+        self.assertIsNone(optimizer.optimizee_bounding_func_batch)
+        self.assertEqual(optimizee.n_calls, 5)
+        np.testing.assert_array_equal(optimizer._bound_population(population[:2]), expected[:2])
+        self.assertEqual(optimizee.n_calls, 7)
+
+    def test_non_optimizee_bounding_func(self):
+        optimizer = self.create_optimizer(create_individual, Bounds().bound)
+        self.assertIsNone(optimizer.optimizee_bounding_func_batch)
+        population = self.random_state.uniform(-2., 2., size=(5, 3))
+        expected = np.column_stack((np.clip(population[:, 0], 0., 1.), np.clip(population[:, 1:], -1., 0.)))
+        np.testing.assert_array_equal(optimizer._bound_population(population), expected)
+
+    def test_no_bounding_func(self):
+        optimizee = self.get_function_optimizee()
+        optimizer = self.create_optimizer(optimizee.create_individual, None)
+        self.assertIsNone(optimizer.optimizee_bounding_func_batch)
+        population = self.random_state.uniform(-10., 10., size=(5, 2))
+        np.testing.assert_array_equal(optimizer._bound_population(population), population)
+        np.testing.assert_array_equal(optimizer._bound_population(population.tolist()), population)
+
+
+def suite():
+    suite = unittest.makeSuite(BoundPopulationTestCase, 'test')
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -1,8 +1,11 @@
 import unittest
 
 import numpy as np
+from scipy.stats import multivariate_normal
 from l2l.tests.test_optimizer import OptimizerTestCase
-from l2l.optimizers.crossentropy.distribution import NoisyGaussian
+from l2l.optimizers.crossentropy.distribution import Gaussian, NoisyGaussian, BayesianGaussianMixture, \
+    NoisyBayesianGaussianMixture, DiagonalGaussian, LowRankGaussian
+from l2l.utils.trajectory import Trajectory
 from l2l.optimizers.crossentropy import CrossEntropyOptimizer, CrossEntropyParameters
 
 
@@ -34,8 +37,198 @@ class CEOptimizerTestCase(OptimizerTestCase):
         self.experiment.end_experiment(optimizer)
 
 
+class LinearMemoryGaussianTestCase(unittest.TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        # Samples with a covariance of rank 2 plus a diagonal
+        self.factor = random_state.randn(50, 2) * 3.
+        self.diagonal_var = random_state.uniform(0.5, 1., size=50)
+        self.data = 5. + random_state.randn(2000, 2) @ self.factor.T + \
+            np.sqrt(self.diagonal_var) * random_state.randn(2000, 50)
+
+    def create_distribution(self, distribution_class, *args):
+        distribution = distribution_class(*args)
+        distribution.init_random_state(np.random.RandomState(1))
+        return distribution
+
+    def test_diagonal_gaussian(self):
+        distribution = self.create_distribution(DiagonalGaussian)
+        parameters = distribution.fit(self.data)
+        np.testing.assert_allclose(parameters['mean'], np.mean(self.data, axis=0))
+        np.testing.assert_allclose(parameters['variance'], np.var(self.data, axis=0, ddof=1))
+        samples = distribution.sample(20000)
+        np.testing.assert_allclose(np.mean(samples, axis=0), parameters['mean'], atol=0.5)
+        np.testing.assert_allclose(np.var(samples, axis=0), parameters['variance'], rtol=0.1)
+
+        parameters = distribution.fit(self.data + 1., smooth_update=0.75)
+        np.testing.assert_allclose(parameters['mean'], np.mean(self.data, axis=0) + 0.25)
+
+    def test_low_rank_gaussian(self):
+        distribution = self.create_distribution(LowRankGaussian, 2)
+        parameters = distribution.fit(self.data)
+        self.assertEqual(parameters['factor'].shape, (50, 2))
+        # The covariance matrix has the variances of the data, and approximates its covariances
+        covariance = parameters['factor'] @ parameters['factor'].T + np.diag(parameters['diagonal_variance'])
+        data_covariance = np.cov(self.data, rowvar=False)
+        np.testing.assert_allclose(np.diag(covariance), np.diag(data_covariance))
+        true_covariance = self.factor @ self.factor.T + np.diag(self.diagonal_var)
+        self.assertLess(np.linalg.norm(covariance - true_covariance) / np.linalg.norm(true_covariance), 0.1)
+        samples = distribution.sample(20000)
+        self.assertLess(np.linalg.norm(np.cov(samples, rowvar=False) - covariance) / np.linalg.norm(covariance), 0.1)
+
+        # The smoothing combines the covariance matrices before truncating them to the rank again
+        parameters = distribution.fit(self.data[:, ::-1], smooth_update=0.5)
+        self.assertEqual(parameters['factor'].shape, (50, 2))
+        smoothed_covariance = parameters['factor'] @ parameters['factor'].T + \
+            np.diag(parameters['diagonal_variance'])
+        np.testing.assert_allclose(np.diag(smoothed_covariance),
+                                   0.5 * np.diag(data_covariance) + 0.5 * np.diag(data_covariance)[::-1])
+
+        with self.assertRaises(ValueError):
+            LowRankGaussian(0)
+
+    def test_cross_entropy(self):
+        random_state = np.random.RandomState(0)
+        for distribution in (DiagonalGaussian(), LowRankGaussian(3)):
+            parameters = CrossEntropyParameters(pop_size=50, rho=0.2, smoothing=0.2, temp_decay=0, n_iteration=20,
+                                                distribution=distribution, stop_criterion=np.inf, seed=1)
+            traj = Trajectory(name='test_ce')
+            optimizer = CrossEntropyOptimizer(traj, optimizee_create_individual=lambda: {'x': random_state.randn(1000)},
+                                              optimizee_fitness_weights=(-1.,), parameters=parameters)
+            best_fitness = []
+            for generation in range(parameters.n_iteration):
+                traj.current_results = [(individual.ind_idx, (np.sum(individual.x ** 2),))
+                                        for individual in traj.individuals[generation]]
+                optimizer.post_process(traj, list(traj.current_results))
+                best_fitness.append(optimizer.best_fitness_in_run)
+            self.assertGreater(best_fitness[-1], 0.75 * best_fitness[0])
+
+
+class BayesianGaussianMixtureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.data = np.concatenate((random_state.randn(100, 3), random_state.randn(100, 3) + 10.))
+
+    def create_distribution(self, distribution_class=NoisyBayesianGaussianMixture, **kwargs):
+        distribution = distribution_class(n_components=2, **kwargs)
+        distribution.init_random_state(np.random.RandomState(1))
+        return distribution
+
+    def test_covariance_types(self):
+        for covariance_type, n_covariances in (('full', 2), ('tied', 1), ('diag', 2)):
+            with self.subTest(covariance_type=covariance_type):
+                distribution = self.create_distribution(covariance_type=covariance_type, warm_start=True)
+                for _ in range(2):
+                    parameters = distribution.fit(self.data)
+                self.assertEqual(parameters['noise_value'].shape, (n_covariances, 3))
+                self.assertGreaterEqual(parameters['fit_time'], 0.)
+                self.assertEqual(distribution.sample(5).shape, (5, 3))
+        with self.assertRaises(ValueError):
+            self.create_distribution(covariance_type='spherical')
+
+    def test_warm_start(self):
+        distribution = self.create_distribution(BayesianGaussianMixture, warm_start=True, warm_start_max_iter=2)
+        means = distribution.fit(self.data)['means'].copy()
+        # The warm-started fit continues from the previous components, which stay in the same order
+        parameters = distribution.fit(self.data + 0.1)
+        self.assertLessEqual(distribution.bayesian_mixture.n_iter_, 2)
+        np.testing.assert_allclose(parameters['means'], means + 0.1, atol=0.05)
+
+    def test_smooth_update(self):
+        distribution = self.create_distribution(BayesianGaussianMixture, warm_start=True)
+        means = distribution.fit(self.data)['means'].copy()
+        parameters = distribution.fit(self.data + 1., smooth_update=0.75)
+        np.testing.assert_allclose(parameters['means'], means + 0.25, atol=0.05)
+        np.testing.assert_array_equal(distribution.bayesian_mixture.means_, parameters['means'])
+
+
+class SampleArchiveTestCase(unittest.TestCase):
+
+    def create_optimizer(self, traj, distribution, archive_size, pop_size=10):
+        random_state = np.random.RandomState(0)
+        parameters = CrossEntropyParameters(pop_size=pop_size, rho=0.3, smoothing=0.3, temp_decay=0, n_iteration=50,
+                                            distribution=distribution, stop_criterion=np.inf, seed=1,
+                                            archive_size=archive_size)
+        return CrossEntropyOptimizer(traj, optimizee_create_individual=lambda: {'x': 2. * random_state.randn(5)},
+                                     optimizee_fitness_weights=(-1.,), parameters=parameters)
+
+    def run_generation(self, traj, optimizer):
+        traj.current_results = [(individual.ind_idx, (np.sum(individual.x ** 2),))
+                                for individual in traj.individuals[optimizer.g]]
+        optimizer.post_process(traj, list(traj.current_results))
+
+    def test_log_likelihood(self):
+        random_state = np.random.RandomState(0)
+        data = random_state.randn(200, 4) @ random_state.randn(4, 4)
+        for distribution in (Gaussian(), DiagonalGaussian(), LowRankGaussian(2)):
+            with self.subTest(distribution=distribution.__class__.__name__):
+                distribution.init_random_state(np.random.RandomState(1))
+                distribution.fit(data)
+                samples = distribution.sample(5)
+                self.assertEqual(distribution.log_likelihood(samples).shape, (5,))
+                # The log-likelihood of a Gaussian with the covariance matrix of the distribution
+                covariance = np.cov(distribution.sample(200000), rowvar=False)
+                expected = multivariate_normal.logpdf(samples, np.mean(data, axis=0), covariance)
+                np.testing.assert_allclose(distribution.log_likelihood(samples), expected, atol=0.05)
+
+    def test_weighted_fit(self):
+        random_state = np.random.RandomState(0)
+        data = random_state.randn(50, 3)
+        weights = random_state.uniform(size=50)
+        distribution = Gaussian()
+        distribution.init_random_state(np.random.RandomState(1))
+        parameters = distribution.fit(data, weights=weights)
+        np.testing.assert_allclose(parameters['mean'], np.average(data, axis=0, weights=weights))
+        np.testing.assert_allclose(parameters['covariance_matrix'], np.cov(data, rowvar=False, aweights=weights))
+        diagonal = DiagonalGaussian()
+        diagonal.init_random_state(np.random.RandomState(1))
+        parameters = diagonal.fit(data, weights=weights)
+        np.testing.assert_allclose(parameters['variance'], np.diag(np.cov(data, rowvar=False, aweights=weights)))
+
+    def test_archive(self):
+        traj = Trajectory(name='test_ce')
+        optimizer = self.create_optimizer(traj, Gaussian(), archive_size=25)
+        self.run_generation(traj, optimizer)
+        # The initial population has no generating distribution, and is not archived
+        self.assertEqual(len(optimizer.archive_fitness), 0)
+        for n_archived in (10, 20, 25, 25):
+            self.run_generation(traj, optimizer)
+            self.assertEqual(len(optimizer.archive_fitness), n_archived)
+            self.assertEqual(optimizer.archive_individuals.shape, (n_archived, 5))
+        # The most recent samples come first
+        np.testing.assert_array_equal(optimizer.archive_individuals[10:20],
+                                      [individual.x for individual in traj.individuals[optimizer.g - 2]])
+        population, fitness, weights = optimizer._get_weighted_samples(np.zeros(10))
+        self.assertEqual(population.shape, (35, 5))
+        np.testing.assert_array_equal(weights[:10], 1.)
+        self.assertTrue(np.all((weights[10:] >= 0.) & (weights[10:] <= 1.)))
+        generation_params = traj.results.generation_params._data['generation_{}'.format(optimizer.g - 1)]
+        self.assertGreater(generation_params._data['algorithm_params']['effective_pop_size'], 10)
+
+    def test_optimization(self):
+        traj = Trajectory(name='test_ce')
+        optimizer = self.create_optimizer(traj, DiagonalGaussian(), archive_size=30)
+        self.run_generation(traj, optimizer)
+        initial_fitness = optimizer.best_fitness_in_run
+        for _ in range(30):
+            self.run_generation(traj, optimizer)
+        self.assertGreater(optimizer.best_fitness_in_run, 0.1 * initial_fitness)
+
+    def test_unsupported_distribution(self):
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_ce'), BayesianGaussianMixture(n_components=2), archive_size=10)
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_ce'), Gaussian(), archive_size=-1)
+
+
 def suite():
-    suite = unittest.makeSuite(CEOptimizerTestCase, 'test')
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(CEOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(LinearMemoryGaussianTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(BayesianGaussianMixtureTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(SampleArchiveTestCase, 'test'))
     return suite
 
 
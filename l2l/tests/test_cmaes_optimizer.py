@@ -0,0 +1,108 @@
+import unittest
+
+import numpy as np
+from l2l.tests.test_optimizer import OptimizerTestCase
+from l2l.optimizers.cmaes import CMAESOptimizer, CMAESParameters
+from l2l.utils.trajectory import Trajectory
+
+
+class CMAESOptimizerTestCase(OptimizerTestCase):
+
+    def test_setup(self):
+
+        optimizer_parameters = CMAESParameters(
+            sigma=1.,
+            pop_size=4,
+            n_iteration=1,
+            stop_criterion=np.inf,
+            seed=1)
+
+        optimizer = CMAESOptimizer(
+            self.trajectory,
+            optimizee_create_individual=self.optimizee.create_individual,
+            optimizee_fitness_weights=(-0.1,),
+            parameters=optimizer_parameters,
+            optimizee_bounding_func=self.optimizee.bounding_func)
+
+        self.assertIsNotNone(optimizer.parameters)
+        try:
+
+            self.experiment.run_experiment(optimizee=self.optimizee,
+                                           optimizee_parameters=self.optimizee_parameters,
+                                           optimizer=optimizer,
+                                           optimizer_parameters=optimizer_parameters)
+        except Exception as e:
+            self.fail(e.__name__)
+        best = self.experiment.optimizer.best_individual['coords']
+        self.assertAlmostEqual(best[0], 0.9150318112422202)
+        self.assertAlmostEqual(best[1], 1.442038033526478)
+        self.experiment.end_experiment(optimizer)
+
+
+class CMAESConvergenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # Ill-conditioned ellipsoid, with a condition number of 1e6
+        n = 8
+        self.scales = 1e6 ** (np.arange(n) / (n - 1))
+        self.rotation = np.linalg.qr(np.random.RandomState(0).randn(n, n))[0]
+
+    def create_individual(self):
+        return {'coords': np.full(len(self.scales), 3.)}
+
+    def optimize(self, rotation, parameters):
+        traj = Trajectory(name='test_cmaes')
+        optimizer = CMAESOptimizer(traj, optimizee_create_individual=self.create_individual,
+                                   optimizee_fitness_weights=(-1.,), parameters=parameters)
+        while optimizer.g in traj.individuals:
+            individuals = traj.individuals[optimizer.g]
+            coords = np.array([individual.coords for individual in individuals])
+            fitnesses = np.sum(self.scales * np.dot(coords, rotation.T) ** 2, axis=1)
+            traj.current_results = [(individual.ind_idx, (fitness,))
+                                    for individual, fitness in zip(individuals, fitnesses)]
+            generation = optimizer.g
+            optimizer.post_process(traj, list(traj.current_results))
+            if optimizer.g == generation:
+                break
+        return optimizer
+
+    def test_full_covariance(self):
+        parameters = CMAESParameters(sigma=1., pop_size=None, n_iteration=1000, stop_criterion=-1e-8, seed=1)
+        optimizer = self.optimize(self.rotation, parameters)
+        self.assertGreater(optimizer.best_fitness, -1e-8)
+        self.assertLess(optimizer.g, 1000)
+        # The covariance matrix has learned the (inverse) scales of the ellipsoid
+        self.assertGreater(np.max(optimizer.D) / np.min(optimizer.D), 100)
+
+    def test_diagonal_covariance(self):
+        parameters = CMAESParameters(sigma=1., pop_size=None, n_iteration=1000, stop_criterion=-1e-8, seed=1,
+                                     diagonal_covariance_enabled=True)
+        optimizer = self.optimize(np.eye(len(self.scales)), parameters)
+        self.assertGreater(optimizer.best_fitness, -1e-8)
+        self.assertIsNone(optimizer.B)
+        self.assertEqual(optimizer.C.shape, (len(self.scales),))
+
+    def test_lazy_eigendecomposition(self):
+        parameters = CMAESParameters(sigma=1., pop_size=None, n_iteration=7, stop_criterion=np.inf, seed=1,
+                                     eigen_update_interval=3)
+        optimizer = self.optimize(self.rotation, parameters)
+        self.assertEqual(optimizer.eigen_generation, 6)
+        with self.assertRaises(ValueError):
+            CMAESOptimizer(Trajectory(name='test_cmaes'), optimizee_create_individual=self.create_individual,
+                           optimizee_fitness_weights=(-1.,), parameters=parameters._replace(eigen_update_interval=0))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(CMAESOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(CMAESConvergenceTestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+from l2l.tests.test_optimizer import OptimizerTestCase
+from l2l.optimizers.differentialevolution import DifferentialEvolutionOptimizer, DifferentialEvolutionParameters
+from l2l.utils.trajectory import Trajectory
+
+
+class DEOptimizerTestCase(OptimizerTestCase):
+
+    def test_setup(self):
+
+        optimizer_parameters = DifferentialEvolutionParameters(
+            pop_size=4,
+            mutation_factor=0.7,
+            crossover_rate=0.9,
+            n_iteration=1,
+            stop_criterion=np.inf,
+            seed=1)
+
+        optimizer = DifferentialEvolutionOptimizer(
+            self.trajectory,
+            optimizee_create_individual=self.optimizee.create_individual,
+            optimizee_fitness_weights=(-0.1,),
+            parameters=optimizer_parameters,
+            optimizee_bounding_func=self.optimizee.bounding_func)
+
+        self.assertIsNotNone(optimizer.parameters)
+        try:
+
+            self.experiment.run_experiment(optimizee=self.optimizee,
+                                           optimizee_parameters=self.optimizee_parameters,
+                                           optimizer=optimizer,
+                                           optimizer_parameters=optimizer_parameters)
+        except Exception as e:
+            self.fail(e.__name__)
+        best = self.experiment.optimizer.best_individual['coords']
+        self.assertAlmostEqual(best[0], -3.137397886223291)
+        self.assertAlmostEqual(best[1], -1.5443927295695223)
+        self.experiment.end_experiment(optimizer)
+
+
+class DEOperatorsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.random_state = np.random.RandomState(0)
+
+    def create_individual(self):
+        return {'coords': self.random_state.randn(3)}
+
+    def create_optimizer(self, traj=None, pop_size=10, strategy='rand/1/bin'):
+        parameters = DifferentialEvolutionParameters(pop_size=pop_size, mutation_factor=0.5, crossover_rate=0.5,
+                                                     n_iteration=100, stop_criterion=np.inf, seed=1,
+                                                     strategy=strategy)
+        return DifferentialEvolutionOptimizer(
+            traj or Trajectory(name='test_de'), optimizee_create_individual=self.create_individual,
+            optimizee_fitness_weights=(-1.,), parameters=parameters)
+
+    def test_mutation_indices(self):
+        optimizer = self.create_optimizer(pop_size=5)
+        optimizer.population = np.zeros((5, 3))
+        counts = np.zeros((5, 5))
+        for _ in range(1000):
+            indices = optimizer._get_mutation_indices(3)
+            for i, row in enumerate(indices):
+                # The indices of each individual are mutually different, and different from the individual itself
+                self.assertEqual(len({i, *row}), 4)
+                counts[i, row] += 1
+        # Each other individual is chosen with probability 3/4
+        np.testing.assert_allclose(counts[~np.eye(5, dtype=bool)] / 1000, 0.75, atol=0.06)
+
+    def test_selection_and_crossover(self):
+        for strategy in ['rand/1/bin', 'current-to-best/1/bin']:
+            traj = Trajectory(name='test_de')
+            optimizer = self.create_optimizer(traj, strategy=strategy)
+            for generation in range(40):
+                individuals = traj.individuals[generation]
+                fitnesses = [(np.sum(individual.coords ** 2),) for individual in individuals]
+                traj.current_results = [(individual.ind_idx, fitness)
+                                        for individual, fitness in zip(individuals, fitnesses)]
+                previous_fitness = None if optimizer.population_fitness is None else \
+                    optimizer.population_fitness.copy()
+                optimizer.post_process(traj, list(traj.current_results))
+                if previous_fitness is not None:
+                    # The population never gets worse
+                    self.assertTrue(np.all(optimizer.population_fitness >= previous_fitness))
+            self.assertGreater(optimizer.best_fitness, -1e-3)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self.create_optimizer(pop_size=3)
+        with self.assertRaises(ValueError):
+            self.create_optimizer(strategy='best/2/exp')
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(DEOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(DEOperatorsTestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
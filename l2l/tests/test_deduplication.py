@@ -0,0 +1,98 @@
+import random
+import unittest
+
+import numpy as np
+from l2l.optimizers.deduplication import get_duplicate_mask, get_individual_keys
+from l2l.optimizers.evolution import GeneticAlgorithmOptimizer, GeneticAlgorithmParameters, \
+    NumpyGeneticAlgorithmOptimizer
+from l2l.utils.trajectory import Trajectory
+
+
+class DeduplicationTestCase(unittest.TestCase):
+
+    def test_duplicate_mask(self):
+        population = np.array([[1., 2.], [0., 0.], [1., 2.], [-0., 0.], [1., 2.000001], [1., 2.]])
+        np.testing.assert_array_equal(get_duplicate_mask(population), [False, False, True, True, False, True])
+        # With quantisation, close individuals are duplicates as well
+        np.testing.assert_array_equal(get_duplicate_mask(population, tolerance=1e-3),
+                                      [False, False, True, True, True, True])
+        self.assertEqual(len(set(get_individual_keys(population))), 3)
+
+    def test_known_keys(self):
+        known_keys = set()
+        np.testing.assert_array_equal(get_duplicate_mask([[1., 2.], [3., 4.]], known_keys=known_keys), [False, False])
+        # Individuals seen in a previous generation are duplicates
+        np.testing.assert_array_equal(get_duplicate_mask([[5., 6.], [3., 4.]], known_keys=known_keys), [False, True])
+        self.assertEqual(len(known_keys), 3)
+
+    def test_ga_offspring_are_unique(self):
+        random.seed(0)
+        traj = Trajectory(name='test_deduplication')
+        random_state = np.random.RandomState(0)
+        parameters = GeneticAlgorithmParameters(seed=0, popsize=30, CXPB=0., MUTPB=0., NGEN=5, indpb=1.,
+                                                tournsize=5, matepar=0.5, mutpar=1.)
+        optimizer = GeneticAlgorithmOptimizer(traj,
+                                              optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+                                              optimizee_fitness_weights=(-1.,), parameters=parameters)
+        individuals = traj.individuals[0]
+        traj.current_results = [(ind.ind_idx, (np.sum(ind.coords ** 2),)) for ind in individuals]
+        optimizer.post_process(traj, list(traj.current_results))
+        # Without variation, the selected offspring contain many duplicates, most of which are mutated
+        n_unique = len(set(map(tuple, optimizer.pop)))
+        self.assertGreater(n_unique, 0.7 * len(optimizer.pop))
+        self.assertEqual(len(traj.individuals[1]), len(optimizer.eval_pop))
+
+    def test_ga_seeded_offspring(self):
+        random.seed(0)
+        traj = Trajectory(name='test_deduplication')
+        random_state = np.random.RandomState(0)
+        parameters = GeneticAlgorithmParameters(seed=0, popsize=8, CXPB=0., MUTPB=0., NGEN=2, indpb=0.5,
+                                                tournsize=4, matepar=0.5, mutpar=1.)
+        optimizer = GeneticAlgorithmOptimizer(traj,
+                                              optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+                                              optimizee_fitness_weights=(-1.,), parameters=parameters)
+        traj.current_results = [(ind.ind_idx, (np.sum(ind.coords ** 2),)) for ind in traj.individuals[0]]
+        optimizer.post_process(traj, list(traj.current_results))
+        # The offspring of a seeded run are the same as with the original comparison of all pairs of offspring, where
+        # each duplicate is mutated with probability 0.8 for every earlier offspring it is equal to
+        expected_pop = [[0.44386323274542566, 0.33367432737426683],
+                        [0.44386323274542566, 0.33367432737426683],
+                        [-0.10321885179355784, 0.41059850193837233],
+                        [0.9500884175255894, -0.1513572082976979],
+                        [0.7610377251469934, 0.12167501649282841],
+                        [-0.06357934716826902, 0.33367432737426683],
+                        [-0.10321885179355784, 0.41059850193837233],
+                        [0.144043571160878, 1.454273506962975]]
+        np.testing.assert_array_equal(optimizer.pop, expected_pop)
+        self.assertEqual([ind.fitness.valid for ind in optimizer.pop],
+                         [True, False, True, True, True, False, False, True])
+        self.assertEqual(len(optimizer.eval_pop), 3)
+
+    def test_numpy_ga_offspring_are_unique(self):
+        traj = Trajectory(name='test_deduplication')
+        random_state = np.random.RandomState(0)
+        # Mutation leaves some duplicates unchanged, so that they have to be checked (and mutated) again
+        parameters = GeneticAlgorithmParameters(seed=0, popsize=30, CXPB=0., MUTPB=0., NGEN=5, indpb=0.5,
+                                                tournsize=5, matepar=0.5, mutpar=1.)
+        optimizer = NumpyGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+            optimizee_fitness_weights=(-1.,), parameters=parameters)
+        for generation in range(4):
+            traj.current_results = [(ind.ind_idx, (np.sum(ind.coords ** 2),))
+                                    for ind in traj.individuals[generation]]
+            optimizer.post_process(traj, list(traj.current_results))
+            self.assertEqual(len(np.unique(optimizer.pop, axis=0)), len(optimizer.pop))
+
+
+def suite():
+    suite = unittest.makeSuite(DeduplicationTestCase, 'test')
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
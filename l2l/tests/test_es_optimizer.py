@@ -3,6 +3,7 @@ import unittest
 import numpy as np
 from l2l.tests.test_optimizer import OptimizerTestCase
 from l2l.optimizers.evolutionstrategies import EvolutionStrategiesParameters, EvolutionStrategiesOptimizer
+from l2l.optimizers.evolutionstrategies.optimizer import get_fitness_shaping_utilities, get_utilities
 
 
 class ESOptimizerTestCase(OptimizerTestCase):
@@ -41,8 +42,34 @@ class ESOptimizerTestCase(OptimizerTestCase):
         self.experiment.end_experiment(optimizer)
 
 
+class FitnessShapingTestCase(unittest.TestCase):
+
+    def test_utilities(self):
+        fitnesses = np.random.RandomState(0).randn(11)
+        fitness_sorting_indices = np.argsort(fitnesses)[::-1]
+        # Utilities of the sorted fitnesses as in the reference formula
+        n_individuals = len(fitnesses)
+        sorted_utilities = np.array([max(0., np.log((n_individuals / 2) + 1) - np.log(i + 1))
+                                     for i in range(n_individuals)])
+        sorted_utilities /= np.sum(sorted_utilities)
+        sorted_utilities -= (1. / n_individuals)
+
+        np.testing.assert_allclose(get_fitness_shaping_utilities(n_individuals), sorted_utilities)
+        self.assertIs(get_fitness_shaping_utilities(n_individuals), get_fitness_shaping_utilities(n_individuals))
+        utilities = get_utilities(fitnesses, fitness_sorting_indices)
+        np.testing.assert_allclose(utilities[fitness_sorting_indices], sorted_utilities)
+
+        # The update over the unsorted perturbations equals the update over the sorted ones
+        perturbations = np.random.RandomState(1).randn(n_individuals, 4)
+        np.testing.assert_allclose(
+            np.dot(utilities, perturbations),
+            np.sum(sorted_utilities[:, np.newaxis] * perturbations[fitness_sorting_indices], axis=0))
+
+
 def suite():
-    suite = unittest.makeSuite(CEOptimizerTestCase, 'test')
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(ESOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(FitnessShapingTestCase, 'test'))
     return suite
 
 
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+from scipy.stats import multivariate_normal
+from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
+from l2l.optimizees.functions.function_generator import FunctionGenerator, RotatedParameters, SphereParameters, \
+    Gaussian, GaussianParameters
+
+
+class FunctionGeneratorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.bench_functs = BenchmarkedFunctions()
+        self.random_state = np.random.RandomState(0)
+
+    def test_batch_evaluation(self):
+        for function_name, _ in self.bench_functs.function_name_map:
+            (_, function), _ = self.bench_functs.get_function_by_name(function_name)
+            points = self.random_state.uniform(function.bound[0], function.bound[1], size=(20, function.dims))
+            single_values = np.array([function.cost_function(point) for point in points])
+            batch_values = function.cost_function(points)
+            self.assertEqual(batch_values.shape, (20,))
+            np.testing.assert_allclose(batch_values, single_values, rtol=1e-10, err_msg=function_name)
+
+    def test_batch_noise(self):
+        (_, function), _ = self.bench_functs.get_function_by_name('Rastrigin2d', noise=True)
+        points = self.random_state.rand(10, 2)
+        # One noise value is drawn per point, in the same order as for sequential evaluation
+        single_random_state = np.random.RandomState(1)
+        single_values = np.array([function.cost_function(point, random_state=single_random_state)
+                                  for point in points])
+        batch_values = function.cost_function(points, random_state=np.random.RandomState(1))
+        np.testing.assert_allclose(batch_values, single_values, rtol=1e-10)
+
+    def test_rotation(self):
+        # The sphere is invariant under rotations, so rotating it must not change its value
+        rotated_sphere = FunctionGenerator([RotatedParameters(SphereParameters(), block_size=10, seed=1)], dims=100)
+        sphere = FunctionGenerator([SphereParameters()], dims=100)
+        points = self.random_state.randn(5, 100)
+        np.testing.assert_allclose(rotated_sphere.cost_function(points), sphere.cost_function(points), rtol=1e-10)
+
+    def test_gaussian(self):
+        dims = 3
+        factor = self.random_state.randn(dims, dims)
+        sigma = np.dot(factor, factor.T) + np.eye(dims)
+        mean = self.random_state.randn(dims)
+        gaussian = Gaussian(GaussianParameters(sigma=sigma, mean=mean), dims)
+        points = mean + self.random_state.randn(10, dims)
+        # The (negative) density of the normal distribution, from its definition
+        x_min_mean = points - mean
+        expected = -np.exp(-0.5 * np.einsum('...i,ij,...j->...', x_min_mean, np.linalg.inv(sigma), x_min_mean)) / \
+            np.sqrt((2 * np.pi) ** dims * np.linalg.det(sigma))
+        np.testing.assert_allclose(gaussian(points), expected, rtol=1e-10)
+        np.testing.assert_allclose(gaussian(points[0]), expected[0], rtol=1e-10)
+
+    def test_gaussian_high_dimensional(self):
+        dims = 200
+        sigma = 0.01 * np.eye(dims)
+        mean = self.random_state.randn(dims)
+        # The determinant of the covariance matrix underflows
+        self.assertEqual(np.linalg.det(sigma), 0.)
+        gaussian = Gaussian(GaussianParameters(sigma=sigma, mean=mean), dims)
+        points = mean + 0.1 * self.random_state.randn(5, dims)
+        values = gaussian(points)
+        self.assertTrue(np.all(np.isfinite(values)))
+        np.testing.assert_allclose(np.log(-values), multivariate_normal(mean, sigma).logpdf(points), rtol=1e-10)
+
+    def test_gaussian_not_positive_definite(self):
+        # The covariance matrix is invertible, but not positive definite
+        with self.assertRaises(ValueError):
+            Gaussian(GaussianParameters(sigma=np.array([[0., 1.], [1., 0.]]), mean=np.zeros(2)), 2)
+
+
+def suite():
+    suite = unittest.makeSuite(FunctionGeneratorTestCase, 'test')
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -2,11 +2,12 @@ import unittest
 
 import numpy as np
 from l2l.optimizers.gradientdescent.optimizer import GradientDescentOptimizer
-from l2l.optimizers.gradientdescent.optimizer import RMSPropParameters
+from l2l.optimizers.gradientdescent.optimizer import RMSPropParameters, ClassicGDParameters
 from l2l.tests.test_optimizer import OptimizerTestCase
 from l2l.utils.experiment import Experiment
+from l2l.utils.trajectory import Trajectory
 
-from l2l import list_to_dict
+from l2l import dict_to_list, list_to_dict
 
 
 class GDOptimizerTestCase(OptimizerTestCase):
@@ -39,8 +40,75 @@ class GDOptimizerTestCase(OptimizerTestCase):
         self.experiment.end_experiment(optimizer)
 
 
+class GradientEstimationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.slope = np.arange(1., 6.)
+
+    def create_optimizer(self, traj, parameters, dimension=5):
+        random_state = np.random.RandomState(0)
+        return GradientDescentOptimizer(traj, optimizee_create_individual=lambda: {'x': random_state.randn(dimension)},
+                                        optimizee_fitness_weights=(1.,), parameters=parameters)
+
+    def run_generation(self, traj, optimizer, fitness_function):
+        traj.current_results = [(individual.ind_idx, (fitness_function(individual.x),))
+                                for individual in traj.individuals[optimizer.g]]
+        optimizer.post_process(traj, list(traj.current_results))
+
+    def test_least_squares(self):
+        parameters = ClassicGDParameters(learning_rate=1., exploration_step_size=0.1, n_random_steps=8, n_iteration=2,
+                                         stop_criterion=np.inf, seed=1)
+        traj = Trajectory(name='test_gd')
+        optimizer = self.create_optimizer(traj, parameters)
+        self.assertEqual(len(optimizer.eval_pop), 9)
+        initial_individual = optimizer.current_individual.copy()
+        # The gradient of a linear fitness is exact
+        self.run_generation(traj, optimizer, lambda x: np.dot(self.slope, x))
+        np.testing.assert_allclose(optimizer.current_individual, initial_individual + self.slope)
+
+    def test_spsa(self):
+        parameters = ClassicGDParameters(learning_rate=1., exploration_step_size=0.1, n_random_steps=2000,
+                                         n_iteration=2, stop_criterion=np.inf, seed=1, spsa_enabled=True)
+        traj = Trajectory(name='test_gd')
+        optimizer = self.create_optimizer(traj, parameters)
+        self.assertEqual(len(optimizer.eval_pop), 4001)
+        initial_individual = optimizer.current_individual.copy()
+        # The antithetic pairs cancel the curvature, and the average over the pairs the other parameters
+        self.run_generation(traj, optimizer, lambda x: np.dot(self.slope, x) - np.sum(x ** 2))
+        gradient = self.slope - 2 * initial_individual
+        np.testing.assert_allclose(optimizer.current_individual, initial_individual + gradient, atol=0.5)
+
+    def test_spsa_bounded(self):
+        parameters = ClassicGDParameters(learning_rate=1., exploration_step_size=0.1, n_random_steps=2000,
+                                         n_iteration=2, stop_criterion=np.inf, seed=1, spsa_enabled=True)
+        traj = Trajectory(name='test_gd')
+        # Parameters on the bounds are only perturbed in one direction, and the last one not at all
+        optimizer = GradientDescentOptimizer(
+            traj, optimizee_create_individual=lambda: {'x': np.array([0., 0., 0.5, 1., 2.])},
+            optimizee_fitness_weights=(1.,), parameters=parameters,
+            optimizee_bounding_func=lambda individual: {'x': np.clip(individual['x'], 0., 1.)})
+        population = np.array([dict_to_list(individual) for individual in optimizer.eval_pop])
+        gradient = optimizer._estimate_gradient(traj, population, population.dot(self.slope))
+        np.testing.assert_allclose(gradient, [1., 2., 3., 4., 0.], atol=0.5)
+
+    def test_spsa_high_dimensional(self):
+        parameters = ClassicGDParameters(learning_rate=1e-4, exploration_step_size=0.01, n_random_steps=2,
+                                         n_iteration=101, stop_criterion=np.inf, seed=1, spsa_enabled=True)
+        traj = Trajectory(name='test_gd')
+        optimizer = self.create_optimizer(traj, parameters, dimension=10000)
+        # The number of evaluations does not depend on the dimension
+        self.assertEqual(len(optimizer.eval_pop), 5)
+        self.run_generation(traj, optimizer, lambda x: -np.sum(x ** 2))
+        initial_fitness = optimizer.current_fitness
+        for _ in range(100):
+            self.run_generation(traj, optimizer, lambda x: -np.sum(x ** 2))
+        self.assertGreater(optimizer.current_fitness, 0.99 * initial_fitness)
+
+
 def suite():
-    suite = unittest.makeSuite(GDOptimizerTestCase, 'test')
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(GDOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(GradientEstimationTestCase, 'test'))
     return suite
 
 
@@ -0,0 +1,148 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from l2l import DummyTrajectory
+from l2l.optimizees.mnist import MNISTOptimizee, MNISTOptimizeeParameters
+from l2l.optimizers.evolutionstrategies import EvolutionStrategiesOptimizer, EvolutionStrategiesParameters
+from l2l.utils.individual import Individual
+from l2l.utils.trajectory import Trajectory
+
+
+class MNISTOptimizeeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.random_state = np.random.RandomState(0)
+        self.parameters = MNISTOptimizeeParameters(n_hidden=5, seed=1, use_small_mnist=True,
+                                                   data_path=self.data_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+
+    def test_dataset_cache(self):
+        optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters)
+        self.assertEqual(sorted(os.listdir(self.data_path)),
+                         ['small-mnist-images-float64.npy', 'small-mnist-targets.npy'])
+        self.assertIsInstance(optimizee.data_images, np.memmap)
+
+        uncached_optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters._replace(data_path=None))
+        np.testing.assert_array_equal(optimizee.data_images, uncached_optimizee.data_images)
+        np.testing.assert_array_equal(optimizee.data_targets, uncached_optimizee.data_targets)
+
+    def test_pickle_without_data(self):
+        optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters)
+        pickled_optimizee = pickle.dumps(optimizee)
+        self.assertLess(len(pickled_optimizee), optimizee.data_images.nbytes)
+
+        unpickled_optimizee = pickle.loads(pickled_optimizee)
+        np.testing.assert_array_equal(unpickled_optimizee.data_images, optimizee.data_images)
+        np.testing.assert_array_equal(unpickled_optimizee.data_targets, optimizee.data_targets)
+
+    def test_score_batch(self):
+        optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters)
+        population = np.array([optimizee.create_individual()['weights'] for _ in range(7)])
+        individuals = []
+        single_scores = []
+        for ind_idx, weights in enumerate(population):
+            individual = Individual(0, ind_idx, [])
+            individual.f_add_parameter('individual.weights', weights)
+            individuals.append(individual)
+            traj = DummyTrajectory()
+            traj.individual = individual
+            single_scores.append(optimizee.simulate(traj))
+
+        np.testing.assert_allclose(optimizee.simulate_batch(DummyTrajectory(), individuals), single_scores)
+        # Chunks of a single weight set give the same scores
+        chunked_scores = optimizee.nn.score_batch(population, optimizee.data_images, optimizee.data_targets,
+                                                  max_chunk_bytes=1)
+        np.testing.assert_allclose(chunked_scores, single_scores)
+
+    def test_minibatch(self):
+        optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters._replace(minibatch_size=100))
+        indices = optimizee.get_minibatch_indices(generation=3)
+        self.assertEqual(len(np.unique(indices)), 100)
+        # All the runs (e.g. in different workers) of a generation use the same minibatch
+        other_optimizee = pickle.loads(pickle.dumps(optimizee))
+        np.testing.assert_array_equal(other_optimizee.get_minibatch_indices(generation=3), indices)
+        self.assertFalse(np.array_equal(optimizee.get_minibatch_indices(generation=4), indices))
+
+        fixed_optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters._replace(minibatch_size=100,
+                                                                                     minibatch_policy='fixed'))
+        np.testing.assert_array_equal(fixed_optimizee.get_minibatch_indices(generation=3),
+                                      fixed_optimizee.get_minibatch_indices(generation=4))
+
+        individual = Individual(3, 0, [])
+        individual.f_add_parameter('individual.weights', optimizee.create_individual()['weights'])
+        traj = DummyTrajectory()
+        traj.individual = individual
+        self.assertEqual(optimizee.simulate(traj), optimizee.simulate_batch(traj, [individual])[0])
+
+    def test_float32_ranking(self):
+        # The same ES population, sampled and scored in float32 and in float64, is ranked (almost) identically
+        scores = {}
+        for dtype in ['float64', 'float32']:
+            traj = Trajectory(name='test_{}'.format(dtype))
+            optimizee = MNISTOptimizee(traj, self.parameters._replace(dtype=dtype))
+            optimizer_parameters = EvolutionStrategiesParameters(
+                learning_rate=0.1, noise_std=0.1, mirrored_sampling_enabled=True, fitness_shaping_enabled=True,
+                pop_size=20, n_iteration=1, stop_criterion=np.inf, seed=1, dtype=dtype)
+            optimizer = EvolutionStrategiesOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                                     optimizee_fitness_weights=(1.,), parameters=optimizer_parameters,
+                                                     optimizee_bounding_func=optimizee.bounding_func)
+            self.assertEqual(optimizer.eval_pop_arr.dtype, np.dtype(dtype))
+            scores[dtype] = optimizee.simulate_batch(traj, traj.individuals[0])
+
+        np.testing.assert_allclose(scores['float32'], scores['float64'], atol=2. / optimizee.n_images)
+        np.testing.assert_array_equal(np.argsort(scores['float32'], kind='stable'),
+                                      np.argsort(scores['float64'], kind='stable'))
+
+    def test_activation_cache(self):
+        optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters._replace(activation_cache_bytes=2 ** 20))
+        uncached_optimizee = MNISTOptimizee(DummyTrajectory(), self.parameters)
+        n_hidden_weights = optimizee.nn.n_hidden * optimizee.nn.n_input
+        weights = optimizee.create_individual()['weights']
+        # Weight sets which only differ in their output weights share the hidden activations
+        population = np.tile(weights, (5, 1))
+        population[:, n_hidden_weights:] += self.random_state.randn(5, len(weights) - n_hidden_weights)
+
+        scores = optimizee.nn.score_batch(population, optimizee.data_images, optimizee.data_targets)
+        np.testing.assert_array_equal(
+            scores, uncached_optimizee.nn.score_batch(population, optimizee.data_images, optimizee.data_targets))
+        self.assertEqual(len(optimizee.nn.activation_cache), 1)
+        self.assertEqual(optimizee.nn.activation_cache.n_misses, 5)
+
+        optimizee.nn.score_batch(population, optimizee.data_images, optimizee.data_targets)
+        self.assertEqual(optimizee.nn.activation_cache.n_hits, 5)
+        # Different inputs invalidate the cache
+        optimizee.nn.score_batch(population, optimizee.data_images[:10], optimizee.data_targets[:10])
+        self.assertEqual(optimizee.nn.activation_cache.n_hits, 5)
+
+    def test_activation_cache_eviction(self):
+        activation_bytes = 5 * 1797 * 8
+        optimizee = MNISTOptimizee(DummyTrajectory(),
+                                   self.parameters._replace(activation_cache_bytes=2 * activation_bytes))
+        population = np.array([optimizee.create_individual()['weights'] for _ in range(3)])
+        optimizee.nn.score_batch(population, optimizee.data_images, optimizee.data_targets)
+        self.assertEqual(len(optimizee.nn.activation_cache), 2)
+        # The least recently used activations (of the first weight set) were evicted
+        optimizee.nn.score_batch(population[1:], optimizee.data_images, optimizee.data_targets)
+        self.assertEqual(optimizee.nn.activation_cache.n_hits, 2)
+        self.assertEqual(len(pickle.loads(pickle.dumps(optimizee)).nn.activation_cache), 0)
+
+
+def suite():
+    suite = unittest.makeSuite(MNISTOptimizeeTestCase, 'test')
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,313 @@
+import random
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from deap import base, creator, tools
+from l2l.tests.test_optimizer import OptimizerTestCase
+from l2l.optimizers.evolution import GeneticAlgorithmParameters, NumpyGeneticAlgorithmOptimizer, \
+    IslandGeneticAlgorithmOptimizer, IslandGeneticAlgorithmParameters, SteadyStateGeneticAlgorithmOptimizer
+from l2l.utils.environment import Environment
+from l2l.utils.trajectory import Trajectory
+
+
+class NumpyGAOptimizerTestCase(OptimizerTestCase):
+
+    def test_setup(self):
+
+        optimizer_parameters = GeneticAlgorithmParameters(seed=0, popsize=1, CXPB=0.5,
+                                                          MUTPB=0.3, NGEN=1, indpb=0.02,
+                                                          tournsize=1, matepar=0.5,
+                                                          mutpar=1
+                                                          )
+
+        optimizer = NumpyGeneticAlgorithmOptimizer(self.trajectory,
+                                                   optimizee_create_individual=self.optimizee.create_individual,
+                                                   optimizee_fitness_weights=(-0.1,),
+                                                   parameters=optimizer_parameters)
+
+        self.assertIsNotNone(optimizer.parameters)
+        try:
+
+            self.experiment.run_experiment(optimizee=self.optimizee,
+                                           optimizee_parameters=self.optimizee_parameters,
+                                           optimizer=optimizer,
+                                           optimizer_parameters=optimizer_parameters)
+        except Exception as e:
+            self.fail(repr(e))
+        best = self.experiment.optimizer.best_individual['coords']
+        self.assertAlmostEqual(best[0], -4.998856251826551, places=6)
+        self.assertAlmostEqual(best[1], -1.9766742736816023, places=6)
+        self.experiment.end_experiment(optimizer)
+
+
+class NumpyGAOperatorsTestCase(unittest.TestCase):
+    """
+    Compares the statistics of the vectorised operators with the DEAP operators used by the
+    :class:`~l2l.optimizers.evolution.GeneticAlgorithmOptimizer`
+    """
+
+    def setUp(self):
+        self.parameters = GeneticAlgorithmParameters(seed=0, popsize=200, CXPB=0.5, MUTPB=0.3, NGEN=10, indpb=0.5,
+                                                     tournsize=3, matepar=0.5, mutpar=1.)
+        self.optimizer = NumpyGeneticAlgorithmOptimizer(
+            Trajectory(name='test_numpy_ga'), optimizee_create_individual=lambda: {'coords': np.zeros(2)},
+            optimizee_fitness_weights=(1.,), parameters=self.parameters)
+        random.seed(0)
+        creator.create("FitnessMax", base.Fitness, weights=(1.,))
+        creator.create("Individual", list, fitness=creator.FitnessMax)
+
+    def test_tournament_selection(self):
+        pop_size = 10
+        self.optimizer.pop = np.arange(pop_size, dtype=float)[:, np.newaxis]
+        self.optimizer.pop_fitness = np.arange(pop_size, dtype=float)
+        deap_population = []
+        for fitness in range(pop_size):
+            individual = creator.Individual([fitness])
+            individual.fitness.values = (fitness,)
+            deap_population.append(individual)
+
+        n_selections = 20000
+        counts = np.bincount(self.optimizer._select(n_selections, 3), minlength=pop_size) / n_selections
+        deap_counts = np.bincount([int(ind[0]) for ind in tools.selTournament(deap_population, n_selections, 3)],
+                                  minlength=pop_size) / n_selections
+        expected_counts = ((np.arange(pop_size) + 1.) ** 3 - np.arange(pop_size) ** 3) / pop_size ** 3
+        np.testing.assert_allclose(counts, expected_counts, atol=0.01)
+        np.testing.assert_allclose(deap_counts, expected_counts, atol=0.01)
+
+    def test_blend_crossover(self):
+        n_pairs = 10000
+        parents = np.tile([[0., 1.], [1., 3.]], (n_pairs, 1))
+        offspring = parents.copy()
+        changed = np.zeros(len(offspring), dtype=bool)
+        self.optimizer._mate(offspring, changed, 1., 0.5)
+        self.assertTrue(np.all(changed))
+
+        deap_offspring = []
+        for _ in range(n_pairs):
+            child1, child2 = tools.cxBlend([0., 1.], [1., 3.], alpha=0.5)
+            deap_offspring.extend([child1, child2])
+        deap_offspring = np.array(deap_offspring)
+        np.testing.assert_allclose(np.mean(offspring, axis=0), np.mean(deap_offspring, axis=0), atol=0.03)
+        np.testing.assert_allclose(np.std(offspring, axis=0), np.std(deap_offspring, axis=0), atol=0.03)
+
+    def test_gaussian_mutation(self):
+        offspring = np.zeros((10000, 4))
+        changed = np.zeros(len(offspring), dtype=bool)
+        mutant_mask = np.arange(len(offspring)) % 2 == 0
+        self.optimizer._mutate(offspring, changed, mutant_mask, 0.5, 2.)
+        np.testing.assert_array_equal(changed, mutant_mask)
+        self.assertTrue(np.all(offspring[~mutant_mask] == 0.))
+        mutated_genes = offspring[mutant_mask] != 0.
+        self.assertAlmostEqual(np.mean(mutated_genes), 0.5, delta=0.02)
+        self.assertAlmostEqual(np.std(offspring[mutant_mask][mutated_genes]), 2., delta=0.05)
+
+    def test_only_changed_offspring_are_evaluated(self):
+        traj = Trajectory(name='test_numpy_ga')
+        random_state = np.random.RandomState(0)
+        optimizer = NumpyGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(3)},
+            optimizee_fitness_weights=(-1.,), parameters=self.parameters._replace(popsize=20))
+        for generation in range(5):
+            individuals = traj.individuals[generation]
+            self.assertEqual(len(individuals), len(optimizer.eval_pop_indices))
+            traj.current_results = [(individual.ind_idx, (np.sum(individual.coords ** 2),))
+                                    for individual in individuals]
+            optimizer.post_process(traj, list(traj.current_results))
+            self.assertTrue(np.all(np.delete(optimizer.pop_evaluated, optimizer.eval_pop_indices)))
+        self.assertEqual(len(np.unique(optimizer.hall_of_fame, axis=0)), len(optimizer.hall_of_fame))
+        self.assertTrue(np.all(np.diff(optimizer.hall_of_fame_fitness) <= 0))
+
+    def test_nan_fitness(self):
+        traj = Trajectory(name='test_numpy_ga')
+        random_state = np.random.RandomState(0)
+        optimizer = NumpyGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(3)},
+            optimizee_fitness_weights=(-1.,), parameters=self.parameters._replace(popsize=20))
+        for generation in range(5):
+            # The optimizee fails (returns NaN) for a part of the parameter space
+            traj.current_results = [(individual.ind_idx, (np.nan if individual.coords[0] > 1. else
+                                                          np.sum(individual.coords ** 2),))
+                                    for individual in traj.individuals[generation]]
+            optimizer.post_process(traj, list(traj.current_results))
+            # Individuals with a NaN fitness are ranked last
+            self.assertLessEqual(optimizer.best_individual['coords'][0], 1.)
+            self.assertLessEqual(optimizer.hall_of_fame[0, 0], 1.)
+            self.assertFalse(np.isnan(optimizer.hall_of_fame_fitness[0]))
+        self.assertLess(np.mean(optimizer.pop[:, 0] > 1.), 0.5)
+
+    def test_unchanged_offspring(self):
+        traj = Trajectory(name='test_numpy_ga')
+        random_state = np.random.RandomState(0)
+        optimizer = NumpyGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+            optimizee_fitness_weights=(1.,),
+            parameters=self.parameters._replace(seed=1, popsize=4, CXPB=0., MUTPB=0., tournsize=1))
+        for generation in range(5):
+            # Without crossover and mutation the offspring are copies of evaluated parents, but every generation still
+            # has at least one individual to evaluate
+            self.assertGreater(len(traj.individuals[generation]), 0)
+            traj.current_results = [(individual.ind_idx, (np.sum(individual.coords),))
+                                    for individual in traj.individuals[generation]]
+            optimizer.post_process(traj, list(traj.current_results))
+
+
+class IslandGATestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.parameters = IslandGeneticAlgorithmParameters(
+            seed=0, popsize=4, CXPB=0.5, MUTPB=0.3, NGEN=10, indpb=0.5, tournsize=3, matepar=0.5, mutpar=1.,
+            n_islands=3, migration_interval=2, migration_size=1)
+
+    def create_optimizer(self, traj, **kwargs):
+        random_state = np.random.RandomState(0)
+        return IslandGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(1)},
+            optimizee_fitness_weights=(1.,), parameters=self.parameters._replace(**kwargs))
+
+    def test_islands(self):
+        traj = Trajectory(name='test_island_ga')
+        optimizer = self.create_optimizer(traj)
+        # All islands are evaluated in one generation
+        self.assertEqual(len(traj.individuals[0]), 12)
+        self.assertEqual(traj.n_islands, 3)
+
+        optimizer.pop_fitness = np.arange(12.)
+        # Selection and mating stay within the islands
+        self.assertTrue(np.all(optimizer._select(12, 3) // 4 == np.arange(12) // 4))
+        first, second = optimizer._get_mating_pairs(12)
+        np.testing.assert_array_equal(first // 4, second // 4)
+        self.assertEqual(len(first), 6)
+
+    def test_migration(self):
+        traj = Trajectory(name='test_island_ga')
+        optimizer = self.create_optimizer(traj)
+        optimizer.pop = np.arange(12.)[:, np.newaxis]
+        optimizer.pop_fitness = np.arange(12.)
+        # No migration in the first generation of the interval
+        optimizer._update_population(traj)
+        np.testing.assert_array_equal(optimizer.pop_fitness, np.arange(12.))
+        # The best individual of each island replaces the worst individual of the next island
+        optimizer.g = 1
+        optimizer._update_population(traj)
+        np.testing.assert_array_equal(optimizer.pop_fitness, [11, 1, 2, 3, 3, 5, 6, 7, 7, 9, 10, 11])
+        np.testing.assert_array_equal(optimizer.pop.ravel(), optimizer.pop_fitness)
+
+        traj = Trajectory(name='test_island_ga')
+        optimizer = self.create_optimizer(traj, n_islands=5, migration_topology='random')
+        for _ in range(10):
+            targets = optimizer._get_migration_targets(traj)
+            # Every island sends to and receives from exactly one other island
+            self.assertTrue(np.all(targets != np.arange(5)))
+            np.testing.assert_array_equal(np.sort(targets), np.arange(5))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_island_ga'), migration_size=5)
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_island_ga'), migration_topology='star')
+
+
+class SteadyStateGATestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.parameters = GeneticAlgorithmParameters(seed=0, popsize=10, CXPB=0.5, MUTPB=0.3, NGEN=5, indpb=0.5,
+                                                     tournsize=3, matepar=0.5, mutpar=1.)
+
+    def create_optimizer(self, traj):
+        random_state = np.random.RandomState(0)
+        return SteadyStateGeneticAlgorithmOptimizer(
+            traj, optimizee_create_individual=lambda: {'coords': random_state.randn(2)},
+            optimizee_fitness_weights=(-1.,), parameters=self.parameters)
+
+    def test_ask_tell(self):
+        optimizer = self.create_optimizer(Trajectory(name='test_steady_state_ga'))
+        # The initial population is handed out first
+        initial_individuals = optimizer.ask(10)
+        np.testing.assert_array_equal([individual['coords'] for individual in initial_individuals], optimizer.pop)
+        optimizer.tell(initial_individuals, [(np.sum(individual['coords'] ** 2),)
+                                             for individual in initial_individuals])
+        self.assertTrue(np.all(optimizer.pop_evaluated))
+
+        # A better child replaces the worst individual, a worse child is discarded
+        worst_fitness = np.min(optimizer.pop_fitness)
+        child, = optimizer.ask(1)
+        optimizer.tell([child], [(0.,)])
+        self.assertTrue(np.any(np.all(optimizer.pop == child['coords'], axis=1)))
+        self.assertNotIn(worst_fitness, optimizer.pop_fitness)
+        child, = optimizer.ask(1)
+        optimizer.tell([child], [(np.inf,)])
+        self.assertFalse(np.any(np.all(optimizer.pop == child['coords'], axis=1)))
+        self.assertEqual(optimizer.hall_of_fame_fitness[0], 0.)
+
+        # At most NGEN * popsize individuals are handed out
+        self.assertEqual(len(optimizer.ask(100)), 38)
+        self.assertEqual(optimizer.ask(1), [])
+
+    def test_nan_fitness(self):
+        optimizer = self.create_optimizer(Trajectory(name='test_steady_state_ga'))
+        initial_individuals = optimizer.ask(10)
+        # The optimizee fails (returns NaN) for half of the individuals, which are ranked last
+        fitnesses = [(np.nan if i % 2 else np.sum(individual['coords'] ** 2),)
+                     for i, individual in enumerate(initial_individuals)]
+        optimizer.tell(initial_individuals, fitnesses)
+        self.assertTrue(np.all(optimizer.pop_evaluated))
+        self.assertFalse(np.any(np.isnan(optimizer.pop_fitness)))
+        best = np.argmin([fitness[0] for fitness in fitnesses[::2]]) * 2
+        np.testing.assert_array_equal(optimizer.best_individual['coords'], initial_individuals[best]['coords'])
+        self.assertEqual(optimizer.hall_of_fame_fitness[0], -fitnesses[best][0])
+
+        # Even a bad child replaces an individual whose fitness is NaN
+        child, = optimizer.ask(1)
+        optimizer.tell([child], [(1e6,)])
+        self.assertTrue(np.any(np.all(optimizer.pop == child['coords'], axis=1)))
+        self.assertEqual(np.sum(optimizer.pop_fitness == -np.inf), 4)
+
+    def test_synchronous_run(self):
+        traj = Trajectory(name='test_steady_state_ga')
+        optimizer = self.create_optimizer(traj)
+        for generation in range(self.parameters.NGEN):
+            individuals = traj.individuals[generation]
+            self.assertEqual(len(individuals), self.parameters.popsize)
+            traj.current_results = [(individual.ind_idx, (np.sum(individual.coords ** 2),))
+                                    for individual in individuals]
+            optimizer.post_process(traj, list(traj.current_results))
+        self.assertEqual(optimizer.n_told, self.parameters.NGEN * self.parameters.popsize)
+        self.assertTrue(np.all(optimizer.pop_evaluated))
+        self.assertEqual(optimizer.hall_of_fame_fitness[0], np.max(optimizer.pop_fitness))
+
+    def test_run_asynchronously(self):
+        environment = Environment(trajectory='test_steady_state_ga', multiprocessing=False)
+        optimizer = self.create_optimizer(environment.trajectory)
+
+        def simulate(traj):
+            time.sleep(0.001 * (traj.individual.ind_idx % 3))
+            return (np.sum(traj.individual.coords ** 2),)
+
+        with self.assertRaises(ValueError):
+            # The number of workers of an executor has to be given explicitly
+            environment.run_asynchronously(simulate, optimizer, executor=ThreadPoolExecutor(4))
+        results = environment.run_asynchronously(simulate, optimizer, n_workers=4, executor=ThreadPoolExecutor(4))
+        self.assertEqual(len(results), self.parameters.NGEN * self.parameters.popsize)
+        self.assertEqual(sorted(ind_idx for ind_idx, _ in results), list(range(len(results))))
+        self.assertEqual(optimizer.n_told, len(results))
+        self.assertEqual(optimizer.hall_of_fame_fitness[0], -min(fitness[0] for _, fitness in results))
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(NumpyGAOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(NumpyGAOperatorsTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(IslandGATestCase, 'test'))
+    suite.addTest(unittest.makeSuite(SteadyStateGATestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+from l2l.tests.test_optimizer import OptimizerTestCase
+from l2l.optimizers.particleswarm import ParticleSwarmOptimizer, ParticleSwarmParameters
+from l2l.utils.trajectory import Trajectory
+
+
+class PSOOptimizerTestCase(OptimizerTestCase):
+
+    def test_setup(self):
+
+        optimizer_parameters = ParticleSwarmParameters(
+            pop_size=4,
+            inertia=0.7,
+            cognitive_coefficient=1.5,
+            social_coefficient=1.5,
+            n_iteration=1,
+            stop_criterion=np.inf,
+            seed=1)
+
+        optimizer = ParticleSwarmOptimizer(
+            self.trajectory,
+            optimizee_create_individual=self.optimizee.create_individual,
+            optimizee_fitness_weights=(-0.1,),
+            parameters=optimizer_parameters,
+            optimizee_bounding_func=self.optimizee.bounding_func)
+
+        self.assertIsNotNone(optimizer.parameters)
+        try:
+
+            self.experiment.run_experiment(optimizee=self.optimizee,
+                                           optimizee_parameters=self.optimizee_parameters,
+                                           optimizer=optimizer,
+                                           optimizer_parameters=optimizer_parameters)
+        except Exception as e:
+            self.fail(e.__name__)
+        best = self.experiment.optimizer.best_individual['coords']
+        self.assertAlmostEqual(best[0], -3.137397886223291)
+        self.assertAlmostEqual(best[1], -1.5443927295695223)
+        self.experiment.end_experiment(optimizer)
+
+
+class PSOSwarmTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.random_state = np.random.RandomState(0)
+
+    def create_individual(self):
+        return {'coords': self.random_state.uniform(-5, 5, size=3)}
+
+    def create_optimizer(self, traj, **kwargs):
+        parameters = ParticleSwarmParameters(pop_size=10, inertia=0.7, cognitive_coefficient=1.5,
+                                             social_coefficient=1.5, n_iteration=100, stop_criterion=np.inf,
+                                             seed=1)._replace(**kwargs)
+        return ParticleSwarmOptimizer(traj, optimizee_create_individual=self.create_individual,
+                                      optimizee_fitness_weights=(-1.,), parameters=parameters)
+
+    def test_neighbourhood_best(self):
+        traj = Trajectory(name='test_pso')
+        optimizer = self.create_optimizer(traj, pop_size=6, topology='ring', neighbourhood_size=1)
+        optimizer.personal_best_fitness = np.array([5., 1., 2., 0., 3., 4.])
+        np.testing.assert_array_equal(optimizer._get_neighbourhood_best_indices(traj), [0, 0, 2, 4, 5, 0])
+
+        traj = Trajectory(name='test_pso')
+        optimizer = self.create_optimizer(traj, pop_size=6, topology='global')
+        optimizer.personal_best_fitness = np.array([5., 1., 2., 0., 3., 4.])
+        np.testing.assert_array_equal(optimizer._get_neighbourhood_best_indices(traj), np.zeros(6))
+
+    def test_optimization(self):
+        for topology in ['global', 'ring']:
+            traj = Trajectory(name='test_pso')
+            optimizer = self.create_optimizer(traj, topology=topology, max_velocity=1.)
+            for generation in range(50):
+                individuals = traj.individuals[generation]
+                traj.current_results = [(individual.ind_idx, (np.sum(individual.coords ** 2),))
+                                        for individual in individuals]
+                previous_fitness = optimizer.personal_best_fitness.copy()
+                optimizer.post_process(traj, list(traj.current_results))
+                # The personal bests never get worse, and the velocities are clipped
+                self.assertTrue(np.all(optimizer.personal_best_fitness >= previous_fitness))
+                self.assertLessEqual(np.max(np.abs(optimizer.velocities)), 1.)
+            self.assertGreater(optimizer.best_fitness, -1e-3)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_pso'), topology='star')
+        with self.assertRaises(ValueError):
+            self.create_optimizer(Trajectory(name='test_pso'), topology='ring', neighbourhood_size=10)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(PSOOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(PSOSwarmTestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
@@ -4,6 +4,7 @@ from l2l.tests.test_optimizer import OptimizerTestCase
 import numpy as np
 from l2l.optimizers.paralleltempering.optimizer import AvailableCoolingSchedules
 from l2l.optimizers.paralleltempering.optimizer import ParallelTemperingParameters, ParallelTemperingOptimizer
+from l2l.utils.trajectory import Trajectory
 
 
 class PTOptimizerTestCase(OptimizerTestCase):
@@ -48,8 +49,60 @@ class PTOptimizerTestCase(OptimizerTestCase):
         except Exception as e:
             self.fail(e.__name__)
 
+
+class ReplicaExchangeTestCase(unittest.TestCase):
+
+    def create_optimizer(self, traj, n_parallel_runs, cooling_schedules, temperature_bounds, decay_parameter=1.):
+        random_state = np.random.RandomState(0)
+        parameters = ParallelTemperingParameters(n_parallel_runs=n_parallel_runs, noisy_step=.3, n_iteration=20,
+                                                 stop_criterion=np.inf, seed=1, cooling_schedules=cooling_schedules,
+                                                 temperature_bounds=temperature_bounds,
+                                                 decay_parameters=np.full(n_parallel_runs, decay_parameter))
+        return ParallelTemperingOptimizer(traj, optimizee_create_individual=lambda: {'x': random_state.randn(3)},
+                                          optimizee_fitness_weights=(-1.,), parameters=parameters)
+
+    def run_generation(self, traj, optimizer, fitness_function):
+        traj.current_results = [(individual.ind_idx, (fitness_function(individual.x),))
+                                for individual in traj.individuals[optimizer.g]]
+        optimizer.post_process(traj, list(traj.current_results))
+
+    def test_adjacent_swaps(self):
+        traj = Trajectory(name='test_pt')
+        temperature_bounds = np.array([[4., 0.], [3., 0.], [2., 0.], [1., 0.]])
+        optimizer = self.create_optimizer(traj, 4, [AvailableCoolingSchedules.DEFAULT] * 4, temperature_bounds)
+        # With equal fitnesses, all pairs of adjacent temperatures are swapped, alternately starting from the lowest
+        # and the second lowest temperature
+        expected_parallel_indices = [[1, 0, 3, 2], [2, 0, 3, 1], [3, 1, 2, 0]]
+        for parallel_indices in expected_parallel_indices:
+            self.run_generation(traj, optimizer, lambda x: 0.)
+            np.testing.assert_array_equal(optimizer.parallel_indices, parallel_indices)
+        np.testing.assert_array_equal(optimizer.T_all, temperature_bounds[:, 0])
+
+    def test_reproducibility(self):
+        cooling_schedules = [AvailableCoolingSchedules.EXPONENTIAL_ADDAPTIVE,
+                             AvailableCoolingSchedules.LINEAR_ADDAPTIVE,
+                             AvailableCoolingSchedules.EXPONENTIAL] * 100
+        temperature_bounds = np.column_stack((np.linspace(1., 0.5, 300), np.full(300, 0.1)))
+        np.random.seed(0)
+        global_state = np.random.get_state()[1].copy()
+        results = []
+        for _ in range(2):
+            traj = Trajectory(name='test_pt')
+            optimizer = self.create_optimizer(traj, 300, cooling_schedules, temperature_bounds, decay_parameter=0.99)
+            for _ in range(5):
+                self.run_generation(traj, optimizer, lambda x: np.sum(x ** 2))
+            results.append((optimizer.current_individuals, optimizer.parallel_indices, optimizer.T_all))
+        for first_result, second_result in zip(*results):
+            np.testing.assert_array_equal(first_result, second_result)
+        # The schedules have been cooled by group, and the global random state is not used
+        np.testing.assert_allclose(optimizer.T_all[2::3], temperature_bounds[2::3, 0] * 0.99 ** 5)
+        np.testing.assert_array_equal(np.random.get_state()[1], global_state)
+
+
 def suite():
-    suite = unittest.makeSuite(PTOptimizerTestCase, 'test')
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(PTOptimizerTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(ReplicaExchangeTestCase, 'test'))
     return suite
 
 
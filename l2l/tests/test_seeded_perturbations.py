@@ -0,0 +1,138 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from l2l import dict_to_list
+from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
+from l2l.optimizees.functions.optimizee import FunctionGeneratorOptimizee
+from l2l.optimizers.evolutionstrategies import EvolutionStrategiesOptimizer, EvolutionStrategiesParameters
+from l2l.optimizers.naturalevolutionstrategies import NaturalEvolutionStrategiesOptimizer, \
+    NaturalEvolutionStrategiesParameters
+from l2l.optimizers.seeded_perturbations import NoiseTable, SeededPerturbationEncoding
+from l2l.utils.trajectory import Trajectory
+
+
+class SeededPerturbationsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoding = SeededPerturbationEncoding(mean=np.arange(3.), scale=0.5, dict_spec=dict_to_list(
+            {'coords': np.zeros(3)}, get_dict_spec=True)[1])
+
+    def test_decode(self):
+        noise = np.random.RandomState(42).randn(3)
+        np.testing.assert_allclose(self.encoding.decode(42, -1), np.arange(3.) - 0.5 * noise)
+        np.testing.assert_allclose(self.encoding.decode_individual(42, 1)['coords'], np.arange(3.) + 0.5 * noise)
+        np.testing.assert_allclose(self.encoding.decode(42, 0), np.arange(3.))
+
+    def test_weighted_noise_sums(self):
+        seeds, signs = np.array([1, 2, 1]), np.array([1, 1, -1])
+        coefficients = np.array([0.3, -0.2, 0.6])
+        noise = np.array([np.random.RandomState(seed).randn(3) for seed in seeds])
+        weighted_sum, weighted_squared_sum = self.encoding.get_weighted_noise_sums(
+            seeds, coefficients * signs, squared_coefficients=coefficients)
+        np.testing.assert_allclose(weighted_sum, np.dot(coefficients, signs[:, np.newaxis] * noise))
+        np.testing.assert_allclose(weighted_squared_sum, np.dot(coefficients, noise ** 2))
+
+    def test_es_seeded_individuals(self):
+        (_, benchmark_function), _ = BenchmarkedFunctions().get_function_by_name('Rastrigin2d')
+        traj = Trajectory(name='test_seeded')
+        optimizee = FunctionGeneratorOptimizee(traj, benchmark_function, seed=1)
+        parameters = EvolutionStrategiesParameters(
+            learning_rate=0.1, noise_std=0.1, mirrored_sampling_enabled=True, fitness_shaping_enabled=False,
+            pop_size=5, n_iteration=2, stop_criterion=np.inf, seed=1, seeded_perturbations_enabled=True)
+        optimizer = EvolutionStrategiesOptimizer(traj, optimizee_create_individual=optimizee.create_individual,
+                                                 optimizee_fitness_weights=(-1.,), parameters=parameters,
+                                                 optimizee_bounding_func=optimizee.bounding_func)
+        individuals = traj.individuals[0]
+        self.assertEqual(len(individuals), 11)
+        # The individuals are decoded from the shared encoding, also after pickling
+        individual = pickle.loads(pickle.dumps(individuals[7]))
+        np.testing.assert_allclose(individual.coords, optimizer.current_encoding.decode(
+            individual.noise_seed, individual.noise_sign))
+        np.testing.assert_allclose(individuals[-1].coords, optimizer.current_individual_arr)
+
+        perturbations = np.array([optimizer.current_encoding.decode(ind.noise_seed, ind.noise_sign)
+                                  for ind in individuals[:-1]]) - optimizer.current_individual_arr
+        initial_individual = optimizer.current_individual_arr.copy()
+        fitnesses = np.arange(11.)
+        traj.current_results = [(ind.ind_idx, (fitness,)) for ind, fitness in zip(individuals, fitnesses)]
+        optimizer.post_process(traj, list(traj.current_results))
+        # The update regenerated from the seeds matches the one computed from the explicit perturbations
+        expected_update = 0.1 * np.dot(-fitnesses[:-1], perturbations) / (10 * 0.1 ** 2)
+        np.testing.assert_allclose(optimizer.current_individual_arr - initial_individual, expected_update)
+
+
+class NoiseTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.data_path = tempfile.mkdtemp()
+        self.noise_table = NoiseTable(os.path.join(self.data_path, 'noise.npy'), size=10000, seed=1)
+        (_, benchmark_function), _ = BenchmarkedFunctions().get_function_by_name('Rastrigin2d')
+        self.traj = Trajectory(name='test_noise_table')
+        self.optimizee = FunctionGeneratorOptimizee(self.traj, benchmark_function, seed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+
+    def test_noise_table(self):
+        self.assertEqual(len(self.noise_table), 10000)
+        self.assertEqual(self.noise_table.noise.dtype, np.float32)
+        self.assertLess(abs(np.mean(self.noise_table.noise)), 0.05)
+        # Only the path is pickled, and the table is reopened from the file
+        pickled_noise_table = pickle.dumps(self.noise_table)
+        self.assertLess(len(pickled_noise_table), 1000)
+        np.testing.assert_array_equal(pickle.loads(pickled_noise_table).get(5, 10), self.noise_table.get(5, 10))
+        offsets = self.noise_table.sample_offsets(np.random.RandomState(0), 100, 5000)
+        self.assertTrue(np.all((offsets >= 0) & (offsets <= 5000)))
+        with self.assertRaises(ValueError):
+            self.noise_table.sample_offsets(np.random.RandomState(0), 1, 10001)
+
+    def test_es_noise_table(self):
+        for seeded_perturbations_enabled in [False, True]:
+            parameters = EvolutionStrategiesParameters(
+                learning_rate=0.1, noise_std=0.1, mirrored_sampling_enabled=False, fitness_shaping_enabled=True,
+                pop_size=5, n_iteration=2, stop_criterion=np.inf, seed=1,
+                seeded_perturbations_enabled=seeded_perturbations_enabled, noise_table=self.noise_table)
+            optimizer = EvolutionStrategiesOptimizer(
+                Trajectory(name='test_es'), optimizee_create_individual=self.optimizee.create_individual,
+                optimizee_fitness_weights=(-1.,), parameters=parameters)
+            if seeded_perturbations_enabled:
+                offsets = optimizer.current_noise_seeds
+                perturbations = np.array([ind['coords'] for ind in [optimizer.current_encoding.decode_individual(
+                    seed, sign) for seed, sign in zip(offsets, optimizer.current_noise_signs)]])
+                perturbations -= optimizer.current_individual_arr
+            else:
+                offsets = np.random.RandomState(1).randint(0, 10000 - 2 + 1, size=5)
+                perturbations = optimizer.current_perturbations
+            np.testing.assert_allclose(perturbations, 0.1 * self.noise_table.get_batch(offsets, 2), rtol=1e-6)
+
+    def test_nes_noise_table(self):
+        parameters = NaturalEvolutionStrategiesParameters(
+            learning_rate_mu=1., learning_rate_sigma=None, mu=np.zeros(2), sigma=np.ones(2),
+            mirrored_sampling_enabled=True, fitness_shaping_enabled=True, pop_size=5, n_iteration=2,
+            stop_criterion=np.inf, seed=1, noise_table=self.noise_table)
+        optimizer = NaturalEvolutionStrategiesOptimizer(
+            Trajectory(name='test_nes'), optimizee_create_individual=self.optimizee.create_individual,
+            optimizee_fitness_weights=(-1.,), parameters=parameters)
+        offsets = np.random.RandomState(1).randint(0, 10000 - 2 + 1, size=5)
+        np.testing.assert_array_equal(optimizer.current_perturbations[:5], self.noise_table.get_batch(offsets, 2))
+        np.testing.assert_array_equal(optimizer.current_perturbations[5:], -optimizer.current_perturbations[:5])
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(SeededPerturbationsTestCase, 'test'))
+    suite.addTest(unittest.makeSuite(NoiseTableTestCase, 'test'))
+    return suite
+
+
+def run():
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite())
+
+
+if __name__ == "__main__":
+    run()
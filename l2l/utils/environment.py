@@ -1,10 +1,28 @@
 from l2l.utils.trajectory import Trajectory
 from l2l.utils.JUBE_runner import JUBERunner
+from l2l.utils.individual import Individual
+from l2l.utils.groups import ResultGroup
+from l2l import get_grouped_dict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import copy
 import logging
+import os
+import time
 
 logger = logging.getLogger("utils.Environment")
 
 
+def _simulate_individual(runfunc, trajectory, individual):
+    """
+    Evaluates one individual in a worker of :meth:`Environment.run_asynchronously`
+    :return: Tuple of the fitness and of the duration of the evaluation in seconds
+    """
+    start_time = time.time()
+    trajectory.individual = individual
+    fitness = runfunc(trajectory)
+    return fitness, time.time() - start_time
+
+
 class Environment:
     """
     The Environment class takes the place of the pypet Environment and provides the required functionality
@@ -56,12 +74,19 @@ class Environment:
             else:
                 # Sequential calls to the runfunc in the optimizee
                 result[it] = []
-                # Call runfunc on each individual from the trajectory
+                # Call runfunc on each individual from the trajectory, or on the whole generation at once if the
+                # optimizee runfunc belongs to implements simulate_batch
                 try:
-                    for ind in self.trajectory.individuals[it]:
-                        self.trajectory.individual = ind
-                        result[it].append((ind.ind_idx, runfunc(self.trajectory)))
-                        self.run_id = self.run_id + 1
+                    individuals = self.trajectory.individuals[it]
+                    fitnesses = self._run_batch(runfunc, individuals)
+                    if fitnesses is not None:
+                        result[it] = [(ind.ind_idx, fitness) for ind, fitness in zip(individuals, fitnesses)]
+                        self.run_id = self.run_id + len(individuals)
+                    else:
+                        for ind in individuals:
+                            self.trajectory.individual = ind
+                            result[it].append((ind.ind_idx, runfunc(self.trajectory)))
+                            self.run_id = self.run_id + 1
                 except:
                     if self.logging:
                         logger.exception("Error during serial execution of individuals")
@@ -74,6 +99,102 @@ class Environment:
 
         return result
 
+    def run_asynchronously(self, runfunc, optimizer, n_workers=None, executor=None):
+        """
+        Runs the optimizees asynchronously, through the ask/tell interface of the optimizer (see
+        :meth:`~l2l.optimizers.optimizer.Optimizer.ask`). Up to `n_workers` evaluations are kept running: as soon as
+        one evaluation finishes, its fitness is passed to `optimizer.tell` and new individuals obtained from
+        `optimizer.ask` are submitted to the idle workers. The run ends when the optimizer has no more individuals to
+        evaluate (i.e. `optimizer.ask` returns an empty list) and all evaluations have finished.
+
+        Generational optimizers only hand out the individuals of the next generation once the whole current
+        generation is evaluated, while e.g. the
+        :class:`~l2l.optimizers.evolution.SteadyStateGeneticAlgorithmOptimizer` hands out a new individual for every
+        evaluation that finishes, instead of waiting for the slowest evaluation of a generation.
+
+        The individuals are evaluated on copies of the trajectory (without the history of the previous generations),
+        which are passed to the workers. The postprocessing function is not called (the optimizer calls its
+        `post_process` from `tell` as needed).
+
+        :param runfunc: The function to be called from the optimizee
+        :param optimizer: The :class:`~l2l.optimizers.optimizer.Optimizer`
+        :param n_workers: Number of concurrent evaluations, which should match the number of workers of `executor`.
+            Optional without `executor`, the number of CPUs by default
+        :param executor: (Optional) A :class:`concurrent.futures.Executor` to run the evaluations, which is shut down
+            at the end of the run. By default a :class:`~concurrent.futures.ProcessPoolExecutor` with `n_workers`
+            processes, in which case `runfunc` and the trajectory need to be picklable
+        :return: List of tuples of the index of each individual (in the order they were asked for) and its fitness,
+            in the order the evaluations finished
+        """
+        if executor is None:
+            n_workers = n_workers or os.cpu_count()
+            executor = ProcessPoolExecutor(max_workers=n_workers)
+        elif n_workers is None:
+            raise ValueError("n_workers has to be given together with an executor")
+
+        # The trajectory passed to the workers does not need the individuals and results of the previous generations
+        worker_trajectory = copy.copy(self.trajectory)
+        worker_trajectory.individuals = {}
+        worker_trajectory.results = ResultGroup()
+        worker_trajectory.current_results = {}
+
+        result = []
+        pending = {}
+        n_asked = 0
+        busy_time = 0.
+        start_time = time.time()
+
+        def submit(individual_dicts):
+            nonlocal n_asked
+            for individual_dict in individual_dicts:
+                individual = Individual(optimizer.g, n_asked, [])
+                for key, val in get_grouped_dict([individual_dict]).items():
+                    individual.f_add_parameter('individual.' + key, val[0])
+                future = executor.submit(_simulate_individual, runfunc, worker_trajectory, individual)
+                pending[future] = (individual, individual_dict)
+                n_asked += 1
+
+        try:
+            with executor:
+                submit(optimizer.ask(n_workers))
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        individual, individual_dict = pending.pop(future)
+                        fitness, duration = future.result()
+                        busy_time += duration
+                        result.append((individual.ind_idx, fitness))
+                        self.run_id = self.run_id + 1
+                        optimizer.tell([individual_dict], [fitness])
+                    submit(optimizer.ask(n_workers - len(pending)))
+        except Exception:
+            if self.logging:
+                logger.exception("Error during asynchronous execution of individuals")
+            raise
+
+        # The fraction of the time the workers spent evaluating individuals
+        utilisation = busy_time / (n_workers * (time.time() - start_time))
+        logger.info("Evaluated %d individuals asynchronously with %d workers (utilisation %.1f%%)",
+                    len(result), n_workers, 100. * utilisation)
+        self.trajectory.results.f_add_result_to_group("all_results", "asynchronous", result)
+        self.trajectory.results.f_add_result_to_group("all_results", "worker_utilisation", utilisation)
+        self.trajectory.current_results = result
+        return result
+
+    def _run_batch(self, runfunc, individuals):
+        """
+        Evaluates all `individuals` with a single call to the `simulate_batch` method of the optimizee `runfunc`
+        belongs to (see :meth:`~l2l.optimizees.optimizee.Optimizee.simulate_batch`).
+        :return: The list of fitnesses, or None if the optimizee does not implement batched simulation
+        """
+        simulate_batch = getattr(getattr(runfunc, '__self__', None), 'simulate_batch', None)
+        if simulate_batch is None:
+            return None
+        try:
+            return simulate_batch(self.trajectory, individuals)
+        except NotImplementedError:
+            return None
+
     def add_postprocessing(self, func):
         """
         Function to add a postprocessing step
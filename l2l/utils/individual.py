@@ -25,6 +25,13 @@ class Individual(ParameterGroup):
         if attr == 'keys':
             return self.params.keys()
         ret = self.params.get('individual.' + attr)
+        if ret is None and 'individual.encoding' in self.params:
+            # Encoded individuals (see :class:`~l2l.optimizers.seeded_perturbations.SeededPerturbationEncoding`) are
+            # decoded when their parameters are accessed
+            encoding = self.params['individual.encoding']
+            decoded_individual = encoding.decode_individual(self.params['individual.noise_seed'],
+                                                            self.params['individual.noise_sign'])
+            ret = decoded_individual.get(attr)
         return ret
 
     def __getitem__(self, key):